@@ -0,0 +1,117 @@
+"""Benchmark the discovery routes: per-request JSON vs precomputed documents.
+
+Drives the full ASGI app (routing, CORS and metrics middleware) in process
+and reports requests per second for / and the OAuth metadata route:
+
+- before: the SDK's metadata handler and a JSONResponse built per request,
+  behind the auth middleware and routing
+- after: the precomputed documents served ahead of them (200 with the body)
+- after, 304: a revalidation with a matching If-None-Match
+
+    python benchmarks/bench_discovery.py --requests 20000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from mcp_simple_auth.discovery import StaticDocumentMiddleware
+from mcp_simple_auth.server import METADATA_PATH, ServerSettings, create_app
+
+
+def use_per_request_handlers(app: Starlette) -> None:
+    """Route the documents again, building their JSON on every request."""
+    app.user_middleware = [
+        middleware
+        for middleware in app.user_middleware
+        if middleware.cls is not StaticDocumentMiddleware
+    ]
+
+    async def root_endpoint(request: Request) -> Response:
+        return JSONResponse(
+            {
+                "mcp": {"version": "1.0"},
+                "capabilities": {"tools": {}},
+                "transport": {"type": "sse", "endpoint": "/sse"},
+            }
+        )
+
+    # The SDK's metadata route is still in place behind the middleware
+    routes = app.router.routes
+    for index, route in enumerate(routes):
+        if isinstance(route, Route) and route.path == "/":
+            routes[index] = Route("/", endpoint=root_endpoint, methods=["GET"])
+
+
+Headers = list[tuple[bytes, bytes]]
+
+
+async def get(app: Starlette, path: str, headers: Headers) -> tuple[int, Headers]:
+    """Send one GET straight to the ASGI app, returning status and headers."""
+    scope: dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 9090),
+    }
+    start: dict[str, Any] = {}
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            start.update(message)
+
+    await app(scope, receive, send)
+    return start["status"], start["headers"]
+
+
+async def rate(app: Starlette, path: str, requests: int, headers: Headers) -> float:
+    for _ in range(100):
+        await get(app, path, headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await get(app, path, headers)
+    return requests / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    settings = ServerSettings(github_client_id="x", github_client_secret="x")
+    before = create_app(settings, "sse")
+    use_per_request_handlers(before)
+    after = create_app(settings, "sse")
+
+    print(f"{'route':<42} {'before':>10} {'after':>10} {'after 304':>10}")
+    for path in ("/", METADATA_PATH):
+        _, response_headers = await get(after, path, [])
+        revalidate = [(b"if-none-match", dict(response_headers)[b"etag"])]
+        rates = [
+            await rate(before, path, args.requests, []),
+            await rate(after, path, args.requests, []),
+            await rate(after, path, args.requests, revalidate),
+        ]
+        print(f"{path:<42}" + "".join(f" {r:>10,.0f}" for r in rates))
+    print("(requests per second, in process)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+"""Benchmark the GraphQL overview against the REST calls it replaces.
+
+Starts benchmarks/fake_github.py with per-request latency and times, through
+the server's GitHubClient (response cache off), fetching a user's profile
+plus the first page of their repositories, organizations and pull requests:
+
+- graphql: the single viewer query get_user_overview sends
+- rest sequential: /user, /user/repos, /user/orgs, /search/issues in turn
+- rest concurrent: /user, then the other three at once (they need the login)
+
+and, with --all-pages, paging through everything both ways.
+
+    python benchmarks/bench_graphql.py --latency 0.05 --rounds 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+from flow import fake_github
+
+from mcp_simple_auth.github import GitHubClient
+from mcp_simple_auth.graphql import SECTIONS, page, page_variables, viewer_query
+from mcp_simple_auth.server import ServerSettings
+
+PER_PAGE = 30
+
+
+async def github_token(base_url: str) -> str:
+    """Get a token from the fake GitHub's OAuth endpoints."""
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        response = await client.get(
+            "/login/oauth/authorize",
+            params={"redirect_uri": "http://127.0.0.1/callback", "state": "s"},
+        )
+        code = httpx.URL(response.headers["location"]).params["code"]
+        response = await client.post("/login/oauth/access_token", data={"code": code})
+        return response.json()["access_token"]
+
+
+async def graphql_overview(github: GitHubClient, token: str) -> int:
+    variables: dict[str, Any] = {}
+    for section in SECTIONS:
+        variables.update(page_variables(section, PER_PAGE, None))
+    await github.graphql(viewer_query(tuple(SECTIONS)), variables, token)
+    return 1
+
+
+async def rest_overview(
+    github: GitHubClient, token: str, concurrent: bool = False
+) -> int:
+    user = (await github.api_get("/user", token)).json()
+    paths = [
+        f"/user/repos?per_page={PER_PAGE}&sort=updated",
+        f"/user/orgs?per_page={PER_PAGE}",
+        f"/search/issues?q=author:{user['login']}+type:pr&per_page={PER_PAGE}",
+    ]
+    if concurrent:
+        await asyncio.gather(*(github.api_get(path, token) for path in paths))
+    else:
+        for path in paths:
+            await github.api_get(path, token)
+    return 1 + len(paths)
+
+
+async def graphql_all_pages(github: GitHubClient, token: str) -> int:
+    """Page every section, all of them advancing in each query."""
+    cursors: dict[str, str | None] = {section: None for section in SECTIONS}
+    requests = 0
+    while cursors:
+        variables: dict[str, Any] = {}
+        for section, after in cursors.items():
+            variables.update(page_variables(section, 100, after))
+        data = await github.graphql(
+            viewer_query(tuple(cursors), profile=False), variables, token
+        )
+        requests += 1
+        for section in list(cursors):
+            cursors[section] = page(data["viewer"][section])["next_cursor"]
+            if cursors[section] is None:
+                del cursors[section]
+    return requests
+
+
+async def rest_all_pages(github: GitHubClient, token: str) -> int:
+    """Follow each REST listing's Link headers, listings run concurrently."""
+
+    async def follow(path: str) -> int:
+        requests = 0
+        url: str | None = path
+        while url:
+            response = await github.api_get(url, token)
+            requests += 1
+            next_url = response.links.get("next", {}).get("url")
+            url = httpx.URL(next_url).raw_path.decode() if next_url else None
+        return requests
+
+    user = (await github.api_get("/user", token)).json()
+    counts = await asyncio.gather(
+        follow("/user/repos?per_page=100"),
+        follow("/user/orgs?per_page=100"),
+        follow(f"/search/issues?q=author:{user['login']}+type:pr&per_page=100"),
+    )
+    return 1 + sum(counts)
+
+
+async def bench(port: int, rounds: int, all_pages: bool) -> None:
+    base_url = f"http://127.0.0.1:{port}"
+    settings = ServerSettings(
+        github_client_id="x",
+        github_client_secret="x",
+        github_api_url=base_url,
+        github_cache_size=0,
+    )
+    github = GitHubClient(settings)
+    token = await github_token(base_url)
+    cases: dict[str, Callable[[], Awaitable[int]]] = {
+        "graphql": lambda: graphql_overview(github, token),
+        "rest sequential": lambda: rest_overview(github, token),
+        "rest concurrent": lambda: rest_overview(github, token, concurrent=True),
+    }
+    if all_pages:
+        cases["graphql all pages"] = lambda: graphql_all_pages(github, token)
+        cases["rest all pages"] = lambda: rest_all_pages(github, token)
+
+    async with github.running():
+        for case in cases.values():
+            await case()  # Warm up connections
+        for name, case in cases.items():
+            times = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                requests = await case()
+                times.append(time.perf_counter() - start)
+            print(
+                f"{name:>20}: {requests:3d} requests, "
+                f"median {statistics.median(times) * 1000:8.1f} ms, "
+                f"max {max(times) * 1000:8.1f} ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--repositories", type=int, default=250)
+    parser.add_argument("--organizations", type=int, default=8)
+    parser.add_argument("--pull-requests", type=int, default=120)
+    parser.add_argument("--all-pages", action="store_true")
+    args = parser.parse_args()
+
+    github_args = [
+        "--latency", str(args.latency),
+        "--repositories", str(args.repositories),
+        "--organizations", str(args.organizations),
+        "--pull-requests", str(args.pull_requests),
+    ]  # fmt: skip
+    with fake_github(*github_args) as port:
+        asyncio.run(bench(port, args.rounds, args.all_pages))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark token verification by introspection, uncached vs cached.
+
+Starts the fake GitHub and the server with /introspect enabled, takes
+--tokens clients through the OAuth flow, then verifies their access tokens
+(load_access_token plus the GitHub token lookup a tool call does) --ops
+times, --concurrency at a time, with an IntrospectionVerifier whose cache
+is off and with one caching for --cache-ttl seconds. Reports
+verifications per second and latency percentiles.
+
+    python benchmarks/bench_introspection.py --tokens 50 --ops 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+from flow import fake_github, free_port, issue_tokens, process, server_env
+
+from mcp_simple_auth.introspection import IntrospectionVerifier
+
+SECRET = "bench-introspection-secret"
+
+
+async def verify_all(
+    verifier: IntrospectionVerifier, tokens: list[str], ops: int, concurrency: int
+) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+
+    async def worker(offset: int) -> None:
+        for i in range(offset, ops, concurrency):
+            token = tokens[i % len(tokens)]
+            start = time.perf_counter()
+            assert await verifier.load_access_token(token) is not None
+            assert await verifier.get_github_token(token) is not None
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return ops / (time.perf_counter() - start), latencies
+
+
+async def run(args: argparse.Namespace, port: int) -> None:
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(timeout=60) as client:
+        tokens = [
+            (await issue_tokens(client, base_url))["access_token"]
+            for _ in range(args.tokens)
+        ]
+
+    print(f"{'verifier':<20} {'verifications/s':>16} {'p50':>10} {'p99':>10}")
+    runs = (("uncached", 0.0), (f"cached {args.cache_ttl:g}s", args.cache_ttl))
+    for name, ttl in runs:
+        verifier = IntrospectionVerifier(
+            f"{base_url}/introspect", SECRET, cache_ttl=ttl, negative_cache_ttl=ttl
+        )
+        async with verifier.running():
+            rate, latencies = await verify_all(
+                verifier, tokens, args.ops, args.concurrency
+            )
+        cuts = statistics.quantiles(latencies, n=100)
+        print(
+            f"{name:<20} {rate:>16,.0f} {cuts[49] * 1e6:>8.0f}us "
+            f"{cuts[98] * 1e6:>8.0f}us"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--cache-ttl", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with fake_github() as github_port:
+        port = free_port()
+        env = server_env(port, github_port, introspection_secret=SECRET)
+        command = [
+            sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+            "--port", str(port),
+        ]  # fmt: skip
+        with process(command, port, env):
+            asyncio.run(run(args, port))
+
+
+if __name__ == "__main__":
+    main()
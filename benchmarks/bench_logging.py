@@ -0,0 +1,121 @@
+"""Time what logging costs the thread that logs: in-line handler vs queue.
+
+Logs --records access-log-like records, paced like requests, with
+logging.basicConfig writing a file as the server did, and through
+configure_logging() writing JSON from its background thread. Each is run
+against a regular file and against a stalled disk: a FIFO read by a thread
+that takes --stall-bytes every --stall-interval seconds.
+
+Reports the time spent in the logging call, which is what the event loop
+pays, as a mean and the worst single call, and the lines that arrived.
+
+    python benchmarks/bench_logging.py --records 20000
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+
+from mcp_simple_auth.logs import configure_logging
+
+EXTRA = {
+    "method": "POST",
+    "path": "/messages/",
+    "query": "session_id=0123456789abcdef0123456789abcdef",
+    "status": 202,
+    "duration_ms": 1.25,
+    "bytes": 8,
+    "client": "127.0.0.1",
+}
+PACING = 0.0001  # Seconds between records
+
+
+def reset_logging() -> None:
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def inline(path: str) -> Callable[[], None]:
+    logging.basicConfig(level=logging.INFO, filename=path, force=True)
+    return reset_logging
+
+
+def queued(path: str) -> Callable[[], None]:
+    writer = configure_logging("json", path)
+
+    def finish() -> None:
+        writer.stop()
+        reset_logging()
+
+    return finish
+
+
+def slow_reader(
+    path: str, args: argparse.Namespace, lines: list[int]
+) -> threading.Thread:
+    """Drain the FIFO at path slowly, counting lines, until it is closed."""
+
+    def read() -> None:
+        with open(path, "rb") as f:
+            while chunk := os.read(f.fileno(), args.stall_bytes):
+                lines[0] += chunk.count(b"\n")
+                time.sleep(args.stall_interval)
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    return thread
+
+
+def run(
+    name: str,
+    setup: Callable[[str], Callable[[], None]],
+    stalled: bool,
+    args: argparse.Namespace,
+) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "server.log")
+        lines = [0]
+        reader = None
+        if stalled:
+            os.mkfifo(path)
+            reader = slow_reader(path, args, lines)
+        finish = setup(path)
+        logger = logging.getLogger("mcp_simple_auth.access")
+        calls = []
+        for _ in range(args.records):
+            start = time.perf_counter()
+            logger.info("POST /messages/ 202", extra=EXTRA)
+            calls.append(time.perf_counter() - start)
+            time.sleep(PACING)
+        finish()
+        if reader is not None:
+            reader.join()
+        else:
+            lines[0] = sum(1 for _ in open(path))
+    disk = "stalled disk" if stalled else "file"
+    print(
+        f"{name:<12} {disk:<13} mean {statistics.mean(calls) * 1e6:7.1f} us, "
+        f"worst {max(calls) * 1e3:8.2f} ms per call; {lines[0]} lines written"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--stall-bytes", type=int, default=64 * 1024)
+    parser.add_argument("--stall-interval", type=float, default=0.5)
+    args = parser.parse_args()
+    for stalled in (False, True):
+        run("basicConfig", inline, stalled, args)
+        run("queued JSON", queued, stalled, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Open thousands of SSE streams that go quiet and check they are reaped.
+
+Starts the fake GitHub and the server on the SSE transport and opens
+--streams streams that never post a message, like clients that connect and
+hang, plus --slow-consumers sessions that call a large tool repeatedly but
+never read their stream. Reports the server's resident memory and session
+gauges with the streams open and once the handshake and send timeouts have
+passed, over --rounds rounds. Fails unless every stream received heartbeats
+and was reaped, and memory stays flat after the first round.
+
+    python benchmarks/bench_sse_sessions.py --streams 2000 --slow-consumers 5
+"""
+
+import argparse
+import asyncio
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+from flow import fake_github, free_port, issue_tokens, process, server_env
+
+SESSION_METRICS = ("mcp_sse_sessions{", "mcp_sse_sessions_reaped_total{")
+
+
+def rss_mib(pid: int) -> float:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    raise ValueError("No VmRSS")
+
+
+async def session_metrics(client: httpx.AsyncClient, base_url: str) -> dict[str, float]:
+    response = await client.get(f"{base_url}/metrics")
+    return {
+        name: float(value)
+        for name, value in (
+            line.rsplit(" ", 1)
+            for line in response.text.splitlines()
+            if line.startswith(SESSION_METRICS)
+        )
+    }
+
+
+class Stream:
+    """A raw SSE stream, read only when asked to."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.endpoint = ""
+
+    @classmethod
+    async def open(
+        cls, port: int, token: str, receive_buffer: int | None = None
+    ) -> "Stream":
+        sock = socket.socket()
+        if receive_buffer:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+        reader, writer = await asyncio.open_connection(sock=sock)
+        writer.write(
+            f"GET /sse HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+            f"Authorization: Bearer {token}\r\n"
+            "Accept: text/event-stream\r\n\r\n".encode()
+        )
+        stream = cls(reader, writer)
+        while not stream.endpoint:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("Stream closed before the endpoint event")
+            if line.startswith(b"data: /"):
+                stream.endpoint = line[6:].decode().strip()
+        return stream
+
+    async def drain(self, timeout: float) -> tuple[int, bool]:
+        """Read what is left: the heartbeats in it and whether the stream ended."""
+        heartbeats = 0
+        try:
+            async with asyncio.timeout(timeout):
+                while line := await self.reader.readline():
+                    heartbeats += line.startswith(b": ping")
+                return heartbeats, True
+        except (TimeoutError, ConnectionError):
+            return heartbeats, False
+        finally:
+            self.writer.close()
+
+
+async def slow_consumer(
+    client: httpx.AsyncClient, base_url: str, port: int, token: str, calls: int
+) -> Stream:
+    """Start a session and queue large tool results it never reads."""
+    stream = await Stream.open(port, token, receive_buffer=4096)
+    url = f"{base_url}{stream.endpoint}"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def post(message: dict[str, Any]) -> bool:
+        response = await client.post(url, headers=headers, json=message)
+        return response.status_code == 202
+
+    await post(
+        {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-03-26",
+                "capabilities": {},
+                "clientInfo": {"name": "bench", "version": "1.0"},
+            },
+        }
+    )
+    await post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    call = {
+        "name": "list_issues",
+        "arguments": {"repo": "octo/repo", "max_items": 1000},
+    }
+    for i in range(1, calls + 1):
+        if not await post(
+            {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": call}
+        ):
+            break  # Reaped
+    return stream
+
+
+async def run_round(
+    client: httpx.AsyncClient, args: argparse.Namespace, port: int, token: str
+) -> bool:
+    """Open the streams, wait out the timeouts; whether all were reaped."""
+    base_url = f"http://127.0.0.1:{port}"
+    before = await session_metrics(client, base_url)
+    semaphore = asyncio.Semaphore(200)
+
+    async def open_quiet() -> Stream:
+        async with semaphore:
+            return await Stream.open(port, token)
+
+    start = time.perf_counter()
+    streams = await asyncio.gather(*(open_quiet() for _ in range(args.streams)))
+    opened = time.perf_counter() - start
+    slow = await asyncio.gather(
+        *(
+            slow_consumer(client, base_url, port, token, args.calls)
+            for _ in range(args.slow_consumers)
+        )
+    )
+    open_metrics = await session_metrics(client, base_url)
+    active = open_metrics.get('mcp_sse_sessions{state="active"}', 0)
+    print(f"  {args.streams} quiet streams opened in {opened:.1f}s, "
+          f"{active:g} sessions active")  # fmt: skip
+
+    # Reaped within a heartbeat of the handshake or send timeout
+    await asyncio.sleep(
+        max(args.handshake_timeout, args.send_timeout) + 2 * args.heartbeat
+    )
+    results = await asyncio.gather(*(stream.drain(5) for stream in streams))
+    for stream in slow:
+        stream.writer.close()
+    after = await session_metrics(client, base_url)
+
+    def reaped(reason: str) -> float:
+        name = f'mcp_sse_sessions_reaped_total{{reason="{reason}"}}'
+        return after.get(name, 0) - before.get(name, 0)
+
+    ended = sum(closed for _, closed in results)
+    heartbeats = sum(count for count, _ in results) / max(1, len(results))
+    print(f"  ended by the server: {ended}/{args.streams} quiet streams "
+          f"({heartbeats:.1f} heartbeats each); reaped "
+          f"{reaped('handshake'):g} at handshake, "
+          f"{reaped('slow_consumer'):g} slow consumers")  # fmt: skip
+    return (
+        ended == args.streams
+        and heartbeats >= 1
+        and reaped("handshake") == args.streams
+        and reaped("slow_consumer") == args.slow_consumers
+    )
+
+
+async def run(args: argparse.Namespace, port: int, pid: int) -> bool:
+    passed = True
+    async with httpx.AsyncClient(timeout=60) as client:
+        token = (await issue_tokens(client, f"http://127.0.0.1:{port}"))["access_token"]
+        rss = [rss_mib(pid)]
+        print(f"server RSS {rss[0]:.1f} MiB before any stream")
+        for i in range(1, args.rounds + 1):
+            print(f"round {i}:")
+            passed &= await run_round(client, args, port, token)
+            await asyncio.sleep(1)
+            rss.append(rss_mib(pid))
+            print(f"  server RSS {rss[-1]:.1f} MiB after reaping")
+    # The first round grows the heap; later rounds must reuse it
+    growth = rss[-1] - rss[1]
+    print(f"RSS growth after the first round: {growth:.1f} MiB")
+    return passed and growth < args.max_growth
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--slow-consumers", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=40, help="per slow consumer")
+    parser.add_argument("--heartbeat", type=float, default=1.0)
+    parser.add_argument("--handshake-timeout", type=float, default=10.0)
+    parser.add_argument("--send-timeout", type=float, default=5.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument(
+        "--max-growth", type=float, default=10.0, help="MiB after the first round"
+    )
+    args = parser.parse_args()
+
+    with fake_github("--issues", "1000") as github_port:
+        port = free_port()
+        env = server_env(
+            port,
+            github_port,
+            sse_heartbeat_interval=str(args.heartbeat),
+            sse_handshake_timeout=str(args.handshake_timeout),
+            sse_send_timeout=str(args.send_timeout),
+        )
+        command = [
+            sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+            "--port", str(port), "--transport", "sse",
+        ]  # fmt: skip
+        with process(command, port, env) as server:
+            passed = asyncio.run(run(args, port, server.pid))
+    print("PASS" if passed else "FAIL")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Cold-start benchmark: time to the first accepted connection and response.
+
+Launches `python -m mcp_simple_auth` repeatedly and measures, from spawn:
+
+- accept: the first TCP connection the server accepts
+- response: the first 200 from GET /
+- help: how long `--help` takes to exit
+
+and writes the medians (and minimums) as JSON. With --baseline the run fails
+if any median got slower than the baseline's by more than --tolerance.
+
+    python benchmarks/bench_startup.py --runs 10 --output startup.json
+    python benchmarks/bench_startup.py --baseline startup.json
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+from flow import free_port
+
+ENV = {
+    **os.environ,
+    "MCP_GITHUB_GITHUB_CLIENT_ID": "bench-client",
+    "MCP_GITHUB_GITHUB_CLIENT_SECRET": "bench-secret",
+}
+
+
+def start_once(transport: str, timeout: float = 30.0) -> tuple[float, float]:
+    """Seconds from spawning the server to its first accept and first 200."""
+    port = free_port()
+    command = [
+        sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+        "--port", str(port), "--transport", transport,
+    ]  # fmt: skip
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        command, env=ENV, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    accepted = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited with {proc.returncode}")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=timeout):
+                    pass
+            except OSError:
+                time.sleep(0.001)
+                continue
+            if accepted is None:
+                accepted = time.perf_counter() - start
+            try:
+                # Sent once accepted; it waits in the backlog until serving starts
+                response = httpx.get(f"http://127.0.0.1:{port}/", timeout=timeout)
+            except httpx.TransportError:
+                continue
+            if response.status_code == 200:
+                return accepted, time.perf_counter() - start
+        raise TimeoutError("Server did not respond")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def help_once() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "mcp_simple_auth", "--help"],
+        env=ENV,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def summary(samples: list[float]) -> dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "min_ms": round(min(samples) * 1000, 1),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--transport", choices=["sse", "streamable-http"], default="streamable-http"
+    )
+    parser.add_argument("--output", help="write the JSON report here, not stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    accepts, responses, helps = [], [], []
+    for _ in range(args.runs):
+        accepted, responded = start_once(args.transport)
+        accepts.append(accepted)
+        responses.append(responded)
+        helps.append(help_once())
+
+    report = {
+        "config": {"runs": args.runs, "transport": args.transport},
+        "accept": summary(accepts),
+        "response": summary(responses),
+        "help": summary(helps),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressed = False
+        for name in ("accept", "response", "help"):
+            current, before = report[name]["median_ms"], baseline[name]["median_ms"]
+            if current > before * (1 + args.tolerance):
+                print(
+                    f"REGRESSION: {name} median {current:.1f}ms > "
+                    f"baseline {before:.1f}ms",
+                    file=sys.stderr,
+                )
+                regressed = True
+        if regressed:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
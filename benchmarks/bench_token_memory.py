@@ -0,0 +1,162 @@
+"""Measure the memory the in-memory store takes per session and per state.
+
+Fills a TokenStore with --sessions exchanged sessions (a GitHub token with an
+MCP access and refresh token pair) and --states pending authorize states, as
+the provider stores them, and reports the bytes allocated per entry, traced
+with tracemalloc. The previous layout, pydantic models in dicts with the
+token string maps and index sets beside them, is filled alongside for
+comparison.
+
+    python benchmarks/bench_token_memory.py --sessions 100000 --states 10000
+"""
+
+import argparse
+import gc
+import heapq
+import secrets
+import string
+import time
+import tracemalloc
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from pydantic import AnyHttpUrl
+
+from mcp_simple_auth.token_store import TokenStore
+
+REDIRECT_URI = "https://claude.ai/api/mcp/auth_callback"
+ALPHANUMERIC = string.ascii_letters + string.digits
+
+
+class Session:
+    """The tokens of one session, as the provider makes them."""
+
+    def __init__(self, i: int, now: int):
+        client_id = f"client_{i % 1000}"
+        self.github = AccessToken(
+            token="gho_" + "".join(secrets.choice(ALPHANUMERIC) for _ in range(36)),
+            client_id=client_id,
+            scopes=["user"],
+            expires_at=None,
+        )
+        self.code = AuthorizationCode(
+            code=f"mcp_{secrets.token_hex(16)}",
+            client_id=client_id,
+            redirect_uri=AnyHttpUrl(REDIRECT_URI),
+            redirect_uri_provided_explicitly=True,
+            expires_at=now + 300,
+            scopes=["claudeai"],
+            code_challenge=secrets.token_urlsafe(32),
+        )
+        self.access = AccessToken(
+            token=f"mcp_{secrets.token_hex(32)}",
+            client_id=client_id,
+            scopes=["claudeai"],
+            expires_at=now + 3600,
+        )
+        self.refresh = RefreshToken(
+            token=f"mcp_rt_{secrets.token_hex(32)}",
+            client_id=client_id,
+            scopes=["claudeai"],
+            expires_at=now + 30 * 86400,
+        )
+
+
+def state(i: int) -> tuple[str, dict[str, str]]:
+    return secrets.token_hex(16), {
+        "redirect_uri": REDIRECT_URI,
+        "code_challenge": secrets.token_urlsafe(32),
+        "redirect_uri_provided_explicitly": "True",
+        "client_id": f"client_{i % 1000}",
+    }
+
+
+def fill_store(sessions: int, states: int, now: int) -> TokenStore:
+    store = TokenStore()
+    for i in range(sessions):
+        session = Session(i, now)
+        store.add_pending_authorization(session.code, session.github)
+        store.redeem_auth_code(session.code.code, session.access, session.refresh)
+    for i in range(states):
+        store.add_state(*state(i), now + 600)
+    return store
+
+
+def fill_models(sessions: int, states: int, now: int) -> dict[str, Any]:
+    """The previous layout: models as given, token strings in every map."""
+    maps: dict[str, Any] = {
+        name: {}
+        for name in (
+            "tokens",
+            "refresh_tokens",
+            "github_tokens",
+            "token_mapping",
+            "state_mapping",
+            "tokens_by_client",
+            "github_refs",
+            "pairs",
+            "deadlines",
+        )
+    }
+    heap: list[tuple[float, str, str]] = []
+
+    def schedule(kind: str, key: str, deadline: float) -> None:
+        maps["deadlines"][(kind, key)] = deadline
+        heapq.heappush(heap, (deadline, kind, key))
+
+    for i in range(sessions):
+        session = Session(i, now)
+        github, access, refresh = session.github, session.access, session.refresh
+        maps["github_tokens"][github.token] = github
+        for token in (access, refresh):
+            maps["tokens" if token is access else "refresh_tokens"][token.token] = token
+            maps["token_mapping"][token.token] = github.token
+            maps["github_refs"].setdefault(github.token, set()).add(token.token)
+            schedule("token", token.token, token.expires_at)
+        maps["tokens_by_client"].setdefault(access.client_id, set()).add(access.token)
+        maps["pairs"][access.token] = refresh.token
+        maps["pairs"][refresh.token] = access.token
+    for i in range(states):
+        key, data = state(i)
+        maps["state_mapping"][key] = data
+        schedule("state", key, now + 600)
+    maps["heap"] = heap
+    return maps
+
+
+def traced(fill: Callable[[], Any]) -> tuple[int, Any]:
+    """Bytes allocated by fill and still held, and what it returned."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fill()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--states", type=int, default=10_000)
+    args = parser.parse_args()
+
+    now = int(time.time())
+    print(f"{'layout':<18} {'per session':>12} {'per state':>10} {'total':>10}")
+    for name, fill in (("pydantic models", fill_models), ("TokenStore", fill_store)):
+        session_bytes, kept = traced(partial(fill, args.sessions, 0, now))
+        del kept
+        total, kept = traced(partial(fill, args.sessions, args.states, now))
+        del kept
+        state_bytes = (total - session_bytes) / max(1, args.states)
+        print(
+            f"{name:<18} {session_bytes / args.sessions:>10.0f} B "
+            f"{state_bytes:>8.0f} B {total / 2**20:>7.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
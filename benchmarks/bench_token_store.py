@@ -0,0 +1,138 @@
+"""Benchmark token store operations against the number of live tokens.
+
+Fills a TokenStore with N sessions (one GitHub token and one MCP token each)
+and times the code exchange, token lookup and revocation paths. The legacy
+linear scan over all tokens is timed alongside for comparison.
+
+    python benchmarks/bench_token_store.py --sizes 1000,10000,100000,1000000
+"""
+
+import argparse
+import gc
+import time
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode
+from pydantic import AnyHttpUrl
+
+from mcp_simple_auth.token_store import TokenStore, unpack_token
+
+REDIRECT_URI = AnyHttpUrl("https://claude.ai/api/mcp/auth_callback")
+
+
+def make_code(code: str, client_id: str) -> AuthorizationCode:
+    return AuthorizationCode.model_construct(
+        code=code,
+        client_id=client_id,
+        redirect_uri=REDIRECT_URI,
+        redirect_uri_provided_explicitly=True,
+        expires_at=time.time() + 300,
+        scopes=["claudeai"],
+        code_challenge="x",
+    )
+
+
+def make_token(token: str, client_id: str) -> AccessToken:
+    return AccessToken.model_construct(
+        token=token, client_id=client_id, scopes=["claudeai"], expires_at=None
+    )
+
+
+def fill(store: TokenStore, size: int) -> list[str]:
+    """Create size/2 exchanged sessions, returning their MCP tokens."""
+    mcp_tokens = []
+    for i in range(size // 2):
+        client_id = f"client_{i % 1000}"
+        github_token = f"gho_{i:036d}"
+        code = f"code_{i}"
+        store.add_pending_authorization(
+            make_code(code, client_id), make_token(github_token, client_id)
+        )
+        mcp_token = f"mcp_{i:064d}"
+        store.redeem_auth_code(code, make_token(mcp_token, client_id))
+        mcp_tokens.append(mcp_token)
+    return mcp_tokens
+
+
+def time_per_op(fn, ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return (time.perf_counter() - start) / ops * 1e9
+
+
+def bench(size: int, ops: int, scan_ops: int) -> dict[str, float]:
+    store = TokenStore()
+    mcp_tokens = fill(store, size)
+    # Keep full GC passes over the prefilled objects out of the timings
+    gc.collect()
+    gc.freeze()
+
+    def exchange(i: int) -> None:
+        client_id = f"client_{i % 1000}"
+        code = f"bench_code_{i}"
+        store.add_pending_authorization(
+            make_code(code, client_id), make_token(f"gho_bench_{i}", client_id)
+        )
+        store.redeem_auth_code(code, make_token(f"mcp_bench_{i}", client_id))
+
+    def lookup(i: int) -> None:
+        token = mcp_tokens[i % len(mcp_tokens)]
+        store.get_access_token(token)
+        store.get_github_token(token)
+
+    def revoke(i: int) -> None:
+        store.revoke(f"mcp_bench_{i}")
+
+    # The pre-index exchange: scan every token for a GitHub one of this client
+    all_tokens = {
+        unpack_token(key): record
+        for key, record in [*store.tokens.items(), *store.github_tokens.items()]
+    }
+
+    def legacy_scan(i: int) -> None:
+        client_id = f"client_{i % 1000}"
+        next(
+            (
+                token
+                for token, data in all_tokens.items()
+                if (token.startswith("ghu_") or token.startswith("gho_"))
+                and data.client_id == client_id
+                and token.startswith("gho_bench")
+            ),
+            None,
+        )
+
+    results = {
+        "exchange_ns": time_per_op(exchange, ops),
+        "lookup_ns": time_per_op(lookup, ops),
+        "revoke_ns": time_per_op(revoke, ops),
+        "legacy_scan_ns": time_per_op(legacy_scan, scan_ops),
+    }
+    gc.unfreeze()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--scan-ops", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        f"{'tokens':>10} {'exchange':>12} {'lookup':>12} {'revoke':>12}"
+        f" {'legacy scan':>14}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = bench(size, args.ops, args.scan_ops)
+        print(
+            f"{size:>10} "
+            f"{result['exchange_ns']:>10.0f}ns "
+            f"{result['lookup_ns']:>10.0f}ns "
+            f"{result['revoke_ns']:>10.0f}ns "
+            f"{result['legacy_scan_ns'] / 1e6:>12.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
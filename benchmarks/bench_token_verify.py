@@ -0,0 +1,103 @@
+"""Benchmark access token verification: stored opaque vs signed tokens.
+
+Issues tokens through the provider's code exchange and times
+load_access_token plus the GitHub token lookup a tool call does, for
+opaque tokens in the process-local in-memory store and in SQLite (the
+shared store several workers would use), and for signed HS256 and EdDSA
+tokens, the latter also with a populated revocation denylist.
+
+    python benchmarks/bench_token_verify.py --tokens 10000 --ops 50000
+"""
+
+import argparse
+import asyncio
+import gc
+import secrets
+import tempfile
+import time
+from pathlib import Path
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode
+from mcp.shared.auth import OAuthClientInformationFull
+from pydantic import AnyHttpUrl
+
+from mcp_simple_auth.server import ServerSettings, SimpleGitHubOAuthProvider
+
+REDIRECT_URI = AnyHttpUrl("https://claude.ai/api/mcp/auth_callback")
+
+MODES = {
+    "opaque memory": {},
+    "opaque sqlite": {"storage": "sqlite"},
+    "signed HS256": {"access_token_format": "signed", "token_signing_keys": "k1:s"},
+    "signed EdDSA": {
+        "access_token_format": "signed",
+        "token_signing_algorithm": "EdDSA",
+        "token_signing_keys": "k1:s",
+    },
+}
+
+
+async def issue(provider: SimpleGitHubOAuthProvider, count: int) -> list[str]:
+    client = OAuthClientInformationFull(client_id="bench", redirect_uris=[REDIRECT_URI])
+    tokens = []
+    for i in range(count):
+        code = AuthorizationCode(
+            code=f"code_{i}",
+            client_id="bench",
+            redirect_uri=REDIRECT_URI,
+            redirect_uri_provided_explicitly=True,
+            expires_at=time.time() + 300,
+            scopes=["claudeai"],
+            code_challenge="x",
+        )
+        await provider.store.add_pending_authorization(
+            code, AccessToken(token=f"gho_{i:036d}", client_id="bench", scopes=[])
+        )
+        result = await provider.exchange_authorization_code(client, code)
+        tokens.append(result.access_token)
+    return tokens
+
+
+async def bench(settings: dict[str, str], count: int, ops: int, revoked: int) -> float:
+    provider = SimpleGitHubOAuthProvider(
+        ServerSettings(github_client_id="x", github_client_secret="x", **settings)
+    )
+    async with provider.store.running():
+        tokens = await issue(provider, count)
+        for _ in range(revoked):
+            provider.denylist.add(secrets.token_hex(16), time.time() + 3600)
+        gc.collect()
+        gc.freeze()
+        start = time.perf_counter()
+        for i in range(ops):
+            token = tokens[i % count]
+            assert await provider.load_access_token(token) is not None
+            assert await provider.get_github_token(token) is not None
+        elapsed = time.perf_counter() - start
+        gc.unfreeze()
+    return ops / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=10000)
+    parser.add_argument("--ops", type=int, default=50000)
+    parser.add_argument("--revoked", type=int, default=10000)
+    args = parser.parse_args()
+
+    runs = [(name, settings, 0) for name, settings in MODES.items()]
+    runs += [
+        (f"{name} +{args.revoked} revoked", settings, args.revoked)
+        for name, settings in MODES.items()
+        if name.startswith("signed")
+    ]
+    print(f"{'mode':<32} {'verifications/s':>16} {'per op':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (name, settings, revoked) in enumerate(runs):
+            settings = {"sqlite_path": str(Path(tmp) / f"{i}.db"), **settings}
+            rate = asyncio.run(bench(settings, args.tokens, args.ops, revoked))
+            print(f"{name:<32} {rate:>16,.0f} {1e6 / rate:>8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
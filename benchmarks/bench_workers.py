@@ -0,0 +1,80 @@
+"""Run the full OAuth + tool-call flow against a multi-worker server.
+
+Starts the fake GitHub and `mcp-simple-auth --workers N` with SQLite storage
+for each N, drives concurrent clients through the whole flow, and fails if
+any step fails. Since consecutive steps of a flow land on arbitrary workers,
+a passing run shows the shared state works; flows/s per N shows scaling.
+
+    python benchmarks/bench_workers.py --workers 1,2,4 --flows 200
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from flow import fake_github, free_port, process, run_flow, server_env
+
+
+async def drive(base_url: str, flows: int, concurrency: int) -> tuple[float, int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = 0
+
+    async def one(client: httpx.AsyncClient) -> None:
+        nonlocal failures
+        async with semaphore:
+            try:
+                await run_flow(client, base_url)
+            except Exception as e:
+                failures += 1
+                print(f"  flow failed: {e}", file=sys.stderr)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client) for _ in range(flows)))
+        return time.perf_counter() - start, failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--flows", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    failed = False
+    baseline = None
+    with fake_github() as github_port, tempfile.TemporaryDirectory() as tmp:
+        for workers in (int(w) for w in args.workers.split(",")):
+            port = free_port()
+            env = server_env(
+                port,
+                github_port,
+                storage="sqlite",
+                sqlite_path=str(Path(tmp) / f"workers-{workers}.db"),
+            )
+            command = [
+                sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+                "--port", str(port), "--transport", "streamable-http",
+                "--workers", str(workers),
+            ]  # fmt: skip
+            with process(command, port, env):
+                elapsed, failures = asyncio.run(
+                    drive(f"http://127.0.0.1:{port}", args.flows, args.concurrency)
+                )
+            rate = args.flows / elapsed
+            baseline = baseline or rate
+            print(
+                f"workers={workers:<3} flows/s={rate:8.1f} "
+                f"scaling={rate / baseline:5.2f}x failures={failures}"
+            )
+            failed = failed or failures > 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
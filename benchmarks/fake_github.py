@@ -0,0 +1,321 @@
+"""Local stand-in for the GitHub OAuth and REST endpoints the server uses.
+
+    python benchmarks/fake_github.py --port 9400 --latency 0.05 --error-rate 0.01
+
+/login/oauth/authorize redirects straight back to redirect_uri with a code,
+/login/oauth/access_token exchanges that code for a gho_ token and /user
+returns a profile (with an ETag) for any token it issued. Each user also has
+repositories, organizations and pull requests, served page by page over REST
+(/user/repos, /user/orgs, /search/issues) and over /graphql for the queries
+mcp_simple_auth.graphql builds (matched by their connection fields, not by
+a real GraphQL parser). Every repository has the same issues and stargazers
+(/repos/{owner}/{repo}/issues and /stargazers).
+
+Every response can be delayed by latency seconds (plus up to jitter more)
+and replaced, with probability error_rate, by a 503 like GitHub's.
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import secrets
+from collections.abc import Awaitable, Callable
+from typing import Any
+from urllib.parse import urlencode
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.routing import Route
+
+Endpoint = Callable[[Request], Awaitable[Response]]
+
+CONNECTION_RE = re.compile(r"(\w+)\(first: \$(\w+), after: \$(\w+)")
+
+
+def profile(user_id: int) -> dict[str, Any]:
+    return {
+        "login": f"user{user_id}",
+        "id": user_id,
+        "name": f"User {user_id}",
+        "email": None,
+        "bio": "Benchmark user",
+        "company": None,
+        "location": None,
+        "html_url": f"https://github.com/user{user_id}",
+        "avatar_url": f"https://avatars.example/u/{user_id}",
+        "created_at": "2020-01-01T00:00:00Z",
+        "followers": 10,
+        "following": 5,
+        "type": "User",
+    }
+
+
+def repository(user_id: int, i: int) -> dict[str, Any]:
+    return {
+        "nameWithOwner": f"user{user_id}/repo{i}",
+        "description": f"Repository {i}",
+        "url": f"https://github.com/user{user_id}/repo{i}",
+        "isPrivate": i % 5 == 0,
+        "isFork": i % 7 == 0,
+        "stargazerCount": i * 3,
+        "updatedAt": "2025-01-01T00:00:00Z",
+        "primaryLanguage": {"name": "Python"},
+    }
+
+
+def organization(user_id: int, i: int) -> dict[str, Any]:
+    return {
+        "login": f"org{i}",
+        "name": f"Organization {i}",
+        "description": None,
+        "url": f"https://github.com/org{i}",
+    }
+
+
+def pull_request(user_id: int, i: int) -> dict[str, Any]:
+    return {
+        "number": i + 1,
+        "title": f"Pull request {i}",
+        "state": "OPEN" if i % 3 else "MERGED",
+        "url": f"https://github.com/user{user_id}/repo{i % 10}/pull/{i + 1}",
+        "createdAt": "2025-01-01T00:00:00Z",
+        "repository": {"nameWithOwner": f"user{user_id}/repo{i % 10}"},
+    }
+
+
+def issue(user_id: int, i: int) -> dict[str, Any]:
+    return {
+        "number": i + 1,
+        "title": f"Issue {i}",
+        "state": "open",
+        "user": {"login": f"user{i % 50}"},
+        "comments": i % 4,
+        "created_at": "2025-01-01T00:00:00Z",
+    }
+
+
+def stargazer(user_id: int, i: int) -> dict[str, Any]:
+    return {"login": f"stargazer{i}", "id": 100000 + i, "type": "User"}
+
+
+def rest_repository(node: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "full_name": node["nameWithOwner"],
+        "description": node["description"],
+        "html_url": node["url"],
+        "private": node["isPrivate"],
+        "fork": node["isFork"],
+        "stargazers_count": node["stargazerCount"],
+        "updated_at": node["updatedAt"],
+        "language": node["primaryLanguage"]["name"],
+    }
+
+
+def create_fake_github(
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    repositories: int = 60,
+    organizations: int = 5,
+    pull_requests: int = 40,
+    issues: int = 250,
+    stargazers: int = 500,
+) -> Starlette:
+    codes: set[str] = set()
+    tokens: dict[str, int] = {}
+    sections = {
+        "repositories": (repositories, repository),
+        "organizations": (organizations, organization),
+        "pullRequests": (pull_requests, pull_request),
+        "issues": (issues, issue),
+        "stargazers": (stargazers, stargazer),
+    }
+
+    def upstream(endpoint: Endpoint) -> Endpoint:
+        async def handle(request: Request) -> Response:
+            delay = latency + random.uniform(0, jitter)
+            if delay:
+                await asyncio.sleep(delay)
+            if error_rate and random.random() < error_rate:
+                return JSONResponse(
+                    {"message": "Service Unavailable (injected)"}, status_code=503
+                )
+            return await endpoint(request)
+
+        return handle
+
+    async def authorize(request: Request) -> Response:
+        code = secrets.token_hex(10)
+        codes.add(code)
+        query = urlencode({"code": code, "state": request.query_params["state"]})
+        return RedirectResponse(
+            f"{request.query_params['redirect_uri']}?{query}", status_code=302
+        )
+
+    async def access_token(request: Request) -> Response:
+        form = await request.form()
+        code = str(form.get("code"))
+        if code not in codes:
+            return JSONResponse(
+                {"error": "bad_verification_code", "error_description": "Bad code"}
+            )
+        codes.discard(code)
+        token = f"gho_{secrets.token_hex(18)}"
+        tokens[token] = len(tokens) + 1
+        return JSONResponse(
+            {"access_token": token, "token_type": "bearer", "scope": "read:user"}
+        )
+
+    def authenticated(request: Request) -> int | None:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        return tokens.get(token)
+
+    def unauthorized() -> Response:
+        return JSONResponse({"message": "Bad credentials"}, status_code=401)
+
+    async def user(request: Request) -> Response:
+        user_id = authenticated(request)
+        if user_id is None:
+            return unauthorized()
+        etag = f'"user-{user_id}"'
+        headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(profile(user_id), headers=headers)
+
+    def rest_page(request: Request, section: str) -> tuple[int, list[Any], bool]:
+        """The nodes of a REST page (per_page, page) and whether more follow."""
+        total, node = sections[section]
+        per_page = min(int(request.query_params.get("per_page", 30)), 100)
+        start = (int(request.query_params.get("page", 1)) - 1) * per_page
+        user_id = authenticated(request) or 0
+        nodes = [node(user_id, i) for i in range(start, min(start + per_page, total))]
+        return total, nodes, start + per_page < total
+
+    def link_header(request: Request, total: int, has_next: bool) -> dict[str, str]:
+        if not has_next:
+            return {}
+        page = int(request.query_params.get("page", 1))
+        per_page = min(int(request.query_params.get("per_page", 30)), 100)
+        next_url = request.url.include_query_params(page=page + 1)
+        last_url = request.url.include_query_params(page=-(-total // per_page))
+        return {"Link": f'<{next_url}>; rel="next", <{last_url}>; rel="last"'}
+
+    async def user_repos(request: Request) -> Response:
+        if authenticated(request) is None:
+            return unauthorized()
+        total, nodes, has_next = rest_page(request, "repositories")
+        return JSONResponse(
+            [rest_repository(node) for node in nodes],
+            headers=link_header(request, total, has_next),
+        )
+
+    async def user_orgs(request: Request) -> Response:
+        if authenticated(request) is None:
+            return unauthorized()
+        total, nodes, has_next = rest_page(request, "organizations")
+        return JSONResponse(nodes, headers=link_header(request, total, has_next))
+
+    async def search_issues(request: Request) -> Response:
+        if authenticated(request) is None:
+            return unauthorized()
+        total, nodes, has_next = rest_page(request, "pullRequests")
+        return JSONResponse(
+            {"total_count": total, "incomplete_results": False, "items": nodes},
+            headers=link_header(request, total, has_next),
+        )
+
+    def repo_listing(section: str) -> Endpoint:
+        async def listing(request: Request) -> Response:
+            if authenticated(request) is None:
+                return unauthorized()
+            total, nodes, has_next = rest_page(request, section)
+            return JSONResponse(nodes, headers=link_header(request, total, has_next))
+
+        return listing
+
+    async def graphql(request: Request) -> Response:
+        user_id = authenticated(request)
+        if user_id is None:
+            return unauthorized()
+        body = await request.json()
+        query, variables = body["query"], body.get("variables") or {}
+        if "viewer" not in query:
+            return JSONResponse({"errors": [{"message": "Unsupported query"}]})
+
+        user = profile(user_id)
+        viewer: dict[str, Any] = {
+            "login": user["login"],
+            "name": user["name"],
+            "email": user["email"],
+            "bio": user["bio"],
+            "company": user["company"],
+            "location": user["location"],
+            "url": user["html_url"],
+            "avatarUrl": user["avatar_url"],
+            "createdAt": user["created_at"],
+            "followers": {"totalCount": user["followers"]},
+            "following": {"totalCount": user["following"]},
+        }
+        for section, first_var, after_var in CONNECTION_RE.findall(query):
+            total, node = sections[section]
+            start = int(variables.get(after_var) or 0)
+            end = min(start + int(variables[first_var]), total)
+            viewer[section] = {
+                "totalCount": total,
+                "pageInfo": {"hasNextPage": end < total, "endCursor": str(end)},
+                "nodes": [node(user_id, i) for i in range(start, end)],
+            }
+        return JSONResponse({"data": {"viewer": viewer}})
+
+    return Starlette(
+        routes=[
+            Route("/login/oauth/authorize", upstream(authorize)),
+            Route(
+                "/login/oauth/access_token", upstream(access_token), methods=["POST"]
+            ),
+            Route("/user", upstream(user)),
+            Route("/user/repos", upstream(user_repos)),
+            Route("/user/orgs", upstream(user_orgs)),
+            Route("/search/issues", upstream(search_issues)),
+            Route("/graphql", upstream(graphql), methods=["POST"]),
+            Route("/repos/{owner}/{repo}/issues", upstream(repo_listing("issues"))),
+            Route(
+                "/repos/{owner}/{repo}/stargazers",
+                upstream(repo_listing("stargazers")),
+            ),
+        ]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9400)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--repositories", type=int, default=60, help="per user")
+    parser.add_argument("--organizations", type=int, default=5, help="per user")
+    parser.add_argument("--pull-requests", type=int, default=40, help="per user")
+    parser.add_argument("--issues", type=int, default=250, help="per repository")
+    parser.add_argument("--stargazers", type=int, default=500, help="per repository")
+    args = parser.parse_args()
+    app = create_fake_github(
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.repositories,
+        args.organizations,
+        args.pull_requests,
+        args.issues,
+        args.stargazers,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""Shared helpers for benchmarks that drive the full OAuth + MCP flow."""
+
+import base64
+import hashlib
+import json
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Literal
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REDIRECT_URI = "http://127.0.0.1/callback"
+
+INITIALIZE_PARAMS = {
+    "protocolVersion": "2025-03-26",
+    "capabilities": {},
+    "clientInfo": {"name": "bench", "version": "1.0"},
+}
+TOOL_CALL_PARAMS = {"name": "get_user_profile", "arguments": {}}
+
+
+class FlowError(RuntimeError):
+    """A flow failed at a stage; timings has the stages completed before it."""
+
+    def __init__(self, stage: str, message: str, timings: dict[str, float]):
+        super().__init__(f"{stage} failed: {message}")
+        self.stage = stage
+        self.timings = timings
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Nothing listening on port {port}")
+
+
+def server_env(server_port: int, github_port: int, **settings: str) -> dict[str, str]:
+    """Environment for a server that talks to the fake GitHub."""
+    server_url = f"http://127.0.0.1:{server_port}"
+    github_url = f"http://127.0.0.1:{github_port}"
+    env = {
+        **os.environ,
+        "MCP_GITHUB_GITHUB_CLIENT_ID": "bench-client",
+        "MCP_GITHUB_GITHUB_CLIENT_SECRET": "bench-secret",
+        "MCP_GITHUB_SERVER_URL": server_url,
+        "MCP_GITHUB_GITHUB_CALLBACK_PATH": f"{server_url}/github/callback",
+        "MCP_GITHUB_GITHUB_AUTH_URL": f"{github_url}/login/oauth/authorize",
+        "MCP_GITHUB_GITHUB_TOKEN_URL": f"{github_url}/login/oauth/access_token",
+        "MCP_GITHUB_GITHUB_API_URL": github_url,
+        # Every benchmark client registers from the same address
+        "MCP_GITHUB_CLIENT_REGISTRATION_RATE": "0",
+    }
+    env.update({f"MCP_GITHUB_{k.upper()}": v for k, v in settings.items()})
+    return env
+
+
+@contextmanager
+def process(
+    args: list[str], port: int, env: dict[str, str] | None = None
+) -> Iterator[subprocess.Popen[bytes]]:
+    """Run a process until the block exits, waiting for it to listen on port."""
+    proc = subprocess.Popen(
+        args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_port(port)
+        yield proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+@contextmanager
+def fake_github(*extra_args: str) -> Iterator[int]:
+    """Run benchmarks/fake_github.py, yielding its port."""
+    port = free_port()
+    script = str(BENCHMARKS_DIR / "fake_github.py")
+    with process([sys.executable, script, "--port", str(port), *extra_args], port):
+        yield port
+
+
+def pkce_pair() -> tuple[str, str]:
+    verifier = secrets.token_urlsafe(48)
+    digest = hashlib.sha256(verifier.encode()).digest()
+    challenge = base64.urlsafe_b64encode(digest).decode().rstrip("=")
+    return verifier, challenge
+
+
+def parse_mcp_response(response: httpx.Response) -> dict[str, Any]:
+    """Return the JSON-RPC message from a JSON or SSE streamable-http response."""
+    if response.headers.get("content-type", "").startswith("text/event-stream"):
+        for line in response.text.splitlines():
+            if line.startswith("data:"):
+                return json.loads(line[5:])
+        raise ValueError("No data in event stream")
+    return response.json()
+
+
+async def _sse_events(lines: AsyncIterator[str]) -> AsyncIterator[tuple[str, str]]:
+    """Yield (event, data) pairs from the lines of an SSE stream."""
+    event, data = "message", []
+    async for line in lines:
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and data:
+            yield event, "\n".join(data)
+            event, data = "message", []
+
+
+async def run_flow(
+    client: httpx.AsyncClient,
+    base_url: str,
+    transport: Literal["sse", "streamable-http"] = "streamable-http",
+) -> dict[str, float]:
+    """Walk one client through the whole flow, returning seconds per stage.
+
+    discovery -> register -> authorize -> github (fake) -> callback -> token
+    -> initialize -> tools/call get_user_profile -> refresh
+
+    Over SSE, initialize includes opening the event stream. Raises FlowError
+    naming the failed stage.
+    """
+    timings: dict[str, float] = {}
+
+    def fail(name: str, message: str) -> FlowError:
+        return FlowError(name, message, timings)
+
+    async def stage(name: str, request: Awaitable[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            raise fail(name, f"{type(e).__name__}: {e}") from e
+        timings[name] = time.perf_counter() - start
+        if isinstance(response, httpx.Response) and response.status_code >= 400:
+            raise fail(name, f"{response.status_code} {response.text}")
+        return response
+
+    tokens, client_id, token_endpoint = await _authorize(client, base_url, stage)
+
+    headers = {
+        "Authorization": f"Bearer {tokens['access_token']}",
+        "Accept": "application/json, text/event-stream",
+    }
+    if transport == "sse":
+        result = await _sse_session(client, base_url, headers, stage, fail)
+    else:
+        result = await _streamable_http_session(client, base_url, headers, stage)
+    if "error" in result or result["result"].get("isError"):
+        raise fail("tool_call", str(result))
+
+    response = await stage(
+        "refresh",
+        client.post(
+            token_endpoint,
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": tokens["refresh_token"],
+                "client_id": client_id,
+            },
+        ),
+    )
+    if response.json()["refresh_token"] == tokens["refresh_token"]:
+        raise fail("refresh", "refresh token was not rotated")
+    return timings
+
+
+async def _authorize(
+    client: httpx.AsyncClient, base_url: str, stage: Any
+) -> tuple[dict[str, Any], str, str]:
+    """Register a client and take it through the OAuth flow.
+
+    The OAuth endpoints are those the server's metadata names, which may be
+    on a separate authorization server. Returns the token response, the
+    client ID and the token endpoint.
+    """
+    response = await stage(
+        "discovery", client.get(f"{base_url}/.well-known/oauth-authorization-server")
+    )
+    metadata = response.json()
+
+    response = await stage(
+        "register",
+        client.post(
+            metadata["registration_endpoint"],
+            json={
+                "redirect_uris": [REDIRECT_URI],
+                "token_endpoint_auth_method": "none",
+            },
+        ),
+    )
+    client_id = response.json()["client_id"]
+
+    verifier, challenge = pkce_pair()
+    state = secrets.token_hex(8)
+    response = await stage(
+        "authorize",
+        client.get(
+            metadata["authorization_endpoint"],
+            params={
+                "response_type": "code",
+                "client_id": client_id,
+                "redirect_uri": REDIRECT_URI,
+                "code_challenge": challenge,
+                "code_challenge_method": "S256",
+                "state": state,
+            },
+        ),
+    )
+    response = await stage("github", client.get(response.headers["location"]))
+    response = await stage("callback", client.get(response.headers["location"]))
+    code = parse_qs(urlparse(response.headers["location"]).query)["code"][0]
+
+    response = await stage(
+        "token",
+        client.post(
+            metadata["token_endpoint"],
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "redirect_uri": REDIRECT_URI,
+                "client_id": client_id,
+                "code_verifier": verifier,
+            },
+        ),
+    )
+    return response.json(), client_id, metadata["token_endpoint"]
+
+
+async def issue_tokens(client: httpx.AsyncClient, base_url: str) -> dict[str, Any]:
+    """Register a client and return the tokens issued at the end of the flow.
+
+    The registered client's ID is added to them as client_id.
+    """
+
+    async def stage(name: str, request: Awaitable[Any]) -> Any:
+        response = await request
+        if response.status_code >= 400:
+            raise FlowError(name, f"{response.status_code} {response.text}", {})
+        return response
+
+    tokens, client_id, _ = await _authorize(client, base_url, stage)
+    return {**tokens, "client_id": client_id}
+
+
+async def call_tool(
+    client: httpx.AsyncClient,
+    base_url: str,
+    access_token: str,
+    transport: Literal["sse", "streamable-http"] = "streamable-http",
+) -> dict[str, Any]:
+    """Open an MCP session with access_token and call the tool.
+
+    Returns the JSON-RPC response of the call; raises FlowError naming the
+    failed stage, with the status and body of a refused request.
+    """
+
+    def fail(name: str, message: str) -> FlowError:
+        return FlowError(name, message, {})
+
+    async def stage(name: str, request: Awaitable[Any]) -> Any:
+        response = await request
+        if isinstance(response, httpx.Response) and response.status_code >= 400:
+            raise fail(name, f"{response.status_code} {response.text}")
+        return response
+
+    headers = {
+        "Authorization": f"Bearer {access_token}",
+        "Accept": "application/json, text/event-stream",
+    }
+    if transport == "sse":
+        return await _sse_session(client, base_url, headers, stage, fail)
+    return await _streamable_http_session(client, base_url, headers, stage)
+
+
+async def _streamable_http_session(
+    client: httpx.AsyncClient, base_url: str, headers: dict[str, str], stage: Any
+) -> dict[str, Any]:
+    """Initialize over streamable-http and call the tool, returning its result."""
+    response = await stage(
+        "initialize",
+        client.post(
+            f"{base_url}/mcp/",
+            headers=headers,
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": INITIALIZE_PARAMS,
+            },
+        ),
+    )
+    session_id = response.headers.get("mcp-session-id")
+    if session_id:
+        headers = {**headers, "Mcp-Session-Id": session_id}
+        await client.post(
+            f"{base_url}/mcp/",
+            headers=headers,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+        )
+
+    response = await stage(
+        "tool_call",
+        client.post(
+            f"{base_url}/mcp/",
+            headers=headers,
+            json={
+                "jsonrpc": "2.0",
+                "id": 2,
+                "method": "tools/call",
+                "params": TOOL_CALL_PARAMS,
+            },
+        ),
+    )
+    return parse_mcp_response(response)
+
+
+async def _sse_session(
+    client: httpx.AsyncClient,
+    base_url: str,
+    headers: dict[str, str],
+    stage: Any,
+    fail: Any,
+) -> dict[str, Any]:
+    """Initialize over SSE and call the tool, returning its result.
+
+    Requests are posted to the endpoint the stream announces and their
+    responses read back from the stream.
+    """
+    async with client.stream("GET", f"{base_url}/sse", headers=headers) as response:
+        if response.status_code >= 400:
+            await response.aread()
+            raise fail("initialize", f"{response.status_code} {response.text}")
+        events = _sse_events(response.aiter_lines())
+
+        async def request(method: str, id: int, params: dict[str, Any]) -> Any:
+            message = {"jsonrpc": "2.0", "id": id, "method": method, "params": params}
+            posted = await client.post(endpoint, headers=headers, json=message)
+            posted.raise_for_status()
+            async for event, data in events:
+                if event == "message":
+                    return json.loads(data)
+            raise httpx.ReadError("Event stream closed")
+
+        async def initialize() -> Any:
+            nonlocal endpoint
+            async for event, data in events:
+                if event == "endpoint":
+                    endpoint = f"{base_url}{data}"
+                    break
+            else:
+                raise httpx.ReadError("Event stream closed")
+            return await request("initialize", 1, INITIALIZE_PARAMS)
+
+        endpoint = ""
+        await stage("initialize", initialize())
+        await client.post(
+            endpoint,
+            headers=headers,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+        )
+        return await stage("tool_call", request("tools/call", 2, TOOL_CALL_PARAMS))
@@ -0,0 +1,209 @@
+"""End-to-end load test against a local server and fake GitHub.
+
+Starts benchmarks/fake_github.py (optionally with injected latency and
+errors) and the server pointed at it, then drives concurrent simulated MCP
+clients through discovery -> register -> authorize -> callback -> token ->
+initialize -> tools/call get_user_profile -> refresh, and writes per-stage
+latency percentiles and throughput as JSON.
+
+    python benchmarks/load_test.py --clients 32 --flows 500 \\
+        --github-latency 0.05 --github-error-rate 0.01 --output results.json
+
+With --baseline, stage p95 latencies and flow throughput are compared with
+an earlier result and the run fails if any regressed beyond --tolerance.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from typing import Any
+
+import httpx
+from flow import FlowError, fake_github, free_port, process, run_flow, server_env
+
+STAGES = [
+    "discovery",
+    "register",
+    "authorize",
+    "github",
+    "callback",
+    "token",
+    "initialize",
+    "tool_call",
+    "refresh",
+]
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, round(p / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def drive(
+    base_url: str, transport: str, flows: int, clients: int
+) -> tuple[float, list[dict[str, float]], Counter[str], list[str]]:
+    """Run flows with up to clients concurrently.
+
+    Returns the wall time, the stage timings of every flow (partial for
+    failed ones), failures per stage and a sample of failure messages.
+    """
+    semaphore = asyncio.Semaphore(clients)
+    results: list[dict[str, float]] = []
+    failures: Counter[str] = Counter()
+    messages: list[str] = []
+
+    async def one(client: httpx.AsyncClient) -> None:
+        async with semaphore:
+            try:
+                results.append(await run_flow(client, base_url, transport))
+            except FlowError as e:
+                results.append(e.timings)
+                failures[e.stage] += 1
+                if len(messages) < 10:
+                    messages.append(str(e)[:300])
+
+    # One connection pool per simulated client would be more faithful, but a
+    # shared pool sized to the concurrency exercises the server the same way
+    limits = httpx.Limits(max_connections=clients * 2)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client) for _ in range(flows)))
+        return time.perf_counter() - start, results, failures, messages
+
+
+def summarize(
+    elapsed: float, results: list[dict[str, float]], failures: Counter[str]
+) -> dict[str, Any]:
+    stages = {}
+    for name in STAGES:
+        ordered = sorted(timings[name] for timings in results if name in timings)
+        stages[name] = {
+            "count": len(ordered),
+            "errors": failures[name],
+            "per_second": round(len(ordered) / elapsed, 2),
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0,
+            "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0,
+        }
+    completed = len(results) - sum(failures.values())
+    return {
+        "duration_s": round(elapsed, 3),
+        "flows": {
+            "total": len(results),
+            "completed": completed,
+            "failed": sum(failures.values()),
+            "per_second": round(completed / elapsed, 2),
+        },
+        "stages": stages,
+    }
+
+
+def regressions(
+    report: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Describe every stage p95 and the flow rate that got worse than baseline."""
+    found = []
+    for name, stage in baseline["stages"].items():
+        current = report["stages"].get(name)
+        if (
+            current
+            and stage["p95_ms"]
+            and current["p95_ms"] > stage["p95_ms"] * (1 + tolerance)
+        ):
+            found.append(
+                f"{name} p95 {current['p95_ms']:.1f}ms > "
+                f"baseline {stage['p95_ms']:.1f}ms"
+            )
+    rate, baseline_rate = (
+        report["flows"]["per_second"],
+        baseline["flows"]["per_second"],
+    )
+    if rate < baseline_rate * (1 - tolerance):
+        found.append(f"flows/s {rate:.1f} < baseline {baseline_rate:.1f}")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--flows", type=int, default=500, help="flows to run in total")
+    parser.add_argument(
+        "--transport", choices=["sse", "streamable-http"], default="streamable-http"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument(
+        "--setting",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="server setting, e.g. storage=sqlite (repeatable)",
+    )
+    parser.add_argument("--github-latency", type=float, default=0.0)
+    parser.add_argument("--github-jitter", type=float, default=0.0)
+    parser.add_argument("--github-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="write the JSON report here, not stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    settings = dict(setting.split("=", 1) for setting in args.setting)
+    github_args = [
+        "--latency", str(args.github_latency),
+        "--jitter", str(args.github_jitter),
+        "--error-rate", str(args.github_error_rate),
+    ]  # fmt: skip
+    with fake_github(*github_args) as github_port:
+        port = free_port()
+        command = [
+            sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+            "--port", str(port), "--transport", args.transport,
+            "--workers", str(args.workers),
+        ]  # fmt: skip
+        with process(command, port, server_env(port, github_port, **settings)):
+            elapsed, results, failures, messages = asyncio.run(
+                drive(
+                    f"http://127.0.0.1:{port}", args.transport, args.flows, args.clients
+                )
+            )
+
+    report = {
+        "config": {
+            "clients": args.clients,
+            "flows": args.flows,
+            "transport": args.transport,
+            "workers": args.workers,
+            "settings": settings,
+            "github_latency": args.github_latency,
+            "github_jitter": args.github_jitter,
+            "github_error_rate": args.github_error_rate,
+        },
+        **summarize(elapsed, results, failures),
+        "failure_samples": messages,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for regression in found:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Flood /register and check the client registry and throttle hold.
+
+Starts the fake GitHub and the server with room for --max-clients clients,
+takes one client through the OAuth flow, then:
+
+1. registers --registrations clients from one address, of which only the
+   burst and what refills meanwhile may succeed, the rest answered 429
+2. registers --registrations clients spread over many addresses (as
+   X-Forwarded-For from a trusted proxy), filling the registry past capacity
+3. refreshes the first client's tokens, which must still work: a client in
+   use is kept while the unused ones are evicted
+
+and checks the registry size and eviction metrics.
+
+    python benchmarks/register_flood_test.py --registrations 2000
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+
+import httpx
+from flow import REDIRECT_URI, fake_github, free_port, issue_tokens, process, server_env
+
+RATE = 1.0  # Registrations per second per address, past the burst
+METRICS = ("mcp_client_registry_clients{", "mcp_clients_evicted_total{")
+
+
+async def register(
+    client: httpx.AsyncClient, base_url: str, address: str | None = None
+) -> int:
+    headers = {"X-Forwarded-For": address} if address else {}
+    response = await client.post(
+        f"{base_url}/register",
+        headers=headers,
+        json={"redirect_uris": [REDIRECT_URI], "token_endpoint_auth_method": "none"},
+    )
+    return response.status_code
+
+
+async def flood(
+    client: httpx.AsyncClient, base_url: str, count: int, spread: bool
+) -> Counter[int]:
+    semaphore = asyncio.Semaphore(32)
+
+    async def one(i: int) -> int:
+        async with semaphore:
+            address = f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"
+            return await register(client, base_url, address if spread else None)
+
+    return Counter(await asyncio.gather(*(one(i) for i in range(count))))
+
+
+async def registry_metrics(
+    client: httpx.AsyncClient, base_url: str
+) -> dict[str, float]:
+    response = await client.get(f"{base_url}/metrics")
+    return {
+        name: float(value)
+        for name, value in (
+            line.rsplit(" ", 1)
+            for line in response.text.splitlines()
+            if line.startswith(METRICS)
+        )
+    }
+
+
+async def run(args: argparse.Namespace, port: int) -> list[str]:
+    problems = []
+    base_url = f"http://127.0.0.1:{port}"
+    async with httpx.AsyncClient(timeout=60) as client:
+        tokens = await issue_tokens(client, base_url)
+
+        start = time.monotonic()
+        one_address = await flood(client, base_url, args.registrations, spread=False)
+        # The burst, less the flow's registration, and what refilled meanwhile
+        allowed = args.burst - 1 + (time.monotonic() - start) * RATE
+        print(f"from one address: {dict(one_address)}, {allowed:.0f} allowed")
+        if one_address[201] > allowed + 1:
+            problems.append(f"{one_address[201]} registrations passed the throttle")
+
+        spread = await flood(client, base_url, args.registrations, spread=True)
+        print(f"from {args.registrations} addresses: {dict(spread)}")
+        if spread[201] != args.registrations:
+            problems.append("registrations from distinct addresses were refused")
+
+        response = await client.post(
+            f"{base_url}/token",
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": tokens["refresh_token"],
+                "client_id": tokens["client_id"],
+            },
+        )
+        print(f"refresh by the first client: {response.status_code}")
+        if response.status_code != 200:
+            problems.append(f"refresh failed: {response.text}")
+
+        metrics = await registry_metrics(client, base_url)
+        for name, value in sorted(metrics.items()):
+            print(f"  {name} {value:g}")
+        kept = sum(
+            value
+            for name, value in metrics.items()
+            if name.startswith("mcp_client_registry_clients") and "capacity" not in name
+        )
+        if kept > args.max_clients:
+            problems.append(f"{kept:g} clients kept, over {args.max_clients}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--registrations", type=int, default=2000)
+    parser.add_argument("--max-clients", type=int, default=500)
+    parser.add_argument("--burst", type=int, default=20)
+    args = parser.parse_args()
+
+    with fake_github() as github_port:
+        port = free_port()
+        env = server_env(
+            port,
+            github_port,
+            max_clients=str(args.max_clients),
+            client_registration_rate=str(RATE),
+            client_registration_burst=str(args.burst),
+        )
+        command = [
+            sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+            "--port", str(port),
+        ]  # fmt: skip
+        with process(command, port, env):
+            problems = asyncio.run(run(args, port))
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    print("FAIL" if problems else "PASS")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Reload the server under load and fail on any failed request.
+
+Starts the fake GitHub (with latency, so MCP sessions are open when a reload
+lands) and the server with SQLite storage, keeps concurrent clients walking
+the full OAuth + tool-call flow, and sends SIGHUP every --interval seconds.
+Each reload must hand the socket to a new process without a failed flow,
+and each replaced process must exit once drained.
+
+    python benchmarks/reload_test.py --reloads 3 --clients 16
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from flow import fake_github, free_port, process, run_flow, server_env
+
+from mcp_simple_auth.cli import read_pid
+
+
+async def next_pid(pid_file: str, pid: int, timeout: float = 60.0) -> int:
+    """Wait for the pid file to name the process that replaced pid."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        new_pid = read_pid(pid_file)
+        if new_pid not in (None, pid):
+            return new_pid
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"Process {pid} was not replaced")
+
+
+def exited(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    # The first server is our child: reap it if it has exited
+    try:
+        return os.waitpid(pid, os.WNOHANG)[0] == pid
+    except ChildProcessError:
+        return False
+
+
+async def drive(
+    base_url: str, transport: str, pid_file: str, args: argparse.Namespace
+) -> tuple[int, int, list[int]]:
+    """Run flows until the reloads are done; returns flows, failures, old PIDs."""
+    stop = asyncio.Event()
+    flows = failures = 0
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        nonlocal flows, failures
+        while not stop.is_set():
+            try:
+                await run_flow(client, base_url, transport)
+                flows += 1
+            except Exception as e:
+                failures += 1
+                print(f"  flow failed: {e}", file=sys.stderr)
+
+    async def reload_loop() -> list[int]:
+        replaced = []
+        try:
+            for _ in range(args.reloads):
+                await asyncio.sleep(args.interval)
+                pid = read_pid(pid_file)
+                os.kill(pid, signal.SIGHUP)
+                new_pid = await next_pid(pid_file, pid)
+                print(f"reloaded: {pid} -> {new_pid} after {flows} flows")
+                replaced.append(pid)
+            await asyncio.sleep(args.interval)
+        finally:
+            stop.set()
+        return replaced
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        replaced, *_ = await asyncio.gather(
+            reload_loop(), *(client_loop(client) for _ in range(args.clients))
+        )
+    return flows, failures, replaced
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reloads", type=int, default=3)
+    parser.add_argument("--interval", type=float, default=3.0)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument(
+        "--transport", choices=["sse", "streamable-http"], default="sse"
+    )
+    parser.add_argument("--github-latency", type=float, default=0.2)
+    parser.add_argument("--drain-timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    github_args = ["--latency", str(args.github_latency)]
+    with fake_github(*github_args) as github_port, tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        pid_file = str(Path(tmp) / "server.pid")
+        env = server_env(
+            port,
+            github_port,
+            storage="sqlite",
+            sqlite_path=str(Path(tmp) / "reload.db"),
+            drain_timeout=str(args.drain_timeout),
+        )
+        command = [
+            sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+            "--port", str(port), "--transport", args.transport,
+            "--pid-file", pid_file,
+        ]  # fmt: skip
+        try:
+            with process(command, port, env):
+                flows, failures, replaced = asyncio.run(
+                    drive(f"http://127.0.0.1:{port}", args.transport, pid_file, args)
+                )
+                deadline = time.monotonic() + args.drain_timeout + 5
+                while not all(map(exited, replaced)) and time.monotonic() < deadline:
+                    time.sleep(0.1)
+                lingering = [pid for pid in replaced if not exited(pid)]
+        finally:
+            pid = read_pid(pid_file)
+            if pid is not None:
+                os.kill(pid, signal.SIGTERM)
+
+    print(
+        f"reloads={len(replaced)} flows={flows} failures={failures} "
+        f"lingering={lingering}"
+    )
+    if failures or lingering or len(replaced) != args.reloads:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""Drop a streamable-http stream mid-call and resume it, across a restart too.
+
+Starts the fake GitHub (with latency, so a listing takes a while) and the
+server on stateful streamable-http with an event log, and for each of
+--calls tool calls:
+
+1. calls list_issues with a progress token and drops the response stream
+   after its first progress notification
+2. reconnects with Last-Event-ID and must get the rest of the call's events,
+   ending in its result, each exactly once
+3. kills the server (SIGKILL), starts it again on the same event log, and
+   must get the same events replayed and a new call answered in the same
+   session, with no new initialize
+
+The calls' events must fit MCP_GITHUB_EVENT_STORE_MAX_BYTES together.
+
+    python benchmarks/resume_test.py --calls 3
+"""
+
+import argparse
+import asyncio
+import json
+import signal
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import httpx
+from flow import (
+    INITIALIZE_PARAMS,
+    fake_github,
+    free_port,
+    issue_tokens,
+    process,
+    server_env,
+)
+
+# (event ID, JSON-RPC message)
+Event = tuple[str, dict[str, Any]]
+
+
+async def events(response: httpx.Response) -> Any:
+    """Yield (id, message) from a streamable-http SSE response."""
+    event_id, data = "", []
+    async for line in response.aiter_lines():
+        if line.startswith("id:"):
+            event_id = line[3:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and data:
+            yield event_id, json.loads("\n".join(data))
+            event_id, data = "", []
+
+
+async def until_result(response: httpx.Response, request_id: int) -> list[Event]:
+    received = []
+    async for event_id, message in events(response):
+        received.append((event_id, message))
+        if message.get("id") == request_id:
+            break
+    return received
+
+
+class Session:
+    """An MCP session, kept across clients and server processes."""
+
+    client: httpx.AsyncClient
+
+    def __init__(self, url: str, token: str):
+        self.url = url
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json, text/event-stream",
+        }
+
+    async def initialize(self) -> None:
+        response = await self.client.post(
+            self.url,
+            headers=self.headers,
+            json={
+                "jsonrpc": "2.0",
+                "id": 0,
+                "method": "initialize",
+                "params": INITIALIZE_PARAMS,
+            },
+        )
+        response.raise_for_status()
+        self.headers["Mcp-Session-Id"] = response.headers["mcp-session-id"]
+        await self.client.post(
+            self.url,
+            headers=self.headers,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+        )
+
+    def call(self, request_id: int, max_items: int) -> Any:
+        """Stream a list_issues call reporting progress."""
+        params = {
+            "name": "list_issues",
+            "arguments": {"repo": "octo/repo", "max_items": max_items},
+            "_meta": {"progressToken": f"progress-{request_id}"},
+        }
+        return self.client.stream(
+            "POST",
+            self.url,
+            headers=self.headers,
+            json={
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": "tools/call",
+                "params": params,
+            },
+        )
+
+    def resume(self, last_event_id: str) -> Any:
+        headers = {**self.headers, "Last-Event-ID": last_event_id}
+        return self.client.stream("GET", self.url, headers=headers)
+
+
+async def dropped_call(session: Session, request_id: int, max_items: int) -> Event:
+    """Call, and drop the stream after the first event; returns that event."""
+    async with session.call(request_id, max_items) as response:
+        response.raise_for_status()
+        async for event in events(response):
+            return event
+    raise RuntimeError("No event before the stream ended")
+
+
+async def replayed(
+    session: Session, last_event_id: str, request_id: int
+) -> list[Event]:
+    async with session.resume(last_event_id) as response:
+        response.raise_for_status()
+        return await asyncio.wait_for(until_result(response, request_id), 30)
+
+
+def check(name: str, received: list[Event], request_id: int) -> list[str]:
+    """Problems with the events replayed for a call, if any."""
+    problems = []
+    ids = [event_id for event_id, _ in received]
+    if len(set(ids)) != len(ids):
+        problems.append(f"{name}: duplicate events")
+    if not received or received[-1][1].get("id") != request_id:
+        problems.append(f"{name}: no result")
+    elif "error" in received[-1][1] or received[-1][1]["result"].get("isError"):
+        problems.append(f"{name}: call failed: {received[-1][1]}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--max-items", type=int, default=300)
+    parser.add_argument("--github-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    problems = []
+    github_args = ["--latency", str(args.github_latency), "--issues", "1000"]
+    with fake_github(*github_args) as github_port, tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        url = f"http://127.0.0.1:{port}/mcp/"
+        env = server_env(
+            port,
+            github_port,
+            storage="sqlite",
+            sqlite_path=str(Path(tmp) / "resume.db"),
+            event_store_path=str(Path(tmp) / "events.log"),
+            transport="streamable-http",
+        )
+        command = [
+            sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+            "--port", str(port), "--transport", "streamable-http",
+        ]  # fmt: skip
+
+        async def before_restart(session: Session) -> list[tuple[int, str, int]]:
+            """Drop and resume each call; (request ID, first event ID, events)."""
+            await session.initialize()
+            calls = []
+            for request_id in range(1, args.calls + 1):
+                first_id, _ = await dropped_call(session, request_id, args.max_items)
+                received = await replayed(session, first_id, request_id)
+                problems.extend(check(f"call {request_id}", received, request_id))
+                calls.append((request_id, first_id, len(received)))
+                print(f"call {request_id}: resumed, {len(received)} events replayed")
+            return calls
+
+        async def after_restart(
+            session: Session, calls: list[tuple[int, str, int]]
+        ) -> None:
+            for request_id, first_id, count in calls:
+                received = await replayed(session, first_id, request_id)
+                name = f"call {request_id} after restart"
+                problems.extend(check(name, received, request_id))
+                if len(received) != count:
+                    problems.append(f"{name}: {len(received)} events, not {count}")
+                print(f"{name}: {len(received)} events replayed")
+            request_id = args.calls + 1
+            async with session.call(request_id, 10) as response:
+                received = await until_result(response, request_id)
+            problems.extend(check("new call after restart", received, request_id))
+            print(f"new call after restart: {response.status_code}")
+
+        async def run(stage: Any, *stage_args: Any) -> Any:
+            async with httpx.AsyncClient(timeout=60) as session.client:
+                return await stage(session, *stage_args)
+
+        async def token_for() -> str:
+            async with httpx.AsyncClient(timeout=60) as client:
+                tokens = await issue_tokens(client, f"http://127.0.0.1:{port}")
+                return tokens["access_token"]
+
+        with process(command, port, env) as server:
+            session = Session(url, asyncio.run(token_for()))
+            calls = asyncio.run(run(before_restart))
+            server.send_signal(signal.SIGKILL)
+            server.wait()
+        with process(command, port, env):
+            asyncio.run(run(after_restart, calls))
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    print("FAIL" if problems else "PASS")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Check a revoked token stops verifying by introspection within the TTL.
+
+Starts the fake GitHub and the server with /introspect enabled, takes a
+client through the OAuth flow, and verifies its access token with an
+IntrospectionVerifier caching answers for --cache-ttl seconds. Then:
+
+1. introspection refuses callers without the secret, and reports unknown
+   tokens and refresh tokens inactive
+2. the token is revoked at /revoke; the verifier must keep answering from
+   its cache, and must refuse the token within --cache-ttl seconds (plus a
+   little slack), and keep refusing it after that
+
+    python benchmarks/revocation_test.py --cache-ttl 2
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+from flow import fake_github, free_port, issue_tokens, process, server_env
+
+from mcp_simple_auth.introspection import IntrospectionVerifier
+
+SECRET = "test-introspection-secret"
+SLACK = 0.5  # Seconds past the TTL the refusal may take
+
+
+async def run(args: argparse.Namespace, port: int) -> list[str]:
+    problems = []
+    base_url = f"http://127.0.0.1:{port}"
+    url = f"{base_url}/introspect"
+    async with httpx.AsyncClient(timeout=30) as client:
+        tokens = await issue_tokens(client, base_url)
+        access_token = tokens["access_token"]
+
+        for headers in ({}, {"Authorization": "Bearer wrong"}):
+            response = await client.post(url, headers=headers, data={"token": "x"})
+            if response.status_code != 401:
+                problems.append(f"introspection answered {response.status_code}")
+        auth = {"Authorization": f"Bearer {SECRET}"}
+        for token in ("mcp_unknown", tokens["refresh_token"]):
+            response = await client.post(url, headers=auth, data={"token": token})
+            if response.json() != {"active": False}:
+                problems.append(f"inactive token introspected as {response.text}")
+
+        verifier = IntrospectionVerifier(
+            url, SECRET, cache_ttl=args.cache_ttl, negative_cache_ttl=args.cache_ttl
+        )
+        async with verifier.running():
+            if await verifier.get_github_token(access_token) is None:
+                problems.append("valid token was refused")
+                return problems
+            cached_at = time.monotonic()
+
+            response = await client.post(
+                f"{base_url}/revoke",
+                # The SDK's revocation form wants client_secret even when empty
+                data={
+                    "token": access_token,
+                    "client_id": tokens["client_id"],
+                    "client_secret": "",
+                },
+            )
+            print(f"revoked: {response.status_code}")
+            if response.status_code != 200:
+                problems.append(f"revocation failed: {response.text}")
+
+            refused_after = None
+            while time.monotonic() - cached_at < args.cache_ttl + SLACK:
+                if await verifier.load_access_token(access_token) is None:
+                    refused_after = time.monotonic() - cached_at
+                    break
+                await asyncio.sleep(0.05)
+            if refused_after is None:
+                problems.append(f"revoked token still valid past {args.cache_ttl}s")
+            else:
+                print(f"refused {refused_after:.2f}s after caching")
+            await asyncio.sleep(args.cache_ttl + SLACK)
+            if await verifier.load_access_token(access_token) is not None:
+                problems.append("revoked token became valid again")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cache-ttl", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with fake_github() as github_port:
+        port = free_port()
+        env = server_env(port, github_port, introspection_secret=SECRET)
+        command = [
+            sys.executable, "-m", "mcp_simple_auth", "--host", "127.0.0.1",
+            "--port", str(port),
+        ]  # fmt: skip
+        with process(command, port, env):
+            problems = asyncio.run(run(args, port))
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    print("FAIL" if problems else "PASS")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
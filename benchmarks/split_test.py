@@ -0,0 +1,167 @@
+"""Run a split deployment locally and check it end to end.
+
+Starts the fake GitHub, an authorization server (--role auth) and
+--replicas resource servers (--role resource) that verify tokens through
+its /introspect, each a process of its own on its own port, then:
+
+1. walks --flows clients through the whole flow, --clients at a time, each
+   discovering from one of the replicas in turn: the OAuth steps go to the
+   auth server its metadata names, the MCP session to the replica
+2. calls the tool with one token on every replica
+3. checks the auth server serves no MCP and the replicas no OAuth endpoints
+4. revokes that token at the auth server; every replica must refuse it
+   within --cache-ttl seconds, the replicas' introspection cache TTL
+
+    python benchmarks/split_test.py --replicas 3 --flows 200 --clients 16
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+import httpx
+from flow import (
+    FlowError,
+    call_tool,
+    fake_github,
+    free_port,
+    issue_tokens,
+    process,
+    run_flow,
+    server_env,
+)
+
+SECRET = "split-test-introspection-secret"
+SLACK = 1.0  # Seconds past the TTL a replica may take to refuse a token
+
+
+async def refused(
+    client: httpx.AsyncClient, base_url: str, token: str, transport: str
+) -> bool:
+    try:
+        await call_tool(client, base_url, token, transport)
+    except FlowError as e:
+        return "401" in str(e)
+    return False
+
+
+async def run(
+    args: argparse.Namespace, auth_url: str, replica_urls: list[str]
+) -> list[str]:
+    problems = []
+    async with httpx.AsyncClient(timeout=60) as client:
+        semaphore = asyncio.Semaphore(args.clients)
+        failures: Counter[str] = Counter()
+
+        async def flow(i: int) -> None:
+            replica_url = replica_urls[i % len(replica_urls)]
+            async with semaphore:
+                try:
+                    await run_flow(client, replica_url, args.transport)
+                except FlowError as e:
+                    failures[e.stage] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(flow(i) for i in range(args.flows)))
+        elapsed = time.perf_counter() - start
+        print(f"{args.flows} flows in {elapsed:.1f}s, {args.flows / elapsed:.1f}/s")
+        if failures:
+            problems.append(f"failed flows by stage: {dict(failures)}")
+
+        tokens = await issue_tokens(client, replica_urls[0])
+        token = tokens["access_token"]
+        for url in replica_urls:
+            result = await call_tool(client, url, token, args.transport)
+            if "error" in result or result["result"].get("isError"):
+                problems.append(f"tool call on {url} failed: {result}")
+
+        not_found = [
+            ("POST", f"{auth_url}/mcp/"),
+            ("GET", f"{auth_url}/sse"),
+            *(("GET", f"{url}/authorize") for url in replica_urls),
+            *(("POST", f"{url}/token") for url in replica_urls),
+            *(("POST", f"{url}/register") for url in replica_urls),
+        ]
+        for method, url in not_found:
+            response = await client.request(method, url)
+            if response.status_code != 404:
+                problems.append(f"{method} {url} answered {response.status_code}")
+
+        response = await client.post(
+            f"{auth_url}/revoke",
+            # The SDK's revocation form wants client_secret even when empty
+            data={
+                "token": token,
+                "client_id": tokens["client_id"],
+                "client_secret": "",
+            },
+        )
+        revoked_at = time.monotonic()
+        if response.status_code != 200:
+            problems.append(f"revocation failed: {response.text}")
+        for url in replica_urls:
+            while not await refused(client, url, token, args.transport):
+                if time.monotonic() - revoked_at > args.cache_ttl + SLACK:
+                    problems.append(f"{url} still accepts the revoked token")
+                    break
+                await asyncio.sleep(0.1)
+        elapsed = time.monotonic() - revoked_at
+        print(f"revoked token refused by all replicas within {elapsed:.2f}s")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replicas", type=int, default=3)
+    parser.add_argument("--flows", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--cache-ttl", type=float, default=2.0)
+    parser.add_argument(
+        "--transport", choices=["sse", "streamable-http"], default="streamable-http"
+    )
+    args = parser.parse_args()
+
+    with fake_github() as github_port, ExitStack() as servers:
+        auth_port = free_port()
+        auth_url = f"http://127.0.0.1:{auth_port}"
+        servers.enter_context(
+            process(
+                [sys.executable, "-m", "mcp_simple_auth", "--role", "auth",
+                 "--host", "127.0.0.1", "--port", str(auth_port)],
+                auth_port,
+                server_env(auth_port, github_port, introspection_secret=SECRET),
+            )
+        )  # fmt: skip
+        replica_urls = []
+        for _ in range(args.replicas):
+            port = free_port()
+            env = server_env(
+                port,
+                github_port,
+                auth_server_url=auth_url,
+                introspection_secret=SECRET,
+                introspection_cache_ttl=str(args.cache_ttl),
+            )
+            servers.enter_context(
+                process(
+                    [sys.executable, "-m", "mcp_simple_auth", "--role", "resource",
+                     "--transport", args.transport,
+                     "--host", "127.0.0.1", "--port", str(port)],
+                    port,
+                    env,
+                )
+            )  # fmt: skip
+            replica_urls.append(f"http://127.0.0.1:{port}")
+        problems = asyncio.run(run(args, auth_url, replica_urls))
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    print("FAIL" if problems else "PASS")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
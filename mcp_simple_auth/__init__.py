@@ -1 +1 @@
-"""Simple MCP server with GitHub OAuth authentication."""
\ No newline at end of file
+"""Simple MCP server with GitHub OAuth authentication."""
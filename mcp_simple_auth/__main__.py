@@ -1,9 +1,7 @@
 """Main entry point for simple MCP server with GitHub OAuth authentication."""
 
-import sys
-
-from mcp_simple_auth.server import main
+from mcp_simple_auth.cli import main
 
 if __name__ == "__main__":
     # Click will handle command line arguments
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,286 @@
+"""Admin introspection: where the process's memory and time go.
+
+Served under /admin/ only when MCP_GITHUB_ADMIN_TOKEN is set, to requests
+bearing it, apart from the public discovery documents. Nothing here runs
+until a request asks for it: sizes are measured, the event loop's lag
+sampled and tasks counted per request, and tracemalloc, which slows every
+allocation while it traces, only runs between a start and a stop.
+
+    GET  /admin/status              entry counts and sizes, loop, upstream
+    POST /admin/tracemalloc/start   start tracing and take a baseline
+    GET  /admin/tracemalloc/diff    top allocation growth since the baseline
+    POST /admin/tracemalloc/stop    stop tracing and drop the snapshots
+
+With --workers, each request is answered by whichever worker accepts it.
+"""
+
+import asyncio
+import gc
+import hmac
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Awaitable, Callable, Collection, Mapping
+from typing import TYPE_CHECKING, Any
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+if TYPE_CHECKING:
+    from mcp_simple_auth.github import GitHubClient
+    from mcp_simple_auth.server import SimpleGitHubOAuthProvider
+
+# Entries measured per collection; larger ones are extrapolated from these
+SIZE_SAMPLE = 200
+
+# Frames of tracemalloc and the import system, left out of diffs
+_TRACEMALLOC_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+Endpoint = Callable[[Request], Awaitable[Response]]
+
+
+def deep_size(obj: Any, seen: set[int] | None = None) -> int:
+    """Bytes of obj and everything it refers to that was not seen already.
+
+    Follows containers, instance dicts and slots; classes, modules and
+    functions are shared, so they are not counted.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or isinstance(obj, type | type(sys) | Callable):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, str | bytes | int | float | bool | None):
+        return size
+    if isinstance(obj, Mapping):
+        for key, value in obj.items():
+            size += deep_size(key, seen) + deep_size(value, seen)
+    elif isinstance(obj, list | tuple | set | frozenset):
+        for item in obj:
+            size += deep_size(item, seen)
+    if hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    for cls in type(obj).__mro__:
+        for name in cls.__dict__.get("__slots__", ()):
+            if name != "__dict__" and hasattr(obj, name):
+                size += deep_size(getattr(obj, name), seen)
+    return size
+
+
+def collection_size(collection: Collection[Any]) -> int:
+    """Approximate bytes of a collection, extrapolated from a sample.
+
+    Objects shared with other collections are counted in each of them.
+    """
+    count = len(collection)
+    step = max(1, count // SIZE_SAMPLE)
+    items: Any = collection.items() if isinstance(collection, Mapping) else collection
+    sample = list(itertools.islice(items, 0, None, step))
+    if not sample:
+        return sys.getsizeof(collection)
+    seen: set[int] = set()
+    measured = sum(deep_size(item, seen) for item in sample)
+    return sys.getsizeof(collection) + measured * count // len(sample)
+
+
+def memory_report(
+    collections: Mapping[str, Collection[Any]],
+) -> dict[str, dict[str, int]]:
+    return {
+        name: {"entries": len(collection), "approx_bytes": collection_size(collection)}
+        for name, collection in collections.items()
+    }
+
+
+async def loop_lag(samples: int = 5, interval: float = 0.01) -> dict[str, float]:
+    """How late the event loop wakes a sleeping task, in milliseconds."""
+    loop = asyncio.get_running_loop()
+    lags = []
+    for _ in range(samples):
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - start - interval) * 1000)
+    return {"mean_ms": round(sum(lags) / samples, 3), "max_ms": round(max(lags), 3)}
+
+
+def task_report(top: int = 10) -> dict[str, Any]:
+    """Tasks on the event loop, and the coroutines most of them run."""
+    tasks = asyncio.all_tasks()
+    coroutines = Counter(
+        getattr(task.get_coro(), "__qualname__", "?") for task in tasks
+    )
+    return {"active": len(tasks), "by_coroutine": dict(coroutines.most_common(top))}
+
+
+def rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class TracemallocSession:
+    """tracemalloc started on request, and the baseline diffs compare with."""
+
+    def __init__(self) -> None:
+        self.baseline: tracemalloc.Snapshot | None = None
+        self.started_at: float | None = None
+
+    def start(self, frames: int) -> dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.baseline = self._snapshot()
+        self.started_at = time.time()
+        return self.status()
+
+    def stop(self) -> dict[str, Any]:
+        tracemalloc.stop()
+        self.baseline = self.started_at = None
+        return self.status()
+
+    def diff(self, key_type: str, limit: int, rebase: bool) -> dict[str, Any]:
+        """The allocations that grew most since the baseline."""
+        assert self.baseline is not None
+        snapshot = self._snapshot()
+        stats = snapshot.compare_to(self.baseline, key_type)
+        if rebase:
+            self.baseline = snapshot
+        return {
+            **self.status(),
+            "top": [
+                {
+                    "traceback": stat.traceback.format(),
+                    "size_bytes": stat.size,
+                    "size_diff_bytes": stat.size_diff,
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+
+    def status(self) -> dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "started_at": self.started_at,
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+        }
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_TRACEMALLOC_FILTERS)
+
+
+def require_token(token: str, endpoint: Endpoint, realm: str = "admin") -> Endpoint:
+    """Answer 401 to requests without token as their bearer credential."""
+    expected = f"Bearer {token}".encode()
+
+    async def guarded(request: Request) -> Response:
+        given = request.headers.get("authorization", "").encode()
+        if not hmac.compare_digest(given, expected):
+            return JSONResponse(
+                {"error": "unauthorized"},
+                status_code=401,
+                headers={"WWW-Authenticate": f'Bearer realm="{realm}"'},
+            )
+        return await endpoint(request)
+
+    return guarded
+
+
+def int_param(request: Request, name: str, default: int, low: int, high: int) -> int:
+    try:
+        value = int(request.query_params.get(name, default))
+    except ValueError:
+        value = default
+    return min(max(value, low), high)
+
+
+def admin_routes(
+    token: str,
+    provider: "SimpleGitHubOAuthProvider | None",
+    github: "GitHubClient",
+    component_stats: Mapping[str, Callable[[], Mapping[str, Any]]],
+) -> list[Route]:
+    """Routes of the admin endpoints, to mount under /admin.
+
+    component_stats are reported in the status as they are, by name. A
+    resource server has no provider, so no storage or denylist to report.
+    """
+    tracing = TracemallocSession()
+
+    async def status(request: Request) -> Response:
+        report: dict[str, Any] = {
+            "process": {
+                "pid": os.getpid(),
+                "rss_bytes": rss_bytes(),
+                "threads": threading.active_count(),
+                "gc_counts": gc.get_count(),
+            },
+            "event_loop": {"lag": await loop_lag(), "tasks": task_report()},
+        }
+        if provider is not None:
+            report["storage"] = {
+                "backend": provider.settings.storage,
+                "entries": await provider.store.stats(),
+                "in_process": memory_report(provider.store.in_process_collections()),
+            }
+        report["upstream"] = {
+            "pool": github.pool_stats(),
+            "scheduler": github.scheduler.stats(),
+            "cache": github.cache.stats(),
+        }
+        if provider is not None:
+            report["denylist"] = memory_report({"_entries": provider.denylist._entries})
+        return JSONResponse(
+            {
+                **report,
+                **{name: stats() for name, stats in component_stats.items()},
+                "tracemalloc": tracing.status(),
+            }
+        )
+
+    async def tracemalloc_start(request: Request) -> Response:
+        frames = int_param(request, "frames", 1, 1, 50)
+        return JSONResponse(await asyncio.to_thread(tracing.start, frames))
+
+    async def tracemalloc_diff(request: Request) -> Response:
+        if tracing.baseline is None:
+            return JSONResponse(
+                {"error": "tracemalloc is not started"}, status_code=409
+            )
+        key_type = request.query_params.get("key_type", "lineno")
+        if key_type not in ("lineno", "filename", "traceback"):
+            return JSONResponse({"error": "unknown key_type"}, status_code=400)
+        limit = int_param(request, "limit", 25, 1, 500)
+        rebase = request.query_params.get("rebase") in ("1", "true")
+        return JSONResponse(
+            await asyncio.to_thread(tracing.diff, key_type, limit, rebase)
+        )
+
+    async def tracemalloc_stop(request: Request) -> Response:
+        return JSONResponse(tracing.stop())
+
+    return [
+        Route(path, require_token(token, endpoint), methods=[method])
+        for path, endpoint, method in (
+            ("/status", status, "GET"),
+            ("/tracemalloc/start", tracemalloc_start, "POST"),
+            ("/tracemalloc/diff", tracemalloc_diff, "GET"),
+            ("/tracemalloc/stop", tracemalloc_stop, "POST"),
+        )
+    ]
@@ -0,0 +1,342 @@
+"""Command line entry point.
+
+Only click and the standard library are imported up front, so --help and
+bad arguments answer at once. With a single worker the port is bound and
+listening before the serving stack (FastMCP, starlette, pydantic-settings,
+httpx, uvicorn) is imported: connections arriving during a cold start wait
+in the listen backlog instead of being refused.
+
+A single-worker server reloads without downtime on SIGHUP; see reload.py.
+"""
+
+import logging
+import math
+import os
+import socket
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Literal
+
+import click
+
+from mcp_simple_auth.startup import StartupProfile
+
+if TYPE_CHECKING:
+    import uvicorn
+
+    from mcp_simple_auth.server import ServerSettings
+
+logger = logging.getLogger(__name__)
+
+BACKLOG = 2048  # uvicorn's default
+
+# File descriptor of a listening socket handed over by a reload
+LISTEN_FD_ENV = "MCP_GITHUB_LISTEN_FD"
+
+
+def listen(host: str, port: int) -> socket.socket:
+    """Bind and listen on host:port the way uvicorn would."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(BACKLOG)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def inherited_socket() -> socket.socket | None:
+    """The listening socket handed over by the process being replaced."""
+    fd = os.environ.pop(LISTEN_FD_ENV, None)
+    return None if fd is None else socket.socket(fileno=int(fd))
+
+
+def shared_state_problem(settings: "ServerSettings", mode: str) -> str | None:
+    """Why provider state can't be shared between processes, if it can't."""
+    if settings.role == "resource":
+        # Tokens are verified by the auth server, which holds all the state
+        return None
+    if settings.storage == "memory":
+        return f"{mode} needs shared storage: set MCP_GITHUB_STORAGE=sqlite or redis"
+    if settings.access_token_format == "signed" and not settings.token_signing_keys:
+        return f"{mode} with signed tokens needs MCP_GITHUB_TOKEN_SIGNING_KEYS"
+    return None
+
+
+def role_problem(settings: "ServerSettings") -> str | None:
+    """Why the server can't take its role, if it can't."""
+    if settings.role == "resource" and not (
+        settings.auth_server_url and settings.introspection_secret
+    ):
+        return (
+            "a resource server needs MCP_GITHUB_AUTH_SERVER_URL and "
+            "MCP_GITHUB_INTROSPECTION_SECRET"
+        )
+    return None
+
+
+async def serve(
+    server: "uvicorn.Server",
+    sock: socket.socket,
+    on_started: Callable[[], None],
+    on_stopping: Callable[[], None],
+) -> None:
+    """Serve on sock, calling on_started once serving and on_stopping once not.
+
+    on_stopping runs as shutdown begins: uvicorn re-raises the signal that
+    stopped it as it returns, which ends the process before any cleanup.
+    """
+    import asyncio
+
+    serving = asyncio.ensure_future(server.serve([sock]))
+    while not server.started:
+        if serving.done():
+            break
+        await asyncio.sleep(0.01)
+    else:
+        on_started()
+        while not server.should_exit and not serving.done():
+            await asyncio.sleep(0.1)
+        on_stopping()
+    await serving
+
+
+@click.command()
+@click.option("--port", default=9090, help="Port to listen on")
+@click.option("--host", default="0.0.0.0", help="Host to bind to")
+@click.option(
+    "--transport",
+    default="sse",
+    type=click.Choice(["sse", "streamable-http"]),
+    help="Transport protocol to use ('sse' or 'streamable-http')",
+)
+@click.option(
+    "--role",
+    type=click.Choice(["all", "auth", "resource"]),
+    help="Serve OAuth and MCP (all), only OAuth (auth), or only MCP (resource);"
+    " default MCP_GITHUB_ROLE, else all",
+)
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of worker processes (needs sqlite or redis storage)",
+)
+@click.option(
+    "--profile-startup",
+    is_flag=True,
+    help="Print how long imports, settings and app creation took",
+)
+@click.option(
+    "--pid-file",
+    type=click.Path(dir_okay=False),
+    help="Write the serving process ID here; reloads update it",
+)
+def main(
+    port: int,
+    host: str,
+    transport: Literal["sse", "streamable-http"],
+    role: Literal["all", "auth", "resource"] | None,
+    workers: int,
+    profile_startup: bool,
+    pid_file: str | None,
+) -> int:
+    """Run the simple GitHub MCP server."""
+    logging.basicConfig(level=logging.INFO)
+    profile = StartupProfile()
+
+    sock = None
+    if workers == 1:
+        with profile.phase("bind"):
+            # A reload hands over the socket the replaced process listened on
+            sock = inherited_socket()
+            if sock is None:
+                try:
+                    sock = listen(host, port)
+                except OSError as e:
+                    logger.error(f"Cannot listen on {host}:{port}: {e}")
+                    return 1
+
+    try:
+        if profile_startup:
+            profile.import_stack()
+        with profile.phase("import (rest)"):
+            import asyncio
+            import signal
+
+            import anyio
+            import uvicorn
+
+            from mcp_simple_auth.reload import (
+                Reloader,
+                ReloadMiddleware,
+                notify_ready,
+                predecessor_socket,
+                read_handover,
+            )
+            from mcp_simple_auth.server import (
+                ServerSettings,
+                create_app,
+                start_logging,
+            )
+
+        try:
+            # No hardcoded credentials - all from environment variables
+            with profile.phase("settings"):
+                settings = ServerSettings(
+                    host=host, port=port, **({"role": role} if role else {})
+                )
+        except ValueError as e:
+            logger.error(
+                "Failed to load settings. Make sure environment variables are set:"
+            )
+            logger.error("  MCP_GITHUB_GITHUB_CLIENT_ID=<your-client-id>")
+            logger.error("  MCP_GITHUB_GITHUB_CLIENT_SECRET=<your-client-secret>")
+            logger.error(f"Error: {e}")
+            return 1
+        problem = role_problem(settings)
+        if problem is not None:
+            logger.error(problem)
+            return 1
+
+        if workers > 1:
+            return run_workers(settings, transport, workers)
+        assert sock is not None  # Bound above for a single worker
+
+        log_writer = start_logging(settings)
+
+        def flush_logs_and_exit(signum: int, _frame: object) -> None:
+            # uvicorn re-raises the signal that stopped it once it is done
+            log_writer.stop()
+            signal.signal(signum, signal.SIG_DFL)
+            signal.raise_signal(signum)
+
+        signal.signal(signal.SIGTERM, flush_logs_and_exit)
+
+        with profile.phase("create app"):
+            starlette_app = create_app(settings, transport)
+            oauth_provider = starlette_app.state.oauth_provider
+            handover = read_handover()
+            if oauth_provider is not None:
+                oauth_provider.restore_state(handover)
+            reload_middleware = ReloadMiddleware(starlette_app, predecessor_socket())
+            server = uvicorn.Server(
+                uvicorn.Config(
+                    reload_middleware,
+                    host=settings.host,
+                    port=settings.port,
+                    timeout_graceful_shutdown=math.ceil(settings.drain_timeout),
+                    # Logged through the root logger, with our access log
+                    log_config=None,
+                    access_log=False,
+                )
+            )
+        if profile_startup:
+            click.echo(profile.report(), err=True)
+        logger.info(
+            f"Starting {settings.role} server with {transport} transport"
+            f" on http://{host}:{port}"
+        )
+        reloader = Reloader(
+            server,
+            sock,
+            reload_middleware,
+            settings.drain_timeout,
+            oauth_provider.handover_state if oauth_provider is not None else dict,
+        )
+        problem = shared_state_problem(settings, "SIGHUP reload")
+
+        def started() -> None:
+            notify_ready()
+            if pid_file:
+                with open(pid_file, "w") as f:
+                    f.write(f"{os.getpid()}\n")
+            if problem is None:
+                reloader.install()
+            else:
+                asyncio.get_running_loop().add_signal_handler(
+                    signal.SIGHUP, logger.error, problem
+                )
+
+        def stopping() -> None:
+            if pid_file and read_pid(pid_file) == os.getpid():
+                os.unlink(pid_file)
+
+        anyio.run(serve, server, sock, started, stopping)
+        log_writer.stop()
+        return 0
+    finally:
+        if sock is not None:
+            sock.close()
+
+
+def read_pid(path: str) -> int | None:
+    """The process ID in a --pid-file; a reload may have replaced ours."""
+    try:
+        with open(path) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def run_workers(
+    settings: "ServerSettings",
+    transport: Literal["sse", "streamable-http"],
+    workers: int,
+) -> int:
+    """Run several worker processes on one listening socket.
+
+    Each step of the OAuth flow and every MCP request can land on any
+    worker, so provider state must live in shared storage, and the MCP
+    transport must not keep per-connection state in a worker: SSE streams
+    are tied to the process that opened them, so only stateless
+    streamable-http is supported.
+    """
+    import uvicorn
+
+    problem = shared_state_problem(settings, "--workers")
+    if problem is not None:
+        logger.error(problem)
+        return 1
+    if transport != "streamable-http" and settings.role != "auth":
+        logger.error("--workers needs --transport streamable-http")
+        return 1
+    if settings.log_file:
+        # Workers would rotate the file under each other
+        logger.error("--workers logs to stderr: unset MCP_GITHUB_LOG_FILE")
+        return 1
+    from mcp_simple_auth.server import start_logging
+
+    log_writer = start_logging(settings)
+
+    # Workers are spawned fresh and read their settings from the environment
+    os.environ["MCP_GITHUB_TRANSPORT"] = transport
+    os.environ["MCP_GITHUB_STATELESS_HTTP"] = "true"
+    os.environ["MCP_GITHUB_ROLE"] = settings.role
+    logger.info(
+        f"Starting {workers} {settings.role} workers"
+        f" with stateless {transport} transport"
+    )
+    uvicorn.run(
+        "mcp_simple_auth.server:create_app_from_env",
+        factory=True,
+        host=settings.host,
+        port=settings.port,
+        workers=workers,
+        log_config=None,
+        access_log=False,
+    )
+    log_writer.stop()
+    return 0
+
+
+def auth_server() -> None:
+    """Run an authorization server only; MCP is served by resource servers."""
+    main(default_map={"role": "auth"})
+
+
+def resource_server() -> None:
+    """Run an MCP resource server that verifies tokens with the auth server."""
+    main(default_map={"role": "resource"})
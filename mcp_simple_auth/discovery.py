@@ -0,0 +1,101 @@
+"""Discovery documents serialized once and served with HTTP validators."""
+
+import hashlib
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class StaticDocument:
+    """A JSON body built at startup, served with a strong ETag.
+
+    Clients poll discovery endpoints, so each request only compares
+    If-None-Match with the ETag and sends either a 304 or the prepared
+    bytes and headers; nothing is rebuilt or re-serialized until the
+    document is recreated from changed settings.
+
+    The document is an ASGI app, and response() serves it from a route.
+    """
+
+    __slots__ = ("_raw_headers", "_raw_not_modified", "body", "etag", "headers")
+
+    def __init__(
+        self, body: bytes, max_age: int, extra_headers: dict[str, str] | None = None
+    ):
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.headers = {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={max_age}",
+            **(extra_headers or {}),
+        }
+        validators = [
+            (name.lower().encode(), value.encode())
+            for name, value in self.headers.items()
+        ]
+        self._raw_not_modified = validators
+        self._raw_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *validators,
+        ]
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """Whether an If-None-Match header names this document's ETag."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison: W/ prefixes are ignored
+        return any(
+            tag.strip().removeprefix("W/") == self.etag
+            for tag in if_none_match.split(",")
+        )
+
+    def response(self, request: Request) -> Response:
+        if self.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.body, headers=self.headers, media_type="application/json")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+                break
+        if self.matches(if_none_match):
+            status, headers, body = 304, self._raw_not_modified, b""
+        else:
+            status, headers, body = 200, self._raw_headers, self.body
+        # Middleware may add to the header list, so each response gets a copy
+        await send(
+            {"type": "http.response.start", "status": status, "headers": [*headers]}
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"" if scope["method"] == "HEAD" else body,
+            }
+        )
+
+
+class StaticDocumentMiddleware:
+    """Serves GET and HEAD of documents' paths ahead of the rest of the app.
+
+    The documents need no authentication, so the auth middleware, routing
+    and per-request Response objects are skipped. Other methods, such as
+    CORS preflights, fall through to the app's routes.
+    """
+
+    def __init__(self, app: ASGIApp, documents: dict[str, StaticDocument]):
+        self.app = app
+        self.documents = documents
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            document = self.documents.get(scope["path"])
+            if document is not None:
+                await document(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
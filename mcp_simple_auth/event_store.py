@@ -0,0 +1,330 @@
+"""Event store for resumable streamable-http sessions.
+
+The streamable-http transport stores every message it sends in the event
+store before sending it, under an event ID the client sees. A client whose
+stream dropped reconnects with a GET carrying the last ID it received in
+Last-Event-ID, and the transport replays the events of that stream after it.
+
+Events are kept per session in a ring buffer bounded by count and bytes,
+and the least recently written sessions are dropped past max_sessions.
+With a log path, events are also appended to a file, one line each, and a
+new process loads the retained events from it, so sessions survive a
+restart (see ResumableSessionManager). Lines are written unbuffered but not
+fsynced: they survive the process, not the machine. The log is rewritten
+with only the retained events when it loads and when it has grown well past
+them; a process that keeps appending to a log another process has rewritten
+writes to the replaced file, so its later events are lost on restart.
+"""
+
+import json
+import logging
+import os
+from collections import OrderedDict, deque
+from uuid import uuid4
+
+import anyio
+from anyio.abc import TaskStatus
+from mcp.server.lowlevel.server import Server
+from mcp.server.streamable_http import (
+    MCP_SESSION_ID_HEADER,
+    EventCallback,
+    EventId,
+    EventMessage,
+    EventStore,
+    StreamableHTTPServerTransport,
+    StreamId,
+)
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from mcp.types import JSONRPCMessage
+from starlette.types import Receive, Scope, Send
+
+from mcp_simple_auth.metrics import EVENTS_REPLAYED, Sample
+
+logger = logging.getLogger(__name__)
+
+# The log is compacted once it holds this much more than the retained events
+LOG_SLACK = 16 * 1024 * 1024
+
+# (event ID, stream ID, message JSON)
+Event = tuple[EventId, StreamId, bytes]
+
+
+def log_line(event_id: EventId, stream_id: StreamId, data: bytes) -> bytes:
+    """A log line: the IDs JSON-encoded, so they hold no tab or newline."""
+    ids = f"{json.dumps(event_id)}\t{json.dumps(stream_id)}\t".encode()
+    return ids + data + b"\n"
+
+
+class SessionEvents:
+    """The retained events of one session, oldest first."""
+
+    __slots__ = ("bytes", "events")
+
+    def __init__(self) -> None:
+        self.events: deque[Event] = deque()
+        self.bytes = 0
+
+
+class ResumableEventStore:
+    """Events of all sessions; for_session() gives the transport's EventStore.
+
+    Event IDs are "<session ID>.<process tag><n>": they never repeat across
+    processes, and a session only replays IDs of its own.
+    """
+
+    def __init__(
+        self,
+        max_events: int = 256,
+        max_bytes: int = 1024 * 1024,
+        max_sessions: int = 1000,
+        log_path: str | None = None,
+    ):
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.log_path = log_path
+        self._sessions: OrderedDict[str, SessionEvents] = OrderedDict()
+        self._bytes = 0
+        self._tag = uuid4().hex[:8]
+        self._next_id = 0
+        self._log_fd: int | None = None
+        self._log_bytes = 0
+        if log_path is not None:
+            self._load()
+            self._compact()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def for_session(self, session_id: str) -> EventStore:
+        return SessionEventStore(self, session_id)
+
+    def store(self, session_id: str, stream_id: StreamId, data: bytes) -> EventId:
+        self._next_id += 1
+        event_id = f"{session_id}.{self._tag}{self._next_id}"
+        self._append(session_id, (event_id, stream_id, data))
+        if self._log_fd is not None:
+            line = log_line(event_id, stream_id, data)
+            self._log_bytes += os.write(self._log_fd, line)
+            if self._log_bytes > 2 * self._bytes + LOG_SLACK:
+                self._compact()
+        return event_id
+
+    def forget(self, session_id: str) -> None:
+        """Drop a session that has ended, so it is neither replayed nor restored."""
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        self._bytes -= session.bytes
+        if self._log_fd is not None:
+            self._log_bytes += os.write(
+                self._log_fd, f"{json.dumps(session_id)}\n".encode()
+            )
+
+    async def replay_events_after(
+        self, session_id: str, last_event_id: EventId, send_callback: EventCallback
+    ) -> StreamId | None:
+        """Send a session's events of a stream after last_event_id; the stream."""
+        session = None
+        if last_event_id.partition(".")[0] == session_id:
+            session = self._sessions.get(session_id)
+        events = session.events if session is not None else ()
+        # index and stream_id are read after the loop
+        for index, (event_id, stream_id, _) in enumerate(events):  # noqa: B007
+            if event_id == last_event_id:
+                break
+        else:
+            # Evicted or from a session we don't have: the client must start over
+            EVENTS_REPLAYED.inc("unknown")
+            logger.info(f"Cannot replay after unknown event {last_event_id}")
+            return None
+
+        # Copied first: sending waits for the client while new events arrive
+        missed = [
+            (event_id, data)
+            for event_id, event_stream_id, data in list(events)[index + 1 :]
+            if event_stream_id == stream_id
+        ]
+        EVENTS_REPLAYED.inc("replayed", amount=len(missed))
+        for event_id, data in missed:
+            message = JSONRPCMessage.model_validate_json(data)
+            await send_callback(EventMessage(message, event_id))
+        return stream_id
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "sessions": len(self._sessions),
+            "events": sum(len(s.events) for s in self._sessions.values()),
+            "bytes": self._bytes,
+        }
+
+    async def collect_metrics(self) -> list[tuple[str, str, list[Sample]]]:
+        stats = self.stats()
+        return [
+            (
+                f"mcp_event_store_{name}",
+                f"Streamable-http {name} retained for replay",
+                [({}, value)],
+            )
+            for name, value in stats.items()
+        ]
+
+    def close(self) -> None:
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+
+    def _append(self, session_id: str, event: Event) -> None:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = SessionEvents()
+            if len(self._sessions) > self.max_sessions:
+                _, dropped = self._sessions.popitem(last=False)
+                self._bytes -= dropped.bytes
+        else:
+            self._sessions.move_to_end(session_id)
+        size = len(event[2])
+        session.events.append(event)
+        session.bytes += size
+        self._bytes += size
+        while session.events and (
+            len(session.events) > self.max_events or session.bytes > self.max_bytes
+        ):
+            size = len(session.events.popleft()[2])
+            session.bytes -= size
+            self._bytes -= size
+
+    def _load(self) -> None:
+        """Retain the events of the log, as if they were stored again."""
+        assert self.log_path is not None
+        try:
+            f = open(self.log_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Cut short when a process died mid-write
+                    logger.warning(f"Skipping a partial last line of {self.log_path}")
+                    break
+                fields = line[:-1].split(b"\t", 2)
+                try:
+                    if len(fields) == 1:
+                        self.forget(json.loads(fields[0]))
+                    else:
+                        event_id = json.loads(fields[0])
+                        event = (event_id, json.loads(fields[1]), fields[2])
+                        self._append(event_id.partition(".")[0], event)
+                except (ValueError, IndexError, AttributeError):
+                    logger.warning(f"Skipping a malformed line in {self.log_path}")
+        stats = self.stats()
+        logger.info(
+            f"Loaded {stats['events']} events of {stats['sessions']} sessions"
+            f" from {self.log_path}"
+        )
+
+    def _compact(self) -> None:
+        """Rewrite the log with only the retained events, and append to that."""
+        assert self.log_path is not None
+        self.close()
+        temporary = f"{self.log_path}.{self._tag}.tmp"
+        fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            for session in self._sessions.values():
+                for event in session.events:
+                    f.write(log_line(*event))
+            self._log_bytes = f.tell()
+        os.replace(temporary, self.log_path)
+        self._log_fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND)
+
+
+class SessionEventStore(EventStore):
+    """One session's view of a ResumableEventStore, given to its transport."""
+
+    def __init__(self, store: ResumableEventStore, session_id: str):
+        self.store = store
+        self.session_id = session_id
+
+    async def store_event(
+        self, stream_id: StreamId, message: JSONRPCMessage
+    ) -> EventId:
+        data = message.model_dump_json(by_alias=True, exclude_none=True).encode()
+        return self.store.store(self.session_id, stream_id, data)
+
+    async def replay_events_after(
+        self, last_event_id: EventId, send_callback: EventCallback
+    ) -> StreamId | None:
+        return await self.store.replay_events_after(
+            self.session_id, last_event_id, send_callback
+        )
+
+
+class ResumableSessionManager(StreamableHTTPSessionManager):
+    """Stateful streamable-http sessions that can be resumed and restored.
+
+    Each session's transport stores its events in its own view of
+    event_store. A request for a session this process isn't running but
+    event_store retains, one opened before a restart, restores it: a new
+    transport with the same ID, already initialized, since the client
+    initialized it before. Its client can then replay what it missed.
+    Sessions are dropped from the manager once they end, and from
+    event_store once their client ends them with a DELETE.
+    """
+
+    def __init__(
+        self,
+        app: Server,
+        event_store: ResumableEventStore,
+        json_response: bool = False,
+    ):
+        super().__init__(app, json_response=json_response)
+        self.events = event_store
+
+    async def _handle_stateful_request(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        headers = dict(scope["headers"])
+        session_id = headers.get(MCP_SESSION_ID_HEADER.encode(), b"").decode()
+        if session_id and (
+            session_id in self._server_instances or session_id not in self.events
+        ):
+            return await super()._handle_stateful_request(scope, receive, send)
+
+        async with self._session_creation_lock:
+            transport = self._server_instances.get(session_id)
+            if transport is None:
+                transport = await self._start_session(session_id or uuid4().hex)
+        await transport.handle_request(scope, receive, send)
+
+    async def _start_session(self, session_id: str) -> StreamableHTTPServerTransport:
+        restored = session_id in self.events
+        transport = StreamableHTTPServerTransport(
+            mcp_session_id=session_id,
+            is_json_response_enabled=self.json_response,
+            event_store=self.events.for_session(session_id),
+        )
+        self._server_instances[session_id] = transport
+
+        async def run_server(
+            *, task_status: TaskStatus[None] = anyio.TASK_STATUS_IGNORED
+        ) -> None:
+            try:
+                async with transport.connect() as (read_stream, write_stream):
+                    task_status.started()
+                    await self.app.run(
+                        read_stream,
+                        write_stream,
+                        self.app.create_initialization_options(),
+                        # Skips initialization, which the client already did
+                        stateless=restored,
+                    )
+            finally:
+                self._server_instances.pop(session_id, None)
+                if transport._terminated:  # Ended by the client
+                    self.events.forget(session_id)
+
+        assert self._task_group is not None
+        await self._task_group.start(run_server)
+        if restored:
+            logger.info(f"Restored session {session_id}")
+        return transport
@@ -0,0 +1,112 @@
+"""TTL-driven expiry of in-memory OAuth state."""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryQueue:
+    """Min-heap of entry deadlines, checked against the entries themselves.
+
+    Each entry is identified by a (kind, key) pair, and deadline(kind, key)
+    returns its current deadline, or None once it is gone. Rescheduling or
+    removing an entry leaves its old heap item in place; items whose deadline
+    no longer matches are skipped when they surface, so every operation stays
+    O(log n) and popping expired entries costs O(expired log n).
+    """
+
+    def __init__(self, deadline: Callable[[str, bytes], float | None]) -> None:
+        self.deadline = deadline
+        self._heap: list[tuple[float, str, bytes]] = []
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, kind: str, key: bytes, deadline: float) -> None:
+        """Schedule an entry to expire at deadline."""
+        heapq.heappush(self._heap, (deadline, kind, key))
+
+    def pop_expired(self, now: float) -> list[tuple[str, bytes]]:
+        """Remove and return every (kind, key) whose deadline has passed."""
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            deadline, kind, key = heapq.heappop(heap)
+            if self.deadline(kind, key) == deadline:
+                expired.append((kind, key))
+        return expired
+
+    def rebuild(self, live: Iterable[tuple[float, str, bytes]]) -> None:
+        """Replace the items with those of the live entries, dropping stale ones."""
+        self._heap = list(live)
+        heapq.heapify(self._heap)
+
+
+class ExpirySweeper:
+    """Periodically evicts expired entries from a store.
+
+    evict is called with the current time and returns the number of entries
+    it removed per kind; the sweeper keeps running totals of those counts.
+    """
+
+    def __init__(
+        self, evict: Callable[[float], dict[str, int]], interval: float
+    ) -> None:
+        self.evict = evict
+        self.interval = interval
+        self.sweeps = 0
+        self.reclaimed: dict[str, int] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def sweep(self, now: float | None = None) -> dict[str, int]:
+        """Run a single eviction pass and update the counters."""
+        evicted = self.evict(time.time() if now is None else now)
+        self.sweeps += 1
+        for kind, count in evicted.items():
+            self.reclaimed[kind] = self.reclaimed.get(kind, 0) + count
+        if evicted:
+            logger.debug(f"Expired entries evicted: {evicted}")
+        return evicted
+
+    def stats(self) -> dict[str, int]:
+        """Return the sweep count and total reclaimed entries per kind."""
+        return {"sweeps": self.sweeps, **self.reclaimed}
+
+    async def run(self) -> None:
+        """Sweep every interval seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error("Expiry sweep failed", exc_info=e)
+
+    def start(self) -> None:
+        """Start sweeping in a background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Cancel the background task and wait for it to finish."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator["ExpirySweeper"]:
+        """Run the sweeper as a background task for the duration of the block."""
+        self.start()
+        try:
+            yield self
+        finally:
+            await self.stop()
@@ -0,0 +1,251 @@
+"""Shared HTTP client for GitHub upstream calls."""
+
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from mcp_simple_auth.http_cache import ResponseCache, freshness_lifetime
+from mcp_simple_auth.metrics import GITHUB_REQUEST_DURATION, REGISTRY
+from mcp_simple_auth.rate_limit import (
+    APP,
+    PRIORITY_OAUTH,
+    PRIORITY_TOOL,
+    RateLimited,
+    UpstreamScheduler,
+)
+from mcp_simple_auth.single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    from mcp_simple_auth.server import ServerSettings
+
+logger = logging.getLogger(__name__)
+
+GITHUB_COALESCED = REGISTRY.counter(
+    "mcp_github_coalesced_requests_total",
+    "GitHub API calls that shared an identical request already in flight",
+    ("endpoint",),
+)
+
+
+class GitHubClient:
+    """Long-lived pooled HTTP client for github.com and api.github.com.
+
+    One client is shared by the whole process so connections, TLS sessions
+    and (optionally) HTTP/2 streams are reused across OAuth callbacks and tool
+    calls. It is opened and closed by the server lifespan; if it's used before
+    that, the pool is created on first use.
+    """
+
+    def __init__(self, settings: "ServerSettings"):
+        self.settings = settings
+        self._client: httpx.AsyncClient | None = None
+        self.cache = ResponseCache(settings.github_cache_size)
+        self.scheduler = UpstreamScheduler(settings)
+        # Identical GETs in flight, keyed by (github_token, method, url)
+        self._inflight: SingleFlight[httpx.Response] = SingleFlight()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> httpx.AsyncClient:
+        settings = self.settings
+        kwargs: dict[str, Any] = {
+            "follow_redirects": True,
+            "timeout": httpx.Timeout(
+                settings.http_timeout, connect=settings.http_connect_timeout
+            ),
+            "limits": httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+        }
+        try:
+            return httpx.AsyncClient(http2=settings.http2, **kwargs)
+        except ImportError:
+            # HTTP/2 needs the optional h2 package (httpx[http2])
+            logger.warning("HTTP/2 requested but h2 is not installed, using HTTP/1.1")
+            return httpx.AsyncClient(**kwargs)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator["GitHubClient"]:
+        """Open the connection pool for the duration of the block."""
+        if self._client is None:
+            self._client = self._create_client()
+        try:
+            yield self
+        finally:
+            await self.aclose()
+
+    def pool_stats(self) -> dict[str, int]:
+        """Connections in the pool, and how many of them are serving requests."""
+        pool = getattr(self._client, "_transport", None)
+        connections = getattr(getattr(pool, "_pool", None), "connections", [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "max_connections": self.settings.http_max_connections,
+        }
+
+    async def _request(
+        self,
+        endpoint: str,
+        budget: str,
+        priority: int,
+        method: str,
+        url: str,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request upstream within the rate-limit budget it draws on.
+
+        Rate-limited responses are retried once the scheduler's wait is over,
+        up to github_max_retries times; RateLimited is raised when the wait
+        is too long or retries run out. endpoint labels the call's metrics,
+        so it must not contain per-user values.
+        """
+        retry_after = 0.0
+        for _ in range(self.settings.github_max_retries + 1):
+            async with self.scheduler.slot(budget, priority):
+                start = time.perf_counter()
+                status = "error"
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                    status = str(response.status_code)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    GITHUB_REQUEST_DURATION.observe(elapsed, endpoint, status)
+
+            wait = self.scheduler.update(budget, response)
+            if wait is None:
+                return response
+            retry_after = wait
+            logger.info(f"GitHub rate limit on {endpoint}, retry in {wait:.1f}s")
+        raise RateLimited(retry_after)
+
+    async def exchange_code(self, code: str) -> httpx.Response:
+        """Exchange a GitHub OAuth code for a GitHub access token."""
+        return await self._request(
+            "oauth/access_token",
+            APP,
+            PRIORITY_OAUTH,
+            "POST",
+            self.settings.github_token_url,
+            data={
+                "client_id": self.settings.github_client_id,
+                "client_secret": self.settings.github_client_secret,
+                "code": code,
+                "redirect_uri": self.settings.github_callback_path,
+            },
+            headers={"Accept": "application/json"},
+        )
+
+    async def api_get(
+        self, path: str, github_token: str, endpoint: str | None = None
+    ) -> httpx.Response:
+        """GET a GitHub REST API path on behalf of a user.
+
+        Responses are cached per user and revalidated with their ETag, so a
+        repeated call is served locally while fresh and costs a 304 after.
+        Concurrent identical calls share a single upstream request and its
+        response. endpoint labels the call's metrics and defaults to path;
+        paths with names or IDs in them should pass a template such as
+        "/repos/{repo}".
+        """
+        url = f"{self.settings.github_api_url.rstrip('/')}{path}"
+        key = (github_token, url)
+
+        cached = self.cache.get(key)
+        if cached is not None and cached.fresh_until > time.monotonic():
+            self.cache.hits += 1
+            return cached.to_response(self.client.build_request("GET", url))
+
+        flight_key = (github_token, "GET", url)
+        if flight_key in self._inflight:
+            GITHUB_COALESCED.inc(endpoint or path)
+        return await self._inflight.do(
+            flight_key, lambda: self._fetch(url, github_token, endpoint or path)
+        )
+
+    async def _fetch(
+        self, url: str, github_token: str, endpoint: str
+    ) -> httpx.Response:
+        """GET url upstream, revalidating and updating its cache entry."""
+        headers = {
+            "Authorization": f"Bearer {github_token}",
+            "Accept": "application/vnd.github.v3+json",
+        }
+        key = (github_token, url)
+        cached = self.cache.get(key)
+        if cached is not None:
+            headers["If-None-Match"] = cached.etag
+
+        response = await self._request(
+            endpoint, github_token, PRIORITY_TOOL, "GET", url, headers=headers
+        )
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.revalidations += 1
+            cached.fresh_until = time.monotonic() + freshness_lifetime(response)
+            return cached.to_response(response.request)
+
+        self.cache.misses += 1
+        if response.status_code == 200:
+            self.cache.put(key, response)
+        else:
+            self.cache.discard(key)
+        return response
+
+    async def graphql(
+        self, query: str, variables: dict[str, Any], github_token: str
+    ) -> dict[str, Any]:
+        """Run a GraphQL query on behalf of a user, returning its data.
+
+        GraphQL has its own rate limit, so it is budgeted apart from REST
+        calls with the same token. Identical concurrent queries share one
+        request. Raises ValueError on HTTP or GraphQL errors.
+        """
+        url = f"{self.settings.github_api_url.rstrip('/')}/graphql"
+        payload = {"query": query, "variables": variables}
+        body = json.dumps(payload, sort_keys=True)
+        flight_key = (github_token, "POST", url, body)
+        if flight_key in self._inflight:
+            GITHUB_COALESCED.inc("graphql")
+        response = await self._inflight.do(
+            flight_key,
+            lambda: self._request(
+                "graphql",
+                f"{github_token} graphql",
+                PRIORITY_TOOL,
+                "POST",
+                url,
+                content=body,
+                headers={
+                    "Authorization": f"Bearer {github_token}",
+                    "Content-Type": "application/json",
+                },
+            ),
+        )
+
+        if response.status_code != 200:
+            raise ValueError(
+                f"GitHub API error: {response.status_code} - {response.text}"
+            )
+        result = response.json()
+        if result.get("errors"):
+            messages = "; ".join(error["message"] for error in result["errors"])
+            raise ValueError(f"GitHub GraphQL error: {messages}")
+        return result["data"]
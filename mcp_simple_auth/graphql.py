@@ -0,0 +1,153 @@
+"""Minimal GraphQL query builder and the GitHub queries the tools use.
+
+Queries are composed from Field objects and rendered once per shape, with
+page sizes and cursors passed as variables so a shape's text is reused for
+every page.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any
+
+
+class Variable(str):
+    """Reference to a query variable, rendered as $name."""
+
+
+class Enum(str):
+    """Enum value, rendered bare."""
+
+
+def _value(value: Any) -> str:
+    if isinstance(value, Variable):
+        return f"${value}"
+    if isinstance(value, Enum):
+        return str(value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, dict):
+        fields = ", ".join(f"{key}: {_value(item)}" for key, item in value.items())
+        return f"{{{fields}}}"
+    if isinstance(value, (list, tuple)):
+        return f"[{', '.join(_value(item) for item in value)}]"
+    return json.dumps(value)
+
+
+class Field:
+    """A selected field with optional alias, arguments and sub-selections."""
+
+    def __init__(
+        self,
+        name: str,
+        *selections: "Field | str",
+        alias: str | None = None,
+        **arguments: Any,
+    ):
+        self.name = name
+        self.selections = [
+            Field(selection) if isinstance(selection, str) else selection
+            for selection in selections
+        ]
+        self.alias = alias
+        self.arguments = arguments
+
+    def render(self, depth: int = 1) -> str:
+        indent = "  " * depth
+        text = f"{self.alias}: {self.name}" if self.alias else self.name
+        arguments = {k: v for k, v in self.arguments.items() if v is not None}
+        if arguments:
+            text += f"({', '.join(f'{k}: {_value(v)}' for k, v in arguments.items())})"
+        if self.selections:
+            inner = "\n".join(field.render(depth + 1) for field in self.selections)
+            text += f" {{\n{inner}\n{indent}}}"
+        return f"{indent}{text}"
+
+
+def render_query(name: str, variables: dict[str, str], *selections: Field) -> str:
+    """Render a named query declaring variables ({name: GraphQL type})."""
+    declared = ", ".join(f"${key}: {kind}" for key, kind in variables.items())
+    header = f"query {name}({declared})" if declared else f"query {name}"
+    body = "\n".join(field.render() for field in selections)
+    return f"{header} {{\n{body}\n}}"
+
+
+def connection(name: str, *node_fields: Field | str, **arguments: Any) -> Field:
+    """A cursor-paginated connection, paged by ${name}First and ${name}After."""
+    return Field(
+        name,
+        "totalCount",
+        Field("pageInfo", "hasNextPage", "endCursor"),
+        Field("nodes", *node_fields),
+        first=Variable(f"{name}First"),
+        after=Variable(f"{name}After"),
+        **arguments,
+    )
+
+
+PROFILE_FIELDS: tuple[Field | str, ...] = (
+    "login",
+    "name",
+    "email",
+    "bio",
+    "company",
+    "location",
+    "url",
+    "avatarUrl",
+    "createdAt",
+    Field("followers", "totalCount"),
+    Field("following", "totalCount"),
+)
+
+# Connections of the viewer the tools can page through
+SECTIONS: dict[str, Field] = {
+    "repositories": connection(
+        "repositories",
+        "nameWithOwner",
+        "description",
+        "url",
+        "isPrivate",
+        "isFork",
+        "stargazerCount",
+        "updatedAt",
+        Field("primaryLanguage", "name"),
+        orderBy={"field": Enum("UPDATED_AT"), "direction": Enum("DESC")},
+    ),
+    "organizations": connection("organizations", "login", "name", "description", "url"),
+    "pullRequests": connection(
+        "pullRequests",
+        "number",
+        "title",
+        "state",
+        "url",
+        "createdAt",
+        Field("repository", "nameWithOwner"),
+        orderBy={"field": Enum("CREATED_AT"), "direction": Enum("DESC")},
+    ),
+}
+
+
+@lru_cache(maxsize=32)
+def viewer_query(sections: tuple[str, ...], profile: bool = True) -> str:
+    """Query for the viewer's profile and a page of each of sections."""
+    variables = {}
+    for section in sections:
+        variables[f"{section}First"] = "Int!"
+        variables[f"{section}After"] = "String"
+    selections = [*(PROFILE_FIELDS if profile else ("login",))]
+    selections += [SECTIONS[section] for section in sections]
+    return render_query("Viewer", variables, Field("viewer", *selections))
+
+
+def page_variables(section: str, first: int, after: str | None) -> dict[str, Any]:
+    # GitHub allows at most 100 nodes per connection page
+    return {f"{section}First": max(1, min(first, 100)), f"{section}After": after}
+
+
+def page(data: dict[str, Any]) -> dict[str, Any]:
+    """Flatten a connection into items plus the cursor of the next page."""
+    page_info = data["pageInfo"]
+    return {
+        "total_count": data["totalCount"],
+        "items": data["nodes"],
+        "next_cursor": page_info["endCursor"] if page_info["hasNextPage"] else None,
+    }
@@ -0,0 +1,89 @@
+"""Bounded LRU cache of GitHub API responses for conditional requests."""
+
+import re
+import time
+from collections import OrderedDict
+
+import httpx
+
+_MAX_AGE_RE = re.compile(r"(?:^|,)\s*max-age=(\d+)")
+
+
+class CachedResponse:
+    """A cached response body together with its validator."""
+
+    __slots__ = ("content", "etag", "fresh_until", "headers")
+
+    def __init__(
+        self, etag: str, content: bytes, headers: httpx.Headers, fresh_until: float
+    ):
+        self.etag = etag
+        self.content = content
+        self.headers = headers
+        self.fresh_until = fresh_until
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, headers=self.headers, content=self.content, request=request
+        )
+
+
+def freshness_lifetime(response: httpx.Response) -> int:
+    """Seconds a response may be served without revalidation (max-age)."""
+    match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+    return int(match.group(1)) if match else 0
+
+
+class ResponseCache:
+    """Per-user cache of GitHub API responses with LRU eviction.
+
+    Entries are keyed by (github_token, url) so users never see each other's
+    responses. Fresh entries are served directly; stale ones are revalidated
+    with If-None-Match, and a 304 (which GitHub doesn't count against the rate
+    limit) serves the cached body again.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], CachedResponse] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[str, str]) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple[str, str], response: httpx.Response) -> None:
+        """Cache a 200 response if it carries an ETag."""
+        etag = response.headers.get("etag")
+        if etag is None or self.max_entries <= 0:
+            return
+        self._entries[key] = CachedResponse(
+            etag=etag,
+            content=response.content,
+            headers=response.headers,
+            fresh_until=time.monotonic() + freshness_lifetime(response),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: tuple[str, str]) -> None:
+        self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,224 @@
+"""OAuth 2.0 token introspection (RFC 7662): the endpoint and a verifier.
+
+The authorization server answers POST /introspect, for callers bearing the
+introspection secret, with whether an access token is active and what it
+grants, and with the GitHub token backing it, which a resource server needs
+to call GitHub on the user's behalf. IntrospectionVerifier validates tokens
+against that endpoint from another process: it answers load_access_token()
+and get_github_token() like the provider does, caching answers for a short
+TTL so most requests cost a dict lookup instead of a round trip. A revoked
+token stays valid for the verifier until its cached answer expires.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, Protocol
+
+import httpx
+from mcp.server.auth.provider import AccessToken
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from mcp_simple_auth.metrics import REGISTRY, Sample
+from mcp_simple_auth.single_flight import SingleFlight
+
+if TYPE_CHECKING:
+    from mcp_simple_auth.server import SimpleGitHubOAuthProvider
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VERIFICATIONS = REGISTRY.counter(
+    "mcp_token_verifications_total",
+    "Tokens verified by introspection: answered from the cache (hit,"
+    " negative_hit), by the authorization server (miss), or not at all (error)",
+    ("outcome",),
+)
+
+# Introspection responses describe a token's state at one moment
+NO_STORE = {"Cache-Control": "no-store", "Pragma": "no-cache"}
+
+
+class TokenVerifier(Protocol):
+    """What serving MCP needs to know about an access token.
+
+    The provider answers from its own storage; a resource server without one
+    asks the authorization server through an IntrospectionVerifier.
+    """
+
+    async def load_access_token(self, token: str) -> AccessToken | None: ...
+
+    async def get_github_token(self, token: str) -> str | None: ...
+
+
+def introspection_endpoint(
+    provider: "SimpleGitHubOAuthProvider",
+) -> Callable[[Request], Awaitable[Response]]:
+    """The /introspect endpoint, for MCP access tokens.
+
+    Refresh tokens, GitHub tokens and anything unknown or expired are
+    reported inactive, as RFC 7662 asks for tokens a caller may not see.
+    """
+
+    async def introspect(request: Request) -> Response:
+        form = await request.form()
+        token = form.get("token")
+        if not isinstance(token, str) or not token:
+            return JSONResponse(
+                {"error": "invalid_request", "error_description": "token is missing"},
+                status_code=400,
+                headers=NO_STORE,
+            )
+        access_token = await provider.load_access_token(token)
+        if access_token is None:
+            return JSONResponse({"active": False}, headers=NO_STORE)
+        body: dict[str, Any] = {
+            "active": True,
+            "client_id": access_token.client_id,
+            "scope": " ".join(access_token.scopes),
+            "token_type": "Bearer",
+        }
+        if access_token.expires_at is not None:
+            body["exp"] = access_token.expires_at
+        github_token = await provider.get_github_token(token)
+        if github_token is not None:
+            body["github_token"] = github_token
+        return JSONResponse(body, headers=NO_STORE)
+
+    return introspect
+
+
+class Introspection:
+    """A cached introspection answer, and until when it may be used."""
+
+    __slots__ = ("access_token", "cached_until", "github_token")
+
+    def __init__(
+        self,
+        access_token: AccessToken | None,
+        github_token: str | None,
+        cached_until: float,
+    ):
+        self.access_token = access_token  # None if the token is inactive
+        self.github_token = github_token
+        self.cached_until = cached_until
+
+
+class IntrospectionVerifier:
+    """Verifies access tokens with an authorization server's /introspect.
+
+    Active answers are cached for cache_ttl seconds, or until the token
+    expires if that is sooner, and inactive ones for negative_cache_ttl, in
+    an LRU of max_entries tokens; a TTL of 0 turns that cache off.
+    Concurrent verifications of one token share a request. When the
+    authorization server can't be reached, tokens are refused and nothing
+    is cached.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        secret: str,
+        cache_ttl: float = 30.0,
+        negative_cache_ttl: float = 5.0,
+        max_entries: int = 10000,
+        timeout: float = 5.0,
+    ):
+        self.url = url
+        self.secret = secret
+        self.cache_ttl = cache_ttl
+        self.negative_cache_ttl = negative_cache_ttl
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._cache: OrderedDict[str, Introspection] = OrderedDict()
+        self._inflight: SingleFlight[Introspection] = SingleFlight()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.secret}"},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator["IntrospectionVerifier"]:
+        """Close the connection pool, opened on first use, when the block exits."""
+        try:
+            yield self
+        finally:
+            await self.aclose()
+
+    async def load_access_token(self, token: str) -> AccessToken | None:
+        return (await self.introspect(token)).access_token
+
+    async def get_github_token(self, token: str) -> str | None:
+        """Return the GitHub token backing a valid access token."""
+        return (await self.introspect(token)).github_token
+
+    async def introspect(self, token: str) -> Introspection:
+        now = time.time()
+        cached = self._cache.get(token)
+        if cached is not None:
+            if cached.cached_until > now:
+                self._cache.move_to_end(token)
+                active = cached.access_token is not None
+                TOKEN_VERIFICATIONS.inc("hit" if active else "negative_hit")
+                return cached
+            del self._cache[token]
+        return await self._inflight.do(token, lambda: self._fetch(token))
+
+    async def _fetch(self, token: str) -> Introspection:
+        try:
+            response = await self.client.post(self.url, data={"token": token})
+            response.raise_for_status()
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            TOKEN_VERIFICATIONS.inc("error")
+            logger.warning(f"Token introspection at {self.url} failed: {e!r}")
+            return Introspection(None, None, 0.0)
+
+        TOKEN_VERIFICATIONS.inc("miss")
+        now = time.time()
+        if not body.get("active"):
+            result = Introspection(None, None, now + self.negative_cache_ttl)
+            ttl = self.negative_cache_ttl
+        else:
+            expires_at = body.get("exp")
+            access_token = AccessToken(
+                token=token,
+                client_id=body.get("client_id", ""),
+                scopes=body.get("scope", "").split(),
+                expires_at=expires_at,
+            )
+            cached_until = now + self.cache_ttl
+            if expires_at is not None:
+                cached_until = min(cached_until, expires_at)
+            result = Introspection(access_token, body.get("github_token"), cached_until)
+            ttl = self.cache_ttl
+        if ttl > 0:
+            self._cache[token] = result
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def stats(self) -> dict[str, int]:
+        return {"cached": len(self._cache), "inflight": len(self._inflight)}
+
+    async def collect_metrics(self) -> list[tuple[str, str, list[Sample]]]:
+        return [
+            (
+                "mcp_introspection_cache_entries",
+                "Introspection answers cached by the token verifier",
+                [({}, len(self._cache))],
+            )
+        ]
@@ -0,0 +1,338 @@
+"""Logging off the event loop: structured lines, access log, redaction.
+
+Handlers write synchronously in the thread that logs, which for this server
+is the event loop. configure_logging() replaces them with a QueueHandler,
+which only puts the record on a bounded queue, and a LogWriter thread that
+formats what has queued, redacts it and writes it as one batch, rotating
+the file by size. If the writer falls behind and the queue fills, records
+are dropped rather than block the loop, and the writer reports how many.
+
+AccessLogMiddleware logs a line per request in place of uvicorn's access
+log, a sample of the successful ones and every error.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Literal, TextIO
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ACCESS_LOGGER = "mcp_simple_auth.access"
+
+# Records the writer takes off the queue for one write
+BATCH_SIZE = 512
+
+# Loggers that log every request or chunk they handle; their warnings remain
+NOISY_LOGGERS = ("httpx", "httpcore", "multipart", "sse_starlette")
+
+# Parameters and JSON keys ending in these have their values redacted
+_SECRET_SUFFIXES = ("token", "code", "secret", "password", "state", "verifier")
+
+
+def _after_secret_name(then: str) -> str:
+    return "|".join(f"(?<={name}{then})" for name in _SECRET_SUFFIXES)
+
+
+_PARAMETER = _after_secret_name("=")
+_JSON_KEY = _after_secret_name('"')
+
+# (marker, pattern, replacement): the pattern only runs on text holding the
+# marker. Each pattern starts with a literal, which re finds quickly.
+REDACTIONS = [
+    # Query strings and form bodies: code=..., and JSON: "code": "..."
+    ("=", re.compile(f"=(?:{_PARAMETER})[^&\\s\"']+"), "=[REDACTED]"),
+    ('"', re.compile(f'"(?:{_JSON_KEY})(\\s*:\\s*")[^"]+'), r'"\1[REDACTED]'),
+    ("Bearer", re.compile(r"(Bearer\s+)\S+"), r"\1[REDACTED]"),
+    # Our opaque tokens and codes, GitHub tokens, and JWTs
+    ("mcp_", re.compile(r"mcp_(?:rt_)?[0-9a-f]{32,}"), "[REDACTED]"),
+    ("gh", re.compile(r"gh[opsur]_[A-Za-z0-9]{20,}"), "[REDACTED]"),
+    ("github_pat_", re.compile(r"github_pat_\w{20,}"), "[REDACTED]"),
+    ("eyJ", re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]*"), "[REDACTED]"),
+]
+
+# Attributes that hold no logged data
+_UNREDACTED_ATTRIBUTES = {
+    "name",
+    "levelname",
+    "pathname",
+    "filename",
+    "module",
+    "funcName",
+    "threadName",
+    "processName",
+    "taskName",
+}
+
+# Attributes every LogRecord has, and uvicorn's terminal-only copy of the
+# message; any others were passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "color_message",
+}
+
+
+def redact(text: str) -> str:
+    for marker, pattern, replacement in REDACTIONS:
+        if marker in text:
+            text = pattern.sub(replacement, text)
+    return text
+
+
+def redact_record(record: logging.LogRecord) -> None:
+    """Redact the message, traceback and text fields of a prepared record."""
+    for name, value in vars(record).items():
+        if isinstance(value, str) and name not in _UNREDACTED_ATTRIBUTES:
+            setattr(record, name, redact(value))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the fields passed as extra= in it."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        return json.dumps(entry, default=str)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Queues records without waiting: a full queue drops them, counted."""
+
+    def __init__(self, records: queue.Queue[logging.LogRecord | None]):
+        super().__init__(records)
+        self.records = records  # self.queue, as typed for the writer
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge the arguments into the message and render any traceback.
+
+        Everything else is left to the writer, but a traceback refers to
+        frames that may be gone by the time it runs.
+        """
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogWriter:
+    """Writes queued records from a background thread, a batch per write.
+
+    Without a path, writes to stderr. With one, the file is rotated once it
+    reaches max_bytes: path becomes path.1, path.1 becomes path.2 and so on,
+    keeping backup_count old files.
+    """
+
+    def __init__(
+        self,
+        handler: QueueHandler,
+        formatter: logging.Formatter,
+        path: str | None = None,
+        max_bytes: int = 0,
+        backup_count: int = 0,
+    ):
+        self.handler = handler
+        self.queue = handler.records
+        self.formatter = formatter
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._stream: TextIO = self._open() if path else sys.stderr
+        self._reported_drops = 0
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write what is queued and stop; safe to call more than once."""
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not None]
+            if records:
+                self._write(records)
+            if batch[-1] is None:
+                if self.path:
+                    self._stream.close()
+                return
+
+    def _write(self, records: list[logging.LogRecord]) -> None:
+        lines = []
+        dropped = self.handler.dropped - self._reported_drops
+        if dropped:
+            self._reported_drops += dropped
+            lines.append(self._dropped_line(dropped))
+        for record in records:
+            try:
+                redact_record(record)
+                lines.append(self.formatter.format(record))
+            except Exception:
+                # As logging.Handler.handleError: a bad record is not fatal
+                lines.append(f"Failed to format log record from {record.name}")
+        try:
+            self._stream.write("\n".join(lines) + "\n")
+            self._stream.flush()
+            rotate = self.path and self.max_bytes > 0
+            if rotate and self._stream.tell() >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            print(f"Cannot write log: {e}", file=sys.stderr)
+
+    def _dropped_line(self, dropped: int) -> str:
+        record = logging.makeLogRecord(
+            {
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Dropped {dropped} log records: the log writer fell behind",
+                "dropped": dropped,
+            }
+        )
+        return self.formatter.format(record)
+
+    def _open(self) -> TextIO:
+        assert self.path is not None
+        return open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        assert self.path is not None
+        self._stream.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.truncate(self.path, 0)
+        self._stream = self._open()
+
+
+def configure_logging(
+    format: Literal["json", "text"] = "json",
+    path: str | None = None,
+    max_bytes: int = 0,
+    backup_count: int = 0,
+    queue_size: int = 10000,
+    level: int | str = logging.INFO,
+) -> LogWriter:
+    """Route all logging through a queue to a started LogWriter."""
+    if format == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    handler = QueueHandler(queue.Queue(queue_size))
+    writer = LogWriter(handler, formatter, path, max_bytes, backup_count)
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+        old.close()
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    writer.start()
+    return writer
+
+
+class AccessLogMiddleware:
+    """ASGI middleware logging a line per request when it completes.
+
+    Requests answered below 400 are logged at the sample rate; client and
+    server errors, and requests that raised, always are. The query string
+    is logged redacted, like every other line.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.logger = logging.getLogger(ACCESS_LOGGER)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        sent = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            status = 500
+            raise
+        finally:
+            if status >= 400 or random.random() < self.sample_rate:
+                self._log(scope, status, sent, time.perf_counter() - start)
+
+    def _log(self, scope: Scope, status: int, sent: int, duration: float) -> None:
+        client = scope.get("client")
+        method, path = scope["method"], scope["path"]
+        self.logger.log(
+            logging.WARNING if status >= 500 else logging.INFO,
+            f"{method} {path} {status}",
+            extra={
+                "method": method,
+                "path": path,
+                "query": scope["query_string"].decode("latin-1"),
+                "status": status,
+                "duration_ms": round(duration * 1000, 2),
+                "bytes": sent,
+                "client": client[0] if client else None,
+            },
+        )
@@ -0,0 +1,303 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Metrics are recorded from the event loop thread only, so recording is a
+dict lookup and a few integer increments with no locking. Histograms keep
+per-bucket counts and are made cumulative when rendered. Values that are
+cheaper to read than to track, such as storage sizes, are gauges read by
+collectors at scrape time.
+
+Each worker process has its own registry; a scrape sees the worker that
+served it.
+"""
+
+import functools
+import inspect
+import time
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)  # fmt: skip
+
+Sample = tuple[dict[str, str], float]
+Collector = Callable[[], Awaitable[Iterable[tuple[str, str, list[Sample]]]]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(
+                f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = (*self.labelnames, "le")
+        for labels, series in self._series.items():
+            cumulative = 0
+            bounds = (*self.buckets, float("inf"))
+            for bound, count in zip(bounds, series[:-1], strict=True):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, (*labels, _number(bound)))}"
+                    f" {cumulative}"
+                )
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._collectors: dict[str, Collector] = {}
+
+    def counter(
+        self, name: str, help: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def _register(self, metric: Any) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def set_collector(self, key: str, collector: Collector) -> None:
+        """Add a scrape-time collector, replacing any earlier one under key.
+
+        A collector returns (name, help, [(labels, value), ...]) gauges.
+        """
+        self._collectors[key] = collector
+
+    async def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors.values():
+            for name, help, samples in await collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in samples:
+                    lines.append(
+                        f"{name}{_labels(labels, labels.values())} {_number(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "mcp_http_request_duration_seconds",
+    "Time to the response headers of HTTP requests, by route",
+    ("route", "method", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "mcp_http_requests_in_flight", "HTTP requests being handled", ("route",)
+)
+SSE_SESSIONS = REGISTRY.gauge("mcp_sse_sessions_active", "Open SSE streams")
+SSE_SESSIONS_REAPED = REGISTRY.counter(
+    "mcp_sse_sessions_reaped_total",
+    "SSE sessions closed by the server, by reason",
+    ("reason",),
+)
+EVENTS_REPLAYED = REGISTRY.counter(
+    "mcp_events_replayed_total",
+    "Streamable-http events replayed to reconnecting clients, and replays"
+    " refused because the last event is not retained",
+    ("outcome",),
+)
+CLIENTS_EVICTED = REGISTRY.counter(
+    "mcp_clients_evicted_total",
+    "Registered clients evicted from a full registry, by segment",
+    ("segment",),
+)
+CLIENT_REGISTRATIONS = REGISTRY.counter(
+    "mcp_client_registrations_total",
+    "Client registration requests, allowed or throttled",
+    ("outcome",),
+)
+TOOL_CALL_DURATION = REGISTRY.histogram(
+    "mcp_tool_call_duration_seconds",
+    "Duration of MCP tool calls",
+    ("tool", "outcome"),
+)
+GITHUB_REQUEST_DURATION = REGISTRY.histogram(
+    "mcp_github_request_duration_seconds",
+    "Duration of GitHub upstream requests",
+    ("endpoint", "status"),
+)
+
+# Routes get their own label; anything else is "other" to bound cardinality
+ROUTES = (
+    "/authorize",
+    "/token",
+    "/register",
+    "/revoke",
+    "/introspect",
+    "/github/callback",
+    "/sse",
+    "/messages",
+    "/mcp",
+    "/metrics",
+    "/admin",
+    "/.well-known/oauth-authorization-server",
+)
+
+
+def route_label(path: str) -> str:
+    for route in ROUTES:
+        if path == route or path.startswith(f"{route}/"):
+            return route
+    return "/" if path == "/" else "other"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, in-flight requests and SSE streams.
+
+    Latency is measured to the response headers, so long-lived SSE streams
+    are timed by how quickly they open and counted by SSE_SESSIONS while open.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = route_label(scope["path"])
+        method = scope["method"]
+        start = time.perf_counter()
+        started = False
+        is_stream = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started, is_stream
+            if message["type"] == "http.response.start":
+                started = True
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - start, route, method, str(message["status"])
+                )
+                if route == "/sse" and message["status"] == 200:
+                    is_stream = True
+                    SSE_SESSIONS.inc()
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(route)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            if not started:
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - start, route, method, "500"
+                )
+            raise
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec(route)
+            if is_stream:
+                SSE_SESSIONS.dec()
+
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def timed_tool(fn: F) -> F:
+    """Record the duration and outcome of an async tool function."""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await fn(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            TOOL_CALL_DURATION.observe(time.perf_counter() - start, name, outcome)
+
+    # FastMCP builds the tool schema from the signature
+    wrapper.__signature__ = inspect.signature(fn)  # type: ignore[attr-defined]
+    return wrapper  # type: ignore[return-value]
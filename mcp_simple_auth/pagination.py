@@ -0,0 +1,146 @@
+"""Prefetching iteration over page-numbered GitHub REST listings."""
+
+import asyncio
+import re
+from collections import deque
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from contextlib import aclosing
+from typing import Any
+
+import httpx
+
+# GitHub caps per_page at 100 for every listing
+MAX_PER_PAGE = 100
+# Most items one tool call returns; larger listings are resumed by cursor
+MAX_CHUNK_ITEMS = 1000
+
+_PAGE_RE = re.compile(r"[?&]page=(\d+)")
+
+
+class Page:
+    """One page of a listing and what its Link header says about the rest."""
+
+    __slots__ = ("has_next", "items", "last", "number")
+
+    def __init__(self, number: int, items: list[Any], has_next: bool, last: int | None):
+        self.number = number
+        self.items = items
+        self.has_next = has_next
+        self.last = last  # Number of the last page, if GitHub said
+
+    @classmethod
+    def from_response(cls, number: int, response: httpx.Response) -> "Page":
+        body = response.json()
+        # Search endpoints wrap their results, listings are bare arrays
+        items = body["items"] if isinstance(body, dict) else body
+        last = response.links.get("last", {}).get("url")
+        match = _PAGE_RE.search(last) if last else None
+        return cls(
+            number,
+            items,
+            "next" in response.links,
+            int(match.group(1)) if match else None,
+        )
+
+
+def encode_cursor(page: int, per_page: int) -> str:
+    return f"{per_page}:{page}"
+
+
+def decode_cursor(cursor: str) -> tuple[int, int]:
+    """Return the (page, per_page) a cursor resumes from."""
+    try:
+        per_page, page = (int(part) for part in cursor.split(":"))
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from None
+    if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return page, per_page
+
+
+def realign_page(page: int, per_page: int, new_per_page: int) -> tuple[int, int]:
+    """Return the page of new_per_page items holding page's first item.
+
+    Also returns how many items of that page come before it.
+    """
+    offset = (page - 1) * per_page
+    return offset // new_per_page + 1, offset % new_per_page
+
+
+async def prefetch_pages(
+    fetch: Callable[[int], Awaitable[Page]], start: int, stop: int, window: int
+) -> AsyncGenerator[Page, None]:
+    """Yield pages start..stop in order, keeping up to window fetches in flight.
+
+    The first page is fetched alone so its Link header can bound the rest;
+    after it, later pages are requested ahead while earlier ones are consumed.
+    Iteration ends at the first page without a next link. Fetches still in
+    flight when the consumer stops are cancelled.
+    """
+    pending: deque[asyncio.Task[Page]] = deque()
+    next_number = start
+    limit = 1  # Fetches in flight until the first page tells us about the rest
+    try:
+        while True:
+            while len(pending) < limit and next_number <= stop:
+                pending.append(asyncio.ensure_future(fetch(next_number)))
+                next_number += 1
+            if not pending:
+                return
+            page = await pending.popleft()
+            yield page
+            if not page.has_next:
+                return
+            if page.last is not None:
+                stop = min(stop, page.last)
+            limit = window
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+class Chunk:
+    """Items gathered from consecutive pages and where to resume."""
+
+    __slots__ = ("error", "items", "resume")
+
+    def __init__(self) -> None:
+        self.items: list[Any] = []
+        self.resume: int | None = None  # Page to continue from, None at the end
+        self.error: Exception | None = None  # What cut the chunk short
+
+
+async def collect_chunk(
+    fetch: Callable[[int], Awaitable[Page]],
+    start: int,
+    max_pages: int,
+    window: int,
+    on_page: Callable[[int, int | None, int], Awaitable[None]] | None = None,
+) -> Chunk:
+    """Gather up to max_pages pages from start.
+
+    on_page(pages_done, pages_total, items_so_far) is awaited as each page
+    arrives; pages_total is None until GitHub says where the listing ends.
+    An error on the first page is raised. A later one ends the chunk early
+    with what was gathered, resuming at the page that failed.
+    """
+    chunk = Chunk()
+    chunk.resume = start
+    stop = start + max_pages - 1
+    total: int | None = None
+    pages = prefetch_pages(fetch, start, stop, window)
+    async with aclosing(pages):
+        try:
+            async for page in pages:
+                chunk.items.extend(page.items)
+                chunk.resume = page.number + 1 if page.has_next else None
+                if page.last is not None:
+                    total = min(stop, page.last) - start + 1
+                if on_page is not None:
+                    await on_page(page.number - start + 1, total, len(chunk.items))
+        except Exception as e:
+            if not chunk.items:
+                raise
+            chunk.error = e
+    return chunk
@@ -0,0 +1,231 @@
+"""Rate-limit-aware scheduling of GitHub upstream calls."""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+import httpx
+
+from mcp_simple_auth.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from mcp_simple_auth.server import ServerSettings
+
+# Lower runs first when upstream concurrency is saturated
+PRIORITY_OAUTH = 0
+PRIORITY_TOOL = 1
+
+# Budget of calls authenticated as the OAuth app rather than a user token
+APP = "app"
+
+RATE_LIMIT_EVENTS = REGISTRY.counter(
+    "mcp_github_rate_limit_events_total",
+    "Upstream calls delayed, rejected or backed off because of GitHub rate limits",
+    ("event",),
+)
+
+
+class RateLimited(Exception):
+    """A GitHub budget is exhausted for longer than a call may wait."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"GitHub rate limit exceeded, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class Budget:
+    """What GitHub last reported about one rate-limit budget."""
+
+    __slots__ = (
+        "backoffs",
+        "blocked_until",
+        "limit",
+        "next_at",
+        "remaining",
+        "reset_at",
+    )
+
+    def __init__(self) -> None:
+        self.limit: int | None = None
+        self.remaining: int | None = None
+        self.reset_at = 0.0
+        self.blocked_until = 0.0  # From Retry-After or secondary limit backoff
+        self.next_at = 0.0  # Earliest start of the next paced call
+        self.backoffs = 0  # Consecutive secondary limit hits
+
+
+class PrioritySemaphore:
+    """Semaphore that wakes waiters by priority, then in arrival order."""
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+
+    def waiting(self) -> dict[int, int]:
+        counts: dict[int, int] = {}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                counts[priority] = counts.get(priority, 0) + 1
+        return counts
+
+    async def acquire(self, priority: int) -> None:
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: pass the slot on
+                self.release()
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+
+class UpstreamScheduler:
+    """Holds GitHub calls back before a rate-limit budget runs out.
+
+    Budgets are tracked per GitHub token and for the OAuth app from the
+    X-RateLimit-* headers of every response. Once a budget is down to the
+    reserve, its remaining calls are spread evenly until the reset; when it
+    is exhausted or GitHub asked to wait (Retry-After, secondary limits with
+    jittered exponential backoff), calls wait. A call that would wait longer
+    than max_wait raises RateLimited instead.
+
+    Upstream concurrency is capped at the HTTP pool size, and queued calls
+    run by priority so OAuth token exchanges go ahead of tool traffic.
+    """
+
+    def __init__(self, settings: "ServerSettings", max_budgets: int = 10000):
+        self.reserve = settings.github_rate_limit_reserve
+        self.max_wait = settings.github_rate_limit_max_wait
+        self.backoff_base = settings.github_backoff_base
+        self.backoff_max = settings.github_backoff_max
+        self.max_budgets = max_budgets
+        self._budgets: OrderedDict[str, Budget] = OrderedDict()
+        self._semaphore = PrioritySemaphore(settings.http_max_connections)
+
+    def _budget(self, key: str) -> Budget:
+        budget = self._budgets.get(key)
+        if budget is None:
+            budget = self._budgets[key] = Budget()
+            if len(self._budgets) > self.max_budgets:
+                self._budgets.popitem(last=False)
+        else:
+            self._budgets.move_to_end(key)
+        return budget
+
+    def delay(self, key: str, now: float | None = None) -> float:
+        """Seconds the next call on a budget has to wait, reserving its slot."""
+        budget = self._budgets.get(key)
+        if budget is None:
+            return 0.0
+        now = time.time() if now is None else now
+        if budget.blocked_until > now:
+            return budget.blocked_until - now
+        if budget.remaining is None or budget.reset_at <= now:
+            return 0.0
+        if budget.remaining <= 0:
+            return budget.reset_at - now
+        if budget.remaining > self.reserve:
+            budget.remaining -= 1
+            return 0.0
+        # Pace the last calls of the window so they last until the reset,
+        # holding none back longer than max_wait
+        start = min(max(now, budget.next_at), now + self.max_wait)
+        budget.next_at = start + (budget.reset_at - now) / budget.remaining
+        budget.remaining -= 1
+        return start - now
+
+    @asynccontextmanager
+    async def slot(self, key: str, priority: int) -> AsyncIterator[None]:
+        """Wait for budget and an upstream slot, then make one call."""
+        delay = self.delay(key)
+        if delay > self.max_wait:
+            RATE_LIMIT_EVENTS.inc("rejected")
+            raise RateLimited(delay)
+        if delay > 0:
+            RATE_LIMIT_EVENTS.inc("delayed")
+            await asyncio.sleep(delay)
+        await self._semaphore.acquire(priority)
+        try:
+            yield
+        finally:
+            self._semaphore.release()
+
+    def update(self, key: str, response: httpx.Response) -> float | None:
+        """Record a response's rate-limit headers.
+
+        Returns the seconds to wait before retrying if the response is a
+        rate-limit error, else None.
+        """
+        headers = response.headers
+        now = time.time()
+        budget = self._budget(key)
+        if "x-ratelimit-remaining" in headers:
+            budget.remaining = int(headers["x-ratelimit-remaining"])
+            budget.limit = int(headers.get("x-ratelimit-limit", budget.limit or 0))
+            budget.reset_at = float(headers.get("x-ratelimit-reset", 0))
+
+        if response.status_code not in (403, 429):
+            budget.backoffs = 0
+            return None
+
+        if "retry-after" in headers:
+            wait = float(headers["retry-after"])
+        elif budget.remaining == 0 and budget.reset_at > now:
+            # Primary limit: delay() already holds calls until the reset
+            RATE_LIMIT_EVENTS.inc("exhausted")
+            return budget.reset_at - now
+        elif response.status_code == 429 or "rate limit" in response.text.lower():
+            # Secondary limit without a hint: back off exponentially
+            wait = min(self.backoff_max, self.backoff_base * 2**budget.backoffs)
+            wait = wait / 2 + random.uniform(0, wait / 2)
+            budget.backoffs += 1
+        else:
+            # A 403 for other reasons, e.g. missing scopes
+            return None
+        RATE_LIMIT_EVENTS.inc("backoff")
+        budget.blocked_until = max(budget.blocked_until, now + wait)
+        return wait
+
+    def stats(self) -> dict[str, float]:
+        now = time.time()
+        app = self._budgets.get(APP)
+        # (remaining, blocked_until) of the user tokens GitHub reported on
+        user_budgets = [
+            (budget.remaining, budget.blocked_until)
+            for key, budget in self._budgets.items()
+            if key != APP and budget.remaining is not None and budget.reset_at > now
+        ]
+        waiting = self._semaphore.waiting()
+        return {
+            "app_remaining": app.remaining if app and app.remaining is not None else -1,
+            "tokens_tracked": len(user_budgets),
+            "tokens_limited": sum(
+                1
+                for remaining, blocked_until in user_budgets
+                if remaining <= self.reserve or blocked_until > now
+            ),
+            "token_min_remaining": min(
+                (remaining for remaining, _ in user_budgets), default=-1
+            ),
+            "queued_oauth": waiting.get(PRIORITY_OAUTH, 0),
+            "queued_tool": waiting.get(PRIORITY_TOOL, 0),
+        }
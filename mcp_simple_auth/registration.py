@@ -0,0 +1,202 @@
+"""Dynamic client registration: a bounded client registry and a throttle.
+
+Anyone may POST to /register, and clients such as claude.ai register again
+on every connection, so neither the clients kept nor the rate of
+registration may be left to them. ClientRegistry holds at most a capacity
+of clients, evicting those that registered but were never used first;
+RegistrationThrottle limits how fast each address may register.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+
+from mcp.shared.auth import OAuthClientInformationFull
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from mcp_simple_auth.metrics import CLIENT_REGISTRATIONS, CLIENTS_EVICTED, Sample
+
+# Share of the registry kept for clients that were used after registering
+PROTECTED_SHARE = 0.8
+
+
+class ClientRegistry(Mapping[str, OAuthClientInformationFull]):
+    """Registered clients, at most capacity of them, as a segmented LRU.
+
+    A new client is put on probation; looking it up moves it to the
+    protected segment, which takes up to PROTECTED_SHARE of the capacity and
+    moves its least recently used clients back to probation past that. When
+    the registry is full, the least recently used client on probation is
+    evicted, so a burst of registrations that are never used only evicts
+    itself. Reads through the Mapping interface do not count as use.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.protected_capacity = int(self.capacity * PROTECTED_SHARE)
+        self._probation: OrderedDict[str, OAuthClientInformationFull] = OrderedDict()
+        self._protected: OrderedDict[str, OAuthClientInformationFull] = OrderedDict()
+
+    def __getitem__(self, client_id: str) -> OAuthClientInformationFull:
+        client = self._protected.get(client_id)
+        return client if client is not None else self._probation[client_id]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._protected
+        yield from self._probation
+
+    def __len__(self) -> int:
+        return len(self._protected) + len(self._probation)
+
+    def use(self, client_id: str) -> OAuthClientInformationFull | None:
+        """Look up a client, marking it as used."""
+        client = self._protected.get(client_id)
+        if client is not None:
+            self._protected.move_to_end(client_id)
+            return client
+        client = self._probation.pop(client_id, None)
+        if client is None:
+            return None
+        self._protected[client_id] = client
+        if len(self._protected) > self.protected_capacity:
+            demoted, demoted_client = self._protected.popitem(last=False)
+            self._probation[demoted] = demoted_client
+        return client
+
+    def add(self, client: OAuthClientInformationFull) -> None:
+        client_id = client.client_id
+        if client_id in self._protected:
+            self._protected[client_id] = client
+            return
+        self._probation[client_id] = client
+        self._probation.move_to_end(client_id)
+        while len(self) > self.capacity:
+            segment = self._probation or self._protected
+            segment.popitem(last=False)
+            CLIENTS_EVICTED.inc(
+                "probation" if segment is self._probation else "protected"
+            )
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "probation": len(self._probation),
+            "protected": len(self._protected),
+            "capacity": self.capacity,
+        }
+
+    async def collect_metrics(self) -> list[tuple[str, str, list[Sample]]]:
+        return [
+            (
+                "mcp_client_registry_clients",
+                "Registered clients kept in memory, by segment, and the capacity",
+                [({"segment": name}, value) for name, value in self.stats().items()],
+            )
+        ]
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RegistrationThrottle:
+    """ASGI middleware limiting client registrations per client address.
+
+    Each address has a bucket of burst registrations, refilled at rate per
+    second; a registration finding it empty is answered 429. Buckets of the
+    least recently seen addresses are dropped past max_addresses, which
+    only forgets how little of a burst they had left.
+
+    The address is the connection's peer, which behind a proxy is the
+    proxy's unless uvicorn was told to trust its X-Forwarded-For. With
+    ip_header, it is the last address in that header instead: the header
+    must be one the proxy in front sets, as anyone else can send it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rate: float,
+        burst: int,
+        path: str = "/register",
+        max_addresses: int = 100_000,
+        ip_header: str = "",
+    ):
+        self.app = app
+        self.rate = rate
+        self.burst = burst
+        self.path = path
+        self.max_addresses = max_addresses
+        self.ip_header = ip_header.lower().encode()
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") != self.path
+        ):
+            await self.app(scope, receive, send)
+            return
+        wait = self._take(self._address(scope))
+        if wait > 0:
+            CLIENT_REGISTRATIONS.inc("throttled")
+            await self._refuse(send, wait)
+            return
+        CLIENT_REGISTRATIONS.inc("allowed")
+        await self.app(scope, receive, send)
+
+    def _address(self, scope: Scope) -> str:
+        """The address to throttle: the last in ip_header, else the peer's."""
+        if self.ip_header:
+            addresses = [
+                value for name, value in scope["headers"] if name == self.ip_header
+            ]
+            if addresses:
+                # A proxy appends the address it saw to any the client sent
+                return addresses[-1].decode("latin-1").rsplit(",", 1)[-1].strip()
+        client = scope.get("client")
+        return client[0] if client else ""
+
+    def _take(self, address: str) -> float:
+        """Take a registration from the address's bucket; else the wait for one."""
+        now = time.monotonic()
+        bucket = self._buckets.get(address)
+        if bucket is None:
+            bucket = self._buckets[address] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.max_addresses:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(address)
+            bucket.tokens = min(
+                self.burst, bucket.tokens + (now - bucket.updated) * self.rate
+            )
+            bucket.updated = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate
+
+    async def _refuse(self, send: Send, wait: float) -> None:
+        body = json.dumps(
+            {
+                "error": "too_many_requests",
+                "error_description": "Too many client registrations; retry later",
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(max(1, round(wait))).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
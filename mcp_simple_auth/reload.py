@@ -0,0 +1,393 @@
+"""Zero-downtime reload: hand the listening socket over to a new process.
+
+On SIGHUP the server starts a copy of itself that inherits the listening
+socket instead of binding it, so the port never closes: connections waiting
+in the backlog are accepted by whichever process gets to them first. Once
+the new process is serving, it reports ready over a pipe and the old one
+stops accepting and drains until its connections are gone or drain_timeout
+passes. Its responses ask clients to reconnect, which lands them on the new
+process.
+
+MCP sessions (SSE streams and stateful streamable-http) live in the process
+that opened them, but a client's next request for one may arrive at the
+other process. The old process also serves on a private Unix socket while
+it drains, and the new one forwards session requests it has no session for
+there; the old one forwards those to the port, where only the new one
+accepts by then. Open sessions keep working until the deadline.
+
+The socket is inherited rather than bound again with SO_REUSEPORT, because
+closing a SO_REUSEPORT listener drops the connections queued on it.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+import uvicorn
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from mcp_simple_auth.cli import LISTEN_FD_ENV
+
+logger = logging.getLogger(__name__)
+
+READY_FD_ENV = "MCP_GITHUB_READY_FD"
+HANDOVER_ENV = "MCP_GITHUB_HANDOVER_PATH"
+PREDECESSOR_ENV = "MCP_GITHUB_PREDECESSOR_SOCKET"
+
+# Seconds the new process gets to start serving before the reload is abandoned
+READY_TIMEOUT = 60.0
+
+HOP_BY_HOP_HEADERS = {b"connection", b"keep-alive", b"transfer-encoding", b"upgrade"}
+# Marks a forwarded request, which is not forwarded again
+FORWARDED_HEADER = b"x-mcp-reload-forwarded"
+# How the transports answer a session ID they don't know: SSE with a 404, and
+# streamable-http with a 400 in this SDK version (the spec says 404)
+UNKNOWN_SESSION_STATUSES = {400, 404}
+
+
+def read_handover() -> dict[str, Any]:
+    """State handed over by the process being replaced, if any."""
+    path = os.environ.pop(HANDOVER_ENV, None)
+    if path is None:
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    finally:
+        os.unlink(path)
+
+
+def write_handover(path: str, state: dict[str, Any]) -> None:
+    """Write the state read_handover() reads in the new process."""
+    with open(path, "w") as f:
+        json.dump(state, f)
+
+
+def notify_ready() -> None:
+    """Tell the process being replaced that this one is serving."""
+    fd = os.environ.pop(READY_FD_ENV, None)
+    if fd is not None:
+        os.write(int(fd), b"1")
+        os.close(int(fd))
+
+
+def predecessor_socket() -> str | None:
+    """Unix socket of the process being replaced, serving while it drains."""
+    return os.environ.pop(PREDECESSOR_ENV, None)
+
+
+def in_session(scope: Scope) -> bool:
+    """Whether a request belongs to an MCP session (SSE or streamable-http)."""
+    if b"session_id=" in scope["query_string"]:
+        return True
+    return any(name == b"mcp-session-id" for name, _ in scope["headers"])
+
+
+def forwarded(scope: Scope) -> bool:
+    return any(name == FORWARDED_HEADER for name, _ in scope["headers"])
+
+
+class ReloadMiddleware:
+    """Moves clients off a draining process, and forwards between the two.
+
+    Once draining, responses get Connection: close, so a client's next
+    request opens a new connection, which the new process accepts; session
+    requests keep their connection, since the session lives here.
+
+    A session request refused here as an unknown session is replayed on the
+    peer: the predecessor (by the path of its Unix socket) in a new process,
+    the successor once draining. Once the peer is gone, the refusal stands
+    and nothing more is forwarded.
+    """
+
+    def __init__(self, app: ASGIApp, predecessor: str | None = None):
+        self.app = app
+        self.draining = False
+        self._peer: httpx.AsyncClient | None = None
+        if predecessor is not None:
+            self._peer = httpx.AsyncClient(
+                base_url="http://predecessor",
+                transport=httpx.AsyncHTTPTransport(uds=predecessor),
+                timeout=None,
+            )
+
+    async def start_draining(self, successor: str) -> None:
+        """Move clients to the successor, now the only one accepting on its URL."""
+        if self._peer is not None:
+            await self._peer.aclose()
+        self._peer = httpx.AsyncClient(base_url=successor, timeout=None)
+        self.draining = True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+        elif not in_session(scope):
+            if self.draining:
+                send = self._closing(send)
+            await self.app(scope, receive, send)
+        elif self._peer is not None and not forwarded(scope):
+            await self._try_here_first(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    @staticmethod
+    def _closing(send: Send) -> Send:
+        async def send_closing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [*message.get("headers", []), (b"connection", b"close")]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        return send_closing
+
+    async def _try_here_first(self, scope: Scope, receive: Receive, send: Send) -> None:
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+        replayed = False
+
+        async def replay() -> Message:
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        refused: list[Message] = []
+
+        async def send_unless_refused(message: Message) -> None:
+            if refused or (
+                message["type"] == "http.response.start"
+                and message["status"] in UNKNOWN_SESSION_STATUSES
+            ):
+                refused.append(message)
+            else:
+                await send(message)
+
+        await self.app(scope, replay, send_unless_refused)
+        if not refused or await self._forward(scope, body, send):
+            return
+        for message in refused:
+            await send(message)
+
+    async def _forward(self, scope: Scope, body: bytes, send: Send) -> bool:
+        """Replay a request on the peer; False if it is gone."""
+        client = self._peer
+        if client is None:
+            return False
+        url = scope["path"]
+        if scope["query_string"]:
+            url += "?" + scope["query_string"].decode("latin-1")
+        headers = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in HOP_BY_HOP_HEADERS
+        ]
+        headers.append((FORWARDED_HEADER, b"1"))
+        request = client.build_request(
+            scope["method"], url, headers=headers, content=body
+        )
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.TransportError:
+            logger.info("Reload peer process is gone; no longer forwarding to it")
+            if self._peer is client:
+                self._peer = None
+            await client.aclose()
+            return False
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [
+                        (name, value)
+                        for name, value in response.headers.raw
+                        if name.lower() not in HOP_BY_HOP_HEADERS
+                    ],
+                }
+            )
+            async for chunk in response.aiter_raw():
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+        except httpx.TransportError:
+            pass  # The replaced process reached its drain deadline
+        finally:
+            await response.aclose()
+        await send({"type": "http.response.body", "body": b""})
+        return True
+
+
+class Reloader:
+    """Replaces the serving process with a fresh one on SIGHUP.
+
+    handover returns JSON-serializable state for the new process to pick up
+    with read_handover(). If the new process exits or is not serving within
+    READY_TIMEOUT, this one keeps serving.
+    """
+
+    def __init__(
+        self,
+        server: uvicorn.Server,
+        sock: socket.socket,
+        middleware: ReloadMiddleware,
+        drain_timeout: float,
+        handover: Callable[[], dict[str, Any]],
+    ):
+        self.server = server
+        self.sock = sock
+        self.middleware = middleware
+        self.drain_timeout = drain_timeout
+        self.handover = handover
+        self._task: asyncio.Task[None] | None = None
+
+    def install(self) -> None:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload)
+
+    def reload(self) -> None:
+        if self._task is not None:
+            logger.info("Reload already in progress")
+            return
+        logger.info("Reloading: starting a new server process")
+        self._task = asyncio.create_task(self._reload())
+
+    async def _reload(self) -> None:
+        # Private to this user: holds the handover state and session socket
+        directory = tempfile.mkdtemp(prefix="mcp-simple-auth-")
+        unix_server = None
+        try:
+            unix_server = await self._serve_unix(os.path.join(directory, "sock"))
+            ready = await self._spawn(directory)
+            if ready:
+                await self.drain()
+        except Exception:
+            logger.exception("Reload failed; still serving")
+            ready = False
+        finally:
+            if unix_server is not None:
+                for listener in unix_server.servers:
+                    listener.close()
+            shutil.rmtree(directory, ignore_errors=True)
+        if ready:
+            self.server.should_exit = True
+        else:
+            self._task = None
+
+    async def _serve_unix(self, path: str) -> uvicorn.Server:
+        """Serve the app on a Unix socket too, with a second uvicorn server.
+
+        It shares this server's connection tracking, so drain() waits for its
+        connections too and this server's shutdown closes them with the rest.
+        """
+        config = uvicorn.Config(
+            self.server.config.app,
+            uds=path,
+            lifespan="off",
+            log_config=None,
+            access_log=False,
+        )
+        config.load()
+        server = uvicorn.Server(config)
+        server.server_state = self.server.server_state
+        server.lifespan = config.lifespan_class(config)  # As Server.serve() does
+        await server.startup()
+        return server
+
+    async def _spawn(self, directory: str) -> bool:
+        """Start the new process and wait until it is serving."""
+        handover_path = os.path.join(directory, "handover.json")
+        await asyncio.to_thread(write_handover, handover_path, self.handover())
+        read_fd, write_fd = os.pipe()
+        try:
+            env = {
+                **os.environ,
+                LISTEN_FD_ENV: str(self.sock.fileno()),
+                READY_FD_ENV: str(write_fd),
+                HANDOVER_ENV: handover_path,
+                PREDECESSOR_ENV: os.path.join(directory, "sock"),
+            }
+            # fork() and exec() block, for longer the larger this process is
+            process = await asyncio.to_thread(
+                subprocess.Popen,
+                [sys.executable, *sys.orig_argv[1:]],
+                env=env,
+                pass_fds=(self.sock.fileno(), write_fd),
+            )
+            os.close(write_fd)
+            write_fd = -1
+            ready = await self._wait_ready(read_fd)
+        finally:
+            os.close(read_fd)
+            if write_fd != -1:
+                os.close(write_fd)
+        if ready:
+            logger.info(f"New server process {process.pid} is serving; draining")
+            return True
+
+        if process.poll() is None:
+            logger.error(f"New server process not ready in {READY_TIMEOUT}s")
+            process.kill()
+        else:
+            logger.error(f"New server process exited with {process.returncode}")
+        await asyncio.to_thread(process.wait)
+        return False
+
+    def _successor_url(self) -> str:
+        """Where the new process accepts, once this one no longer does."""
+        host, port = self.sock.getsockname()[:2]
+        if self.sock.family == socket.AF_INET6:
+            host = "::1" if host == "::" else host
+            return f"http://[{host}]:{port}"
+        host = "127.0.0.1" if host == "0.0.0.0" else host
+        return f"http://{host}:{port}"
+
+    async def _wait_ready(self, read_fd: int) -> bool:
+        """Wait for the ready byte; end of file means the new process died."""
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        loop.add_reader(read_fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            await asyncio.wait_for(readable, READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(read_fd)
+        return os.read(read_fd, 1) == b"1"
+
+    async def drain(self) -> None:
+        """Stop accepting and wait for connections to go, up to the deadline.
+
+        Connections still open at the deadline are closed by uvicorn's own
+        shutdown, which then cancels what is still running right away.
+        """
+        deadline = time.monotonic() + self.drain_timeout
+        successor = self._successor_url()  # Closing the servers closes the socket
+        for server in self.server.servers:
+            server.close()
+        await self.middleware.start_draining(successor)
+        connections = self.server.server_state.connections
+        while connections and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        logger.info(f"Drained with {len(connections)} connection(s) left")
+        self.server.config.timeout_graceful_shutdown = max(
+            0, math.ceil(deadline - time.monotonic())
+        )
@@ -1,34 +1,89 @@
 """Simple MCP Server with GitHub OAuth Authentication."""
 
-import asyncio
+import json
 import logging
+import re
 import secrets
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import Any, Literal
+from urllib.parse import urlencode
 
-import click
-from pydantic import AnyHttpUrl
-from pydantic_settings import BaseSettings, SettingsConfigDict
-from starlette.exceptions import HTTPException
-from starlette.requests import Request
-from starlette.responses import JSONResponse, RedirectResponse, Response
-
-from mcp.server.auth.middleware.auth_context import get_access_token
+from mcp.server.auth.middleware.auth_context import (
+    AuthContextMiddleware,
+    get_access_token,
+)
+from mcp.server.auth.middleware.bearer_auth import (
+    BearerAuthBackend,
+    RequireAuthMiddleware,
+)
 from mcp.server.auth.provider import (
     AccessToken,
     AuthorizationCode,
     AuthorizationParams,
     OAuthAuthorizationServerProvider,
     RefreshToken,
+    TokenError,
     construct_redirect_uri,
 )
-from mcp.server.auth.settings import AuthSettings, ClientRegistrationOptions
-from mcp.server.fastmcp.server import FastMCP
-from mcp.shared._httpx_utils import create_mcp_http_client
+from mcp.server.auth.routes import build_metadata, create_auth_routes
+from mcp.server.auth.settings import (
+    AuthSettings,
+    ClientRegistrationOptions,
+    RevocationOptions,
+)
+from mcp.server.fastmcp.server import Context, FastMCP
 from mcp.shared.auth import OAuthClientInformationFull, OAuthToken
+from pydantic import AnyHttpUrl
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.middleware.authentication import AuthenticationMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.routing import Mount, Route
+
+from mcp_simple_auth.admin import admin_routes, require_token
+from mcp_simple_auth.cli import main  # noqa: F401 - kept importable from here
+from mcp_simple_auth.discovery import StaticDocument, StaticDocumentMiddleware
+from mcp_simple_auth.event_store import ResumableEventStore, ResumableSessionManager
+from mcp_simple_auth.github import GitHubClient
+from mcp_simple_auth.graphql import SECTIONS, page, page_variables, viewer_query
+from mcp_simple_auth.introspection import (
+    IntrospectionVerifier,
+    TokenVerifier,
+    introspection_endpoint,
+)
+from mcp_simple_auth.logs import AccessLogMiddleware, LogWriter, configure_logging
+from mcp_simple_auth.metrics import (
+    CONTENT_TYPE,
+    REGISTRY,
+    MetricsMiddleware,
+    Sample,
+    timed_tool,
+)
+from mcp_simple_auth.pagination import (
+    MAX_CHUNK_ITEMS,
+    MAX_PER_PAGE,
+    Page,
+    collect_chunk,
+    decode_cursor,
+    encode_cursor,
+    realign_page,
+)
+from mcp_simple_auth.rate_limit import RateLimited
+from mcp_simple_auth.registration import RegistrationThrottle
+from mcp_simple_auth.signed_tokens import Denylist, TokenSigner, parse_keys, token_id
+from mcp_simple_auth.sse import SseSessionManager
+from mcp_simple_auth.storage import MemoryStorage, create_storage
 
 logger = logging.getLogger(__name__)
 
+METADATA_PATH = "/.well-known/oauth-authorization-server"
+
+REPO_RE = re.compile(r"^[\w-]+/(?!\.\.?$)[\w.-]+$")
+
 
 class ServerSettings(BaseSettings):
     """Settings for the simple GitHub MCP server."""
@@ -44,15 +99,132 @@ class ServerSettings(BaseSettings):
     github_client_id: str  # Type: MCP_GITHUB_GITHUB_CLIENT_ID env var
     github_client_secret: str  # Type: MCP_GITHUB_GITHUB_CLIENT_SECRET env var
     github_callback_path: str = "https://mcp.evolutio.io/github/callback"
-    
 
     # GitHub OAuth URLs
     github_auth_url: str = "https://github.com/login/oauth/authorize"
     github_token_url: str = "https://github.com/login/oauth/access_token"
+    github_api_url: str = "https://api.github.com"
+
+    # Pooled HTTP client for GitHub upstream calls
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
+    http2: bool = False  # Needs the http2 extra (h2)
+    github_cache_size: int = 1024  # Cached GitHub API responses, 0 disables
 
     mcp_scope: str = "claudeai"
     github_scope: str = "read:user"
 
+    # MCP token lifetimes in seconds
+    access_token_ttl: int = 3600
+    refresh_token_ttl: int = 30 * 24 * 3600
+
+    # "signed" access tokens are verified without a storage lookup (needs the
+    # signed-tokens extra); keys are "kid:secret,...", the first one signing
+    access_token_format: Literal["opaque", "signed"] = "opaque"
+    token_signing_algorithm: Literal["HS256", "EdDSA"] = "HS256"
+    token_signing_keys: str = ""
+
+    # Serving
+    transport: Literal["sse", "streamable-http"] = "sse"
+    # New streamable-http transport per request, so any worker can serve it
+    stateless_http: bool = False
+
+    # OAuth state storage
+    storage: Literal["memory", "sqlite", "redis"] = "memory"
+    sqlite_path: str = "mcp_simple_auth.db"
+    sqlite_read_connections: int = 4
+    redis_url: str = "redis://localhost:6379/0"
+    redis_max_connections: int = 50
+    redis_key_prefix: str = "mcp_simple_auth:"
+
+    # Dynamic client registration: memory storage keeps at most max_clients,
+    # evicting unused ones first; each address may register a burst of
+    # clients, then client_registration_rate per second (0 disables the limit).
+    # The address is the peer's, or the last one in client_registration_ip_header,
+    # which must be a header the proxy in front sets.
+    max_clients: int = 10000
+    client_registration_rate: float = 1.0
+    client_registration_burst: int = 20
+    client_registration_ip_header: str = ""
+
+    # Expiry of abandoned OAuth state
+    state_ttl: int = 600  # Seconds an authorize flow may wait for its callback
+    expiry_sweep_interval: float = 30.0
+
+    # GitHub rate limits: a budget's last calls are paced once this few remain,
+    # calls wait up to max_wait for budget, and rate-limited calls are retried
+    github_rate_limit_reserve: int = 50
+    github_rate_limit_max_wait: float = 10.0
+    github_max_retries: int = 2
+    github_backoff_base: float = 1.0  # Secondary limit backoff, doubled per hit
+    github_backoff_max: float = 60.0
+
+    # Pages of a REST listing a streaming list tool requests ahead
+    github_prefetch_pages: int = 4
+
+    # Prometheus metrics at /metrics, for requests bearing metrics_token if
+    # it is set
+    metrics: bool = True
+    metrics_token: str = ""
+
+    # Cache lifetime of the discovery and OAuth metadata documents
+    discovery_max_age: int = 3600
+
+    # Seconds a replaced process keeps serving open connections after a reload
+    drain_timeout: float = 30.0
+
+    # SSE sessions: heartbeat comments every interval; sessions are reaped when
+    # the client posts nothing within handshake_timeout of opening or for
+    # idle_timeout after that, or takes no write for send_timeout; the MCP
+    # server waits once max_queued_messages are queued for a client
+    sse_heartbeat_interval: float = 15.0
+    sse_handshake_timeout: float = 30.0
+    sse_idle_timeout: float = 3600.0
+    sse_send_timeout: float = 30.0
+    sse_max_queued_messages: int = 64
+
+    # Logging: JSON lines (or "text") written from a background thread to
+    # log_file, rotated at log_max_bytes, or to stderr; records past
+    # log_queue_size waiting to be written are dropped
+    log_format: Literal["json", "text"] = "json"
+    log_level: str = "INFO"
+    log_file: str = ""
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    log_queue_size: int = 10000
+    # One line per request; requests answered below 400 at the sample rate
+    access_log: bool = True
+    access_log_sample_rate: float = 1.0
+
+    # Stateful streamable-http sessions: the last events of each are kept for
+    # clients resuming with Last-Event-ID (0 events disables), and appended to
+    # event_store_path, if set, so sessions survive a restart
+    event_store_max_events: int = 256
+    event_store_max_bytes: int = 1024 * 1024
+    event_store_max_sessions: int = 1000
+    event_store_path: str = ""
+
+    # Admin introspection under /admin/, for requests bearing this token;
+    # disabled when empty
+    admin_token: str = ""
+
+    # Token introspection (RFC 7662) at /introspect, for resource servers
+    # bearing this secret; disabled when empty
+    introspection_secret: str = ""
+
+    # Deployment role: "all" serves OAuth and MCP together. An "auth" server
+    # serves only OAuth, and "resource" servers only MCP, verifying tokens
+    # with the /introspect of the auth server at auth_server_url (which needs
+    # introspection_secret) and caching its answers for a while per token
+    role: Literal["all", "auth", "resource"] = "all"
+    auth_server_url: AnyHttpUrl | None = None
+    introspection_cache_ttl: float = 30.0
+    introspection_negative_cache_ttl: float = 5.0
+    introspection_cache_size: int = 10000
+
     def __init__(self, **data):
         """Initialize settings with values from environment variables.
 
@@ -62,23 +234,29 @@ class ServerSettings(BaseSettings):
         """
         super().__init__(**data)
 
+    @property
+    def issuer_url(self) -> AnyHttpUrl:
+        """URL of the authorization server: this one, unless split off."""
+        return self.auth_server_url or self.server_url
+
 
 class SimpleGitHubOAuthProvider(OAuthAuthorizationServerProvider):
     """Simple GitHub OAuth provider with essential functionality."""
 
     def __init__(self, settings: ServerSettings):
         self.settings = settings
-        self.clients: dict[str, OAuthClientInformationFull] = {}
-        self.auth_codes: dict[str, AuthorizationCode] = {}
-        self.tokens: dict[str, AccessToken] = {}
-        self.state_mapping: dict[str, dict[str, str]] = {}
-        # Store GitHub tokens with MCP tokens using the format:
-        # {"mcp_token": "github_token"}
-        self.token_mapping: dict[str, str] = {}
-        
+        self.store = create_storage(settings)
+        self.github = GitHubClient(settings)
+        self.signer: TokenSigner | None = None
+        if settings.access_token_format == "signed":
+            self.signer = self._create_signer()
+        # Revoked signed access tokens, until they expire
+        self.denylist = Denylist()
+
         # Pre-register the cached client ID from Claude.ai
         from mcp.shared.auth import OAuthClientInformationFull
         from pydantic import AnyUrl
+
         cached_client = OAuthClientInformationFull(
             client_id="91be729f-30be-4614-b93f-f2b4a7ec8a98",
             redirect_uris=[AnyUrl("https://claude.ai/api/mcp/auth_callback")],
@@ -86,17 +264,31 @@ class SimpleGitHubOAuthProvider(OAuthAuthorizationServerProvider):
             response_types=["code"],
             token_endpoint_auth_method="none",
             scope="claudeai",
-            client_name="claudeai"
+            client_name="claudeai",
         )
-        self.clients[cached_client.client_id] = cached_client
+        # Kept outside the store so it exists whatever the storage backend
+        self.static_clients = {cached_client.client_id: cached_client}
+
+    def _create_signer(self) -> TokenSigner:
+        keys = parse_keys(self.settings.token_signing_keys)
+        if not keys:
+            logger.warning(
+                "MCP_GITHUB_TOKEN_SIGNING_KEYS is not set: signing with a random "
+                "key, so tokens won't survive a restart or verify in other processes"
+            )
+            keys = [("ephemeral", secrets.token_bytes(32))]
+        return TokenSigner(keys, self.settings.token_signing_algorithm)
 
     async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
         """Get OAuth client information."""
-        return self.clients.get(client_id)
+        static_client = self.static_clients.get(client_id)
+        if static_client is not None:
+            return static_client
+        return await self.store.get_client(client_id)
 
     async def register_client(self, client_info: OAuthClientInformationFull):
         """Register a new OAuth client."""
-        self.clients[client_info.client_id] = client_info
+        await self.store.add_client(client_info)
 
     async def authorize(
         self, client: OAuthClientInformationFull, params: AuthorizationParams
@@ -105,14 +297,18 @@ class SimpleGitHubOAuthProvider(OAuthAuthorizationServerProvider):
         state = params.state or secrets.token_hex(16)
 
         # Store the state mapping
-        self.state_mapping[state] = {
-            "redirect_uri": str(params.redirect_uri),
-            "code_challenge": params.code_challenge,
-            "redirect_uri_provided_explicitly": str(
-                params.redirect_uri_provided_explicitly
-            ),
-            "client_id": client.client_id,
-        }
+        await self.store.add_state(
+            state,
+            {
+                "redirect_uri": str(params.redirect_uri),
+                "code_challenge": params.code_challenge,
+                "redirect_uri_provided_explicitly": str(
+                    params.redirect_uri_provided_explicitly
+                ),
+                "client_id": client.client_id,
+            },
+            expires_at=time.time() + self.settings.state_ttl,
+        )
 
         # Build GitHub authorization URL
         auth_url = (
@@ -127,7 +323,7 @@ class SimpleGitHubOAuthProvider(OAuthAuthorizationServerProvider):
 
     async def handle_github_callback(self, code: str, state: str) -> str:
         """Handle GitHub OAuth callback."""
-        state_data = self.state_mapping.get(state)
+        state_data = await self.store.get_state(state)
         if not state_data:
             raise HTTPException(400, "Invalid state parameter")
 
@@ -139,120 +335,173 @@ class SimpleGitHubOAuthProvider(OAuthAuthorizationServerProvider):
         client_id = state_data["client_id"]
 
         # Exchange code for token with GitHub
-        async with create_mcp_http_client() as client:
-            response = await client.post(
-                self.settings.github_token_url,
-                data={
-                    "client_id": self.settings.github_client_id,
-                    "client_secret": self.settings.github_client_secret,
-                    "code": code,
-                    "redirect_uri": self.settings.github_callback_path,
-                },
-                headers={"Accept": "application/json"},
-            )
+        response = await self.github.exchange_code(code)
 
-            if response.status_code != 200:
-                raise HTTPException(400, "Failed to exchange code for token")
+        if response.status_code != 200:
+            raise HTTPException(400, "Failed to exchange code for token")
 
-            data = response.json()
+        data = response.json()
 
-            if "error" in data:
-                raise HTTPException(400, data.get("error_description", data["error"]))
+        if "error" in data:
+            raise HTTPException(400, data.get("error_description", data["error"]))
 
-            github_token = data["access_token"]
+        github_token = data["access_token"]
 
-            # Create MCP authorization code
-            new_code = f"mcp_{secrets.token_hex(16)}"
-            auth_code = AuthorizationCode(
-                code=new_code,
-                client_id=client_id,
-                redirect_uri=AnyHttpUrl(redirect_uri),
-                redirect_uri_provided_explicitly=redirect_uri_provided_explicitly,
-                expires_at=time.time() + 300,
-                scopes=[self.settings.mcp_scope],
-                code_challenge=code_challenge,
-            )
-            self.auth_codes[new_code] = auth_code
+        # Create MCP authorization code
+        new_code = f"mcp_{secrets.token_hex(16)}"
+        auth_code = AuthorizationCode(
+            code=new_code,
+            client_id=client_id,
+            redirect_uri=AnyHttpUrl(redirect_uri),
+            redirect_uri_provided_explicitly=redirect_uri_provided_explicitly,
+            expires_at=time.time() + 300,
+            scopes=[self.settings.mcp_scope],
+            code_challenge=code_challenge,
+        )
 
-            # Store GitHub token - we'll map the MCP token to this later
-            self.tokens[github_token] = AccessToken(
+        # Link the GitHub token to the code - the MCP token is mapped to it
+        # when the code is exchanged
+        await self.store.add_pending_authorization(
+            auth_code,
+            AccessToken(
                 token=github_token,
                 client_id=client_id,
                 scopes=[self.settings.github_scope],
                 expires_at=None,
-            )
+            ),
+        )
 
-        del self.state_mapping[state]
+        await self.store.remove_state(state)
         return construct_redirect_uri(redirect_uri, code=new_code, state=state)
 
     async def load_authorization_code(
         self, client: OAuthClientInformationFull, authorization_code: str
     ) -> AuthorizationCode | None:
         """Load an authorization code."""
-        return self.auth_codes.get(authorization_code)
+        return await self.store.get_auth_code(authorization_code)
 
     async def exchange_authorization_code(
         self, client: OAuthClientInformationFull, authorization_code: AuthorizationCode
     ) -> OAuthToken:
-        """Exchange authorization code for tokens."""
-        if authorization_code.code not in self.auth_codes:
-            raise ValueError("Invalid authorization code")
-
-        # Generate MCP access token
-        mcp_token = f"mcp_{secrets.token_hex(32)}"
-
-        # Store MCP token
-        self.tokens[mcp_token] = AccessToken(
-            token=mcp_token,
-            client_id=client.client_id,
-            scopes=authorization_code.scopes,
-            expires_at=int(time.time()) + 3600,
-        )
+        """Exchange authorization code for tokens.
 
-        # Find GitHub token for this client
-        github_token = next(
-            (
-                token
-                for token, data in self.tokens.items()
-                # see https://github.blog/engineering/platform-security/behind-githubs-new-authentication-token-formats/
-                # which you get depends on your GH app setup.
-                if (token.startswith("ghu_") or token.startswith("gho_"))
-                and data.client_id == client.client_id
-            ),
-            None,
-        )
+        Redeeming the code is atomic in storage, so of concurrent exchanges
+        of one code only the first gets tokens.
+        """
+        # Store MCP tokens, mapped to the GitHub token linked to the code
+        try:
+            return await self._issue_tokens(
+                client.client_id,
+                authorization_code.scopes,
+                lambda access_token, refresh_token: self.store.redeem_auth_code(
+                    authorization_code.code, access_token, refresh_token
+                ),
+            )
+        except LookupError:
+            raise TokenError(
+                "invalid_grant", "authorization code does not exist"
+            ) from None
 
-        # Store mapping between MCP token and GitHub token
-        if github_token:
-            self.token_mapping[mcp_token] = github_token
+    async def _issue_tokens(
+        self,
+        client_id: str,
+        scopes: list[str],
+        store: Callable[[AccessToken | None, RefreshToken], Awaitable[str | None]],
+    ) -> OAuthToken:
+        """Issue a new MCP access and refresh token pair.
 
-        del self.auth_codes[authorization_code.code]
+        store saves the tokens and returns the GitHub token backing them. A
+        signed access token is not stored but carries that GitHub token, so
+        it is signed once store has returned.
+        """
+        now = int(time.time())
+        refresh_token = RefreshToken(
+            token=f"mcp_rt_{secrets.token_hex(32)}",
+            client_id=client_id,
+            scopes=scopes,
+            expires_at=now + self.settings.refresh_token_ttl,
+        )
+        expires_at = now + self.settings.access_token_ttl
+
+        if self.signer is None:
+            access_token = f"mcp_{secrets.token_hex(32)}"
+            await store(
+                AccessToken(
+                    token=access_token,
+                    client_id=client_id,
+                    scopes=scopes,
+                    expires_at=expires_at,
+                ),
+                refresh_token,
+            )
+        else:
+            github_token = await store(None, refresh_token)
+            access_token = self.signer.issue(
+                token_id(refresh_token.token),
+                client_id,
+                scopes,
+                expires_at,
+                github_token,
+            )
 
         return OAuthToken(
-            access_token=mcp_token,
+            access_token=access_token,
             token_type="bearer",
-            expires_in=3600,
-            scope=" ".join(authorization_code.scopes),
+            expires_in=self.settings.access_token_ttl,
+            scope=" ".join(scopes),
+            refresh_token=refresh_token.token,
         )
 
+    @staticmethod
+    def _is_signed(token: str) -> bool:
+        # Opaque tokens, including those issued before signing was turned on,
+        # keep being looked up in the store
+        return not token.startswith("mcp_")
+
     async def load_access_token(self, token: str) -> AccessToken | None:
         """Load and validate an access token."""
-        access_token = self.tokens.get(token)
+        signer = self.signer
+        if signer is not None and self._is_signed(token):
+            claims = signer.verify(token)
+            if claims is None or claims.jti in self.denylist:
+                return None
+            # Signed by us, so already valid
+            return AccessToken.model_construct(
+                token=token,
+                client_id=claims.client_id,
+                scopes=claims.scopes,
+                expires_at=claims.expires_at,
+            )
+
+        access_token = await self.store.get_access_token(token)
         if not access_token:
             return None
 
         # Check if expired
         if access_token.expires_at and access_token.expires_at < time.time():
-            del self.tokens[token]
+            await self.store.remove_access_token(token)
             return None
 
         return access_token
 
+    async def get_github_token(self, token: str) -> str | None:
+        """Return the GitHub token backing a valid MCP access token."""
+        signer = self.signer
+        if signer is not None and self._is_signed(token):
+            claims = signer.verify(token)
+            if claims is None or claims.jti in self.denylist:
+                return None
+            return signer.github_token(claims)
+        return await self.store.get_github_token(token)
+
     async def load_refresh_token(
         self, client: OAuthClientInformationFull, refresh_token: str
     ) -> RefreshToken | None:
-        """Load a refresh token - not supported."""
-        return None
+        """Load a refresh token issued to the client."""
+        token = await self.store.get_refresh_token(refresh_token)
+        if token is None or token.client_id != client.client_id:
+            return None
+        return token
 
     async def exchange_refresh_token(
         self,
@@ -260,60 +509,101 @@ class SimpleGitHubOAuthProvider(OAuthAuthorizationServerProvider):
         refresh_token: RefreshToken,
         scopes: list[str],
     ) -> OAuthToken:
-        """Exchange refresh token"""
-        raise NotImplementedError("Not supported")
+        """Exchange a refresh token for new tokens, rotating the refresh token.
 
-    async def revoke_token(
-        self, token: str, token_type_hint: str | None = None
-    ) -> None:
-        """Revoke a token."""
-        if token in self.tokens:
-            del self.tokens[token]
+        The new tokens map to the same GitHub token, so no GitHub call is made.
+        """
+        try:
+            return await self._issue_tokens(
+                client.client_id,
+                scopes,
+                lambda access_token, new_token: self.store.rotate_refresh_token(
+                    refresh_token.token, access_token, new_token
+                ),
+            )
+        except LookupError:
+            raise TokenError("invalid_grant", "refresh token does not exist") from None
+
+    async def revoke_token(self, token: AccessToken | RefreshToken | str) -> None:
+        """Revoke a token, along with the token issued together with it."""
+        if isinstance(token, str):
+            await self.store.revoke(token)
+            return
+
+        signer = self.signer
+        if signer is not None and self._is_signed(token.token):
+            # Only the access token is revoked, which RFC 7009 allows
+            claims = signer.verify(token.token)
+            if claims is not None:
+                self.denylist.add(claims.jti, claims.expires_at)
+            return
+        if signer is not None and isinstance(token, RefreshToken):
+            # Deny the signed access token issued with it
+            self.denylist.add(
+                token_id(token.token), time.time() + self.settings.access_token_ttl
+            )
+        await self.store.revoke(token.token)
 
+    def handover_state(self) -> dict[str, Any]:
+        """Per-process state to hand to the process replacing this one.
 
-def create_simple_mcp_server(settings: ServerSettings) -> FastMCP:
-    """Create a simple FastMCP server with GitHub OAuth."""
-    oauth_provider = SimpleGitHubOAuthProvider(settings)
+        Everything else lives in the store; only the denylist is kept in memory.
+        """
+        return {"denylist": self.denylist.entries()}
 
-    auth_settings = AuthSettings(
-        issuer_url=settings.server_url,
+    def restore_state(self, state: dict[str, Any]) -> None:
+        """Take over state from handover_state() of a replaced process."""
+        self.denylist.update(state.get("denylist", {}))
+
+
+def create_auth_settings(settings: ServerSettings) -> AuthSettings:
+    return AuthSettings(
+        issuer_url=settings.issuer_url,
         client_registration_options=ClientRegistrationOptions(
             enabled=True,
             valid_scopes=[settings.mcp_scope],
             default_scopes=[settings.mcp_scope],
         ),
+        revocation_options=RevocationOptions(enabled=True),
         required_scopes=[],  # Allow unauthenticated discovery
     )
 
-    app = FastMCP(
-        name="Simple GitHub MCP Server",
-        instructions="A simple MCP server with GitHub OAuth authentication",
-        auth_server_provider=oauth_provider,
-        host=settings.host,
-        port=settings.port,
-        debug=True,
-        auth=auth_settings,
-        cors=True,  # Enable CORS for remote access
+
+def create_metadata_document(settings: ServerSettings) -> StaticDocument:
+    """The OAuth authorization server metadata, as the MCP SDK would build it."""
+    auth_settings = create_auth_settings(settings)
+    metadata = build_metadata(
+        auth_settings.issuer_url,
+        auth_settings.service_documentation_url,
+        auth_settings.client_registration_options or ClientRegistrationOptions(),
+        auth_settings.revocation_options or RevocationOptions(),
     )
-    
-    @app.custom_route("/", methods=["GET"])
-    async def root_endpoint(request: Request) -> Response:
-        """Root endpoint for MCP discovery."""
-        return JSONResponse({
-            "mcp": {
-                "version": "1.0"
-            },
-            "capabilities": {
-                "tools": {}
+    return StaticDocument(
+        metadata.model_dump_json(exclude_none=True).encode(),
+        settings.discovery_max_age,
+        # What the SDK's CORS wrapper adds for cross-origin GETs
+        {"Access-Control-Allow-Origin": "*"},
+    )
+
+
+def create_root_document(settings: ServerSettings) -> StaticDocument:
+    """The document served at / for MCP discovery."""
+    return StaticDocument(
+        json.dumps(
+            {
+                "mcp": {"version": "1.0"},
+                "capabilities": {"tools": {}},
+                "transport": {"type": "sse", "endpoint": "/sse"},
             },
-            "transport": {
-                "type": "sse",
-                "endpoint": "/sse"
-            }
-        })
+            separators=(",", ":"),
+        ).encode(),
+        settings.discovery_max_age,
+    )
 
 
-    @app.custom_route("/github/callback", methods=["GET"])
+def github_callback_endpoint(
+    oauth_provider: SimpleGitHubOAuthProvider,
+) -> Callable[[Request], Awaitable[Response]]:
     async def github_callback_handler(request: Request) -> Response:
         """Handle GitHub OAuth callback."""
         code = request.query_params.get("code")
@@ -327,6 +617,15 @@ def create_simple_mcp_server(settings: ServerSettings) -> FastMCP:
             return RedirectResponse(status_code=302, url=redirect_uri)
         except HTTPException:
             raise
+        except RateLimited as e:
+            return JSONResponse(
+                status_code=503,
+                headers={"Retry-After": str(int(e.retry_after) + 1)},
+                content={
+                    "error": "temporarily_unavailable",
+                    "error_description": str(e),
+                },
+            )
         except Exception as e:
             logger.error("Unexpected error", exc_info=e)
             return JSONResponse(
@@ -337,81 +636,689 @@ def create_simple_mcp_server(settings: ServerSettings) -> FastMCP:
                 },
             )
 
-    def get_github_token() -> str:
+    return github_callback_handler
+
+
+def auth_server_routes(
+    settings: ServerSettings, oauth_provider: SimpleGitHubOAuthProvider
+) -> list[Route]:
+    """Routes of the authorization server besides the SDK's OAuth endpoints."""
+    routes = [
+        Route(
+            "/github/callback",
+            github_callback_endpoint(oauth_provider),
+            methods=["GET"],
+        )
+    ]
+    if settings.introspection_secret:
+        routes.append(
+            Route(
+                "/introspect",
+                require_token(
+                    settings.introspection_secret,
+                    introspection_endpoint(oauth_provider),
+                    realm="introspection",
+                ),
+                methods=["POST"],
+            )
+        )
+    return routes
+
+
+def metrics_endpoint(
+    settings: ServerSettings,
+) -> Callable[[Request], Awaitable[Response]]:
+    async def metrics(request: Request) -> Response:
+        """Prometheus metrics of this process."""
+        return Response(await REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    if settings.metrics_token:
+        return require_token(settings.metrics_token, metrics, realm="metrics")
+    return metrics
+
+
+def register_github_metrics(github: GitHubClient) -> None:
+    async def collect_github_metrics() -> list[tuple[str, str, list[Sample]]]:
+        pool = github.pool_stats()
+        cache = github.cache.stats()
+        rate_limits = github.scheduler.stats()
+        return [
+            (
+                "mcp_github_pool_connections",
+                "Connections in the GitHub HTTP pool",
+                [
+                    ({"state": "active"}, pool["active"]),
+                    ({"state": "idle"}, pool["connections"] - pool["active"]),
+                    ({"state": "max"}, pool["max_connections"]),
+                ],
+            ),
+            (
+                "mcp_github_cache",
+                "GitHub response cache entries and outcomes",
+                [({"stat": stat}, value) for stat, value in cache.items()],
+            ),
+            (
+                "mcp_github_rate_limit",
+                "GitHub rate-limit budgets (-1 until GitHub reports one) "
+                "and upstream calls queued by priority",
+                [({"stat": stat}, value) for stat, value in rate_limits.items()],
+            ),
+        ]
+
+    REGISTRY.set_collector("github", collect_github_metrics)
+
+
+def register_provider_metrics(oauth_provider: SimpleGitHubOAuthProvider) -> None:
+    store = oauth_provider.store
+
+    async def collect_provider_metrics() -> list[tuple[str, str, list[Sample]]]:
+        metrics: list[tuple[str, str, list[Sample]]] = [
+            (
+                "mcp_revoked_signed_tokens",
+                "Signed access tokens in the revocation denylist",
+                [({}, len(oauth_provider.denylist))],
+            ),
+        ]
+        # Counting a shared backend scans all it stores, too much for every
+        # scrape; its sizes are on /admin/status instead
+        if isinstance(store, MemoryStorage):
+            metrics.append(
+                (
+                    "mcp_storage_entries",
+                    "Stored OAuth entries by kind",
+                    [({"kind": kind}, n) for kind, n in (await store.stats()).items()],
+                )
+            )
+        return metrics
+
+    REGISTRY.set_collector("provider", collect_provider_metrics)
+    register_github_metrics(oauth_provider.github)
+    if isinstance(store, MemoryStorage):
+        REGISTRY.set_collector("clients", store.store.clients.collect_metrics)
+
+
+def add_root_route(app: FastMCP, settings: ServerSettings) -> None:
+    root_document = create_root_document(settings)
+
+    @app.custom_route("/", methods=["GET"])
+    async def root_endpoint(request: Request) -> Response:
+        """Root endpoint for MCP discovery."""
+        return root_document.response(request)
+
+
+def create_simple_mcp_server(
+    settings: ServerSettings,
+    oauth_provider: SimpleGitHubOAuthProvider | None = None,
+) -> FastMCP:
+    """Create a simple FastMCP server with GitHub OAuth."""
+    if oauth_provider is None:
+        oauth_provider = SimpleGitHubOAuthProvider(settings)
+
+    auth_settings = create_auth_settings(settings)
+
+    app = FastMCP(
+        name="Simple GitHub MCP Server",
+        instructions="A simple MCP server with GitHub OAuth authentication",
+        auth_server_provider=oauth_provider,
+        host=settings.host,
+        port=settings.port,
+        debug=True,
+        auth=auth_settings,
+        cors=True,  # Enable CORS for remote access
+        stateless_http=settings.stateless_http,
+    )
+
+    add_root_route(app, settings)
+    # Served after FastMCP's own routes, as custom_route() would add them
+    app._custom_starlette_routes.extend(auth_server_routes(settings, oauth_provider))
+    if settings.metrics:
+        register_provider_metrics(oauth_provider)
+        app.custom_route("/metrics", methods=["GET"])(metrics_endpoint(settings))
+
+    add_github_tools(app, settings, oauth_provider, oauth_provider.github)
+    return app
+
+
+def create_resource_mcp_server(
+    settings: ServerSettings, token_verifier: TokenVerifier, github: GitHubClient
+) -> FastMCP:
+    """Create a FastMCP server serving only MCP, for tokens issued elsewhere.
+
+    FastMCP only authenticates requests when it also serves the OAuth
+    endpoints, so the server is created without auth; create_app()
+    authenticates its transport routes with token_verifier.
+    """
+    app = FastMCP(
+        name="Simple GitHub MCP Server",
+        instructions="A simple MCP server with GitHub OAuth authentication",
+        host=settings.host,
+        port=settings.port,
+        debug=True,
+        stateless_http=settings.stateless_http,
+    )
+
+    add_root_route(app, settings)
+    if settings.metrics:
+        register_github_metrics(github)
+        app.custom_route("/metrics", methods=["GET"])(metrics_endpoint(settings))
+
+    add_github_tools(app, settings, token_verifier, github)
+    return app
+
+
+def create_auth_server_app(
+    settings: ServerSettings, oauth_provider: SimpleGitHubOAuthProvider
+) -> Starlette:
+    """The app of an authorization server that serves no MCP."""
+    auth_settings = create_auth_settings(settings)
+    routes = create_auth_routes(
+        provider=oauth_provider,
+        issuer_url=auth_settings.issuer_url,
+        service_documentation_url=auth_settings.service_documentation_url,
+        client_registration_options=auth_settings.client_registration_options,
+        revocation_options=auth_settings.revocation_options,
+    )
+    routes += auth_server_routes(settings, oauth_provider)
+    if settings.metrics:
+        register_provider_metrics(oauth_provider)
+        routes.append(Route("/metrics", metrics_endpoint(settings), methods=["GET"]))
+    return Starlette(debug=True, routes=routes)
+
+
+def add_github_tools(
+    app: FastMCP,
+    settings: ServerSettings,
+    token_verifier: TokenVerifier,
+    github: GitHubClient,
+) -> None:
+    """Add the GitHub tools, which call GitHub as the request's user."""
+
+    async def get_github_token() -> str:
         """Get the GitHub token for the authenticated user."""
         access_token = get_access_token()
         if not access_token:
             raise ValueError("Not authenticated")
 
         # Get GitHub token from mapping
-        github_token = oauth_provider.token_mapping.get(access_token.token)
+        github_token = await token_verifier.get_github_token(access_token.token)
 
         if not github_token:
             raise ValueError("No GitHub token found for user")
 
         return github_token
 
+    def rate_limited(e: RateLimited) -> dict[str, Any]:
+        return {
+            "error": "Rate limited",
+            "message": str(e),
+            "retry_after": int(e.retry_after) + 1,
+        }
+
     @app.tool()
+    @timed_tool
     async def get_user_profile() -> dict[str, Any]:
         """Get the authenticated user's GitHub profile information.
 
-        This is the only tool in our simple example. It requires authentication.
+        It requires authentication.
         """
         try:
-            github_token = get_github_token()
+            github_token = await get_github_token()
         except ValueError as e:
             return {
                 "error": "Authentication required",
                 "message": str(e),
-                "auth_url": f"{str(settings.server_url).rstrip('/')}/authorize?client_id=91be729f-30be-4614-b93f-f2b4a7ec8a98&response_type=code&scope=claudeai&redirect_uri=https://claude.ai/api/mcp/auth_callback"
+                "auth_url": f"{str(settings.issuer_url).rstrip('/')}/authorize?client_id=91be729f-30be-4614-b93f-f2b4a7ec8a98&response_type=code&scope=claudeai&redirect_uri=https://claude.ai/api/mcp/auth_callback",
             }
 
-        async with create_mcp_http_client() as client:
-            response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {github_token}",
-                    "Accept": "application/vnd.github.v3+json",
-                },
+        try:
+            response = await github.api_get("/user", github_token)
+        except RateLimited as e:
+            return rate_limited(e)
+
+        if response.status_code != 200:
+            raise ValueError(
+                f"GitHub API error: {response.status_code} - {response.text}"
+            )
+
+        return response.json()
+
+    async def viewer(
+        sections: tuple[str, ...],
+        variables: dict[str, Any],
+        profile: bool = False,
+    ) -> dict[str, Any]:
+        """Fetch the viewer's profile and connection pages in one GraphQL call."""
+        github_token = await get_github_token()
+        data = await github.graphql(
+            viewer_query(sections, profile), variables, github_token
+        )
+        return data["viewer"]
+
+    async def list_page(section: str, first: int, after: str | None) -> dict[str, Any]:
+        try:
+            data = await viewer((section,), page_variables(section, first, after))
+        except RateLimited as e:
+            return rate_limited(e)
+        return page(data[section])
+
+    @app.tool()
+    @timed_tool
+    async def get_user_overview(
+        repositories: int = 10, organizations: int = 10, pull_requests: int = 10
+    ) -> dict[str, Any]:
+        """Get the user's profile, repositories, organizations and pull requests.
+
+        All of it comes from one GitHub request. Each count is how many items
+        of that list to include (0 skips it, at most 100). Lists come with a
+        next_cursor to continue with the list_* tools.
+        """
+        lists = [
+            (section, key, count)
+            for section, key, count in (
+                ("repositories", "repositories", repositories),
+                ("organizations", "organizations", organizations),
+                ("pullRequests", "pull_requests", pull_requests),
             )
+            if count > 0
+        ]
+        variables = {}
+        for section, _, count in lists:
+            variables.update(page_variables(section, count, None))
 
+        try:
+            data = await viewer(
+                tuple(section for section, _, _ in lists), variables, profile=True
+            )
+        except RateLimited as e:
+            return rate_limited(e)
+        overview: dict[str, Any] = {
+            "profile": {k: v for k, v in data.items() if k not in SECTIONS}
+        }
+        for section, key, _ in lists:
+            overview[key] = page(data[section])
+        return overview
+
+    @app.tool()
+    @timed_tool
+    async def list_repositories(
+        first: int = 30, after: str | None = None
+    ) -> dict[str, Any]:
+        """List the user's repositories, most recently updated first.
+
+        Returns up to first (at most 100) items; pass the returned next_cursor
+        as after to get the next page.
+        """
+        return await list_page("repositories", first, after)
+
+    @app.tool()
+    @timed_tool
+    async def list_organizations(
+        first: int = 30, after: str | None = None
+    ) -> dict[str, Any]:
+        """List the organizations the user is a member of.
+
+        Returns up to first (at most 100) items; pass the returned next_cursor
+        as after to get the next page.
+        """
+        return await list_page("organizations", first, after)
+
+    @app.tool()
+    @timed_tool
+    async def list_pull_requests(
+        first: int = 30, after: str | None = None
+    ) -> dict[str, Any]:
+        """List pull requests opened by the user, newest first.
+
+        Returns up to first (at most 100) items; pass the returned next_cursor
+        as after to get the next page.
+        """
+        return await list_page("pullRequests", first, after)
+
+    async def list_chunk(
+        ctx: Context,
+        path: str,
+        endpoint: str,
+        max_items: int,
+        cursor: str | None,
+        **params: str,
+    ) -> dict[str, Any]:
+        """Gather a chunk of a REST listing, reporting progress per page.
+
+        Pages are fetched with a bounded prefetch window and the chunk stops
+        at a page boundary once max_items is reached. next_cursor resumes
+        after the last page returned, or at the one that failed if the
+        chunk was cut short. A cursor from a call with a larger max_items is
+        resumed in pages of max_items, from the item it points at.
+        """
+        github_token = await get_github_token()
+        max_items = max(1, min(max_items, MAX_CHUNK_ITEMS))
+        skip = 0  # Items on the first page the cursor has already passed
+        if cursor:
+            start, per_page = decode_cursor(cursor)
+            if per_page > max_items:
+                start, skip = realign_page(start, per_page, max_items)
+                per_page = max_items
+        else:
+            start, per_page = 1, min(max_items, MAX_PER_PAGE)
+
+        async def fetch(number: int) -> Page:
+            query = urlencode({**params, "per_page": per_page, "page": number})
+            response = await github.api_get(f"{path}?{query}", github_token, endpoint)
             if response.status_code != 200:
                 raise ValueError(
                     f"GitHub API error: {response.status_code} - {response.text}"
                 )
+            return Page.from_response(number, response)
+
+        async def progress(done: int, total: int | None, items: int) -> None:
+            # Like ctx.report_progress, but tied to the request so that over
+            # streamable-http it goes out on the tool call's own stream
+            meta = ctx.request_context.meta
+            if meta is None or meta.progressToken is None:
+                return
+            await ctx.session.send_progress_notification(
+                meta.progressToken,
+                done,
+                total,
+                f"{items} items",
+                related_request_id=ctx.request_id,
+            )
 
-            return response.json()
-    
-    return app
+        try:
+            chunk = await collect_chunk(
+                fetch,
+                start,
+                max(1, max_items // per_page),
+                settings.github_prefetch_pages,
+                progress,
+            )
+        except RateLimited as e:
+            return rate_limited(e)
 
+        result: dict[str, Any] = {
+            "items": chunk.items[skip:],
+            "next_cursor": (
+                encode_cursor(chunk.resume, per_page) if chunk.resume else None
+            ),
+        }
+        if isinstance(chunk.error, RateLimited):
+            result.update(rate_limited(chunk.error))
+        elif chunk.error is not None:
+            result.update(error="Incomplete", message=str(chunk.error))
+        return result
 
-@click.command()
-@click.option("--port", default=9090, help="Port to listen on")
-@click.option("--host", default="0.0.0.0", help="Host to bind to")
-@click.option(
-    "--transport",
-    default="sse",
-    type=click.Choice(["sse", "streamable-http"]),
-    help="Transport protocol to use ('sse' or 'streamable-http')",
-)
-def main(port: int, host: str, transport: Literal["sse", "streamable-http"]) -> int:
-    """Run the simple GitHub MCP server."""
-    logging.basicConfig(level=logging.INFO)
-
-    try:
-        # No hardcoded credentials - all from environment variables
-        settings = ServerSettings(host=host, port=port)
-    except ValueError as e:
-        logger.error(
-            "Failed to load settings. Make sure environment variables are set:"
+    @app.tool()
+    @timed_tool
+    async def list_issues(
+        repo: str,
+        ctx: Context,
+        state: Literal["open", "closed", "all"] = "open",
+        max_items: int = 100,
+        cursor: str | None = None,
+    ) -> dict[str, Any]:
+        """List a repository's issues and pull requests, newest first.
+
+        repo is "owner/name". Returns up to max_items (at most 1000) with a
+        next_cursor to continue from; progress is reported as pages arrive.
+        """
+        if not REPO_RE.match(repo):
+            raise ValueError(f"Invalid repository: {repo!r}")
+        return await list_chunk(
+            ctx,
+            f"/repos/{repo}/issues",
+            "/repos/{repo}/issues",
+            max_items,
+            cursor,
+            state=state,
+        )
+
+    @app.tool()
+    @timed_tool
+    async def list_stargazers(
+        repo: str, ctx: Context, max_items: int = 100, cursor: str | None = None
+    ) -> dict[str, Any]:
+        """List the users who starred a repository, oldest first.
+
+        repo is "owner/name". Returns up to max_items (at most 1000) with a
+        next_cursor to continue from; progress is reported as pages arrive.
+        """
+        if not REPO_RE.match(repo):
+            raise ValueError(f"Invalid repository: {repo!r}")
+        return await list_chunk(
+            ctx,
+            f"/repos/{repo}/stargazers",
+            "/repos/{repo}/stargazers",
+            max_items,
+            cursor,
+        )
+
+
+def create_event_store(settings: ServerSettings) -> ResumableEventStore | None:
+    """The event store of stateful streamable-http sessions, if enabled."""
+    if settings.stateless_http or settings.event_store_max_events <= 0:
+        return None
+    return ResumableEventStore(
+        max_events=settings.event_store_max_events,
+        max_bytes=settings.event_store_max_bytes,
+        max_sessions=settings.event_store_max_sessions,
+        log_path=settings.event_store_path or None,
+    )
+
+
+def create_sse_session_manager(
+    settings: ServerSettings, mcp_server: FastMCP
+) -> SseSessionManager:
+    # FastMCP keeps its low-level server private; sse_app() runs it the same way
+    server = mcp_server._mcp_server
+
+    async def run_server(read_stream: Any, write_stream: Any) -> None:
+        await server.run(
+            read_stream, write_stream, server.create_initialization_options()
+        )
+
+    return SseSessionManager(
+        mcp_server.settings.message_path,
+        run_server,
+        heartbeat_interval=settings.sse_heartbeat_interval,
+        handshake_timeout=settings.sse_handshake_timeout,
+        idle_timeout=settings.sse_idle_timeout,
+        send_timeout=settings.sse_send_timeout,
+        max_queued_messages=settings.sse_max_queued_messages,
+    )
+
+
+def use_sse_session_manager(
+    starlette_app: Starlette, mcp_server: FastMCP, sse_sessions: SseSessionManager
+) -> None:
+    """Serve the SSE and message routes of sse_app() from sse_sessions."""
+    auth = mcp_server.settings.auth
+    required_scopes = (auth.required_scopes if auth else None) or []
+    sse_path = mcp_server.settings.sse_path
+    message_path = mcp_server.settings.message_path
+    routes = starlette_app.router.routes
+    for index, route in enumerate(routes):
+        if isinstance(route, Route) and route.path == sse_path:
+            routes[index] = Route(
+                sse_path,
+                endpoint=RequireAuthMiddleware(
+                    sse_sessions.handle_sse, required_scopes
+                ),
+                methods=["GET"],
+            )
+        elif isinstance(route, Mount) and route.path == message_path.rstrip("/"):
+            routes[index] = Mount(
+                message_path,
+                app=RequireAuthMiddleware(
+                    sse_sessions.handle_post_message, required_scopes
+                ),
+            )
+
+
+def create_introspection_verifier(settings: ServerSettings) -> IntrospectionVerifier:
+    """The token verifier of a resource server."""
+    return IntrospectionVerifier(
+        f"{str(settings.issuer_url).rstrip('/')}/introspect",
+        settings.introspection_secret,
+        cache_ttl=settings.introspection_cache_ttl,
+        negative_cache_ttl=settings.introspection_negative_cache_ttl,
+        max_entries=settings.introspection_cache_size,
+        timeout=settings.http_timeout,
+    )
+
+
+def authenticate_with(
+    starlette_app: Starlette, mcp_server: FastMCP, token_verifier: TokenVerifier
+) -> None:
+    """Authenticate requests with token_verifier, as FastMCP does with a provider.
+
+    Requires it on the streamable-http route; use_sse_session_manager() does
+    so for the SSE routes.
+    """
+    path = mcp_server.settings.streamable_http_path
+    routes = starlette_app.router.routes
+    for index, route in enumerate(routes):
+        if isinstance(route, Mount) and route.path == path.rstrip("/"):
+            # Any valid token, as create_auth_settings() requires no scopes
+            routes[index] = Mount(path, app=RequireAuthMiddleware(route.app, []))
+    # Innermost first, so the auth context is set from the authenticated user
+    starlette_app.add_middleware(AuthContextMiddleware)
+    starlette_app.add_middleware(
+        AuthenticationMiddleware,
+        # Only load_access_token() of its provider is called
+        backend=BearerAuthBackend(token_verifier),  # type: ignore[arg-type]
+    )
+
+
+def create_transport_app(
+    settings: ServerSettings,
+    transport: Literal["sse", "streamable-http"],
+    mcp_server: FastMCP,
+    component_stats: dict[str, Callable[[], dict[str, int]]],
+) -> tuple[Starlette, ResumableEventStore | None]:
+    """The app serving mcp_server over transport, and its event store if any."""
+    event_store = None
+    if transport == "sse":
+        starlette_app = mcp_server.sse_app()
+        sse_sessions = create_sse_session_manager(settings, mcp_server)
+        use_sse_session_manager(starlette_app, mcp_server, sse_sessions)
+        component_stats["sse_sessions"] = sse_sessions.stats
+        if settings.metrics:
+            REGISTRY.set_collector("sse", sse_sessions.collect_metrics)
+    else:
+        event_store = create_event_store(settings)
+        if event_store is not None:
+            # Used by streamable_http_app() in place of a manager of its own
+            mcp_server._session_manager = ResumableSessionManager(
+                mcp_server._mcp_server,
+                event_store,
+                json_response=mcp_server.settings.json_response,
+            )
+            component_stats["event_store"] = event_store.stats
+            if settings.metrics:
+                REGISTRY.set_collector("event_store", event_store.collect_metrics)
+        starlette_app = mcp_server.streamable_http_app()
+    return starlette_app, event_store
+
+
+def create_app(
+    settings: ServerSettings, transport: Literal["sse", "streamable-http"]
+) -> Starlette:
+    """Create the ASGI app for a transport, with the server lifespan attached.
+
+    The lifespan runs process-wide background work, such as the expiry
+    sweeper, around the transport's own lifespan. settings.role decides
+    whether the OAuth endpoints, MCP over transport, or both are served.
+    """
+    oauth_provider: SimpleGitHubOAuthProvider | None = None
+    token_verifier: IntrospectionVerifier | None = None
+    event_store = None
+    # Reported by the admin status endpoint
+    component_stats: dict[str, Callable[[], dict[str, int]]] = {}
+    if settings.role == "resource":
+        token_verifier = create_introspection_verifier(settings)
+        github = GitHubClient(settings)
+        mcp_server = create_resource_mcp_server(settings, token_verifier, github)
+        starlette_app, event_store = create_transport_app(
+            settings, transport, mcp_server, component_stats
+        )
+        authenticate_with(starlette_app, mcp_server, token_verifier)
+        component_stats["introspection"] = token_verifier.stats
+        if settings.metrics:
+            REGISTRY.set_collector("introspection", token_verifier.collect_metrics)
+    else:
+        oauth_provider = SimpleGitHubOAuthProvider(settings)
+        github = oauth_provider.github
+        if settings.role == "auth":
+            starlette_app = create_auth_server_app(settings, oauth_provider)
+        else:
+            mcp_server = create_simple_mcp_server(settings, oauth_provider)
+            starlette_app, event_store = create_transport_app(
+                settings, transport, mcp_server, component_stats
+            )
+
+    transport_lifespan = starlette_app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            if oauth_provider is not None:
+                await stack.enter_async_context(oauth_provider.store.running())
+            if token_verifier is not None:
+                await stack.enter_async_context(token_verifier.running())
+            await stack.enter_async_context(github.running())
+            await stack.enter_async_context(transport_lifespan(app))
+            yield
+        if event_store is not None:
+            event_store.close()
+        logger.info(f"GitHub cache stats: {github.cache.stats()}")
+
+    starlette_app.router.lifespan_context = lifespan
+    starlette_app.state.oauth_provider = oauth_provider
+    if settings.admin_token:
+        starlette_app.router.routes.append(
+            Mount(
+                "/admin",
+                routes=admin_routes(
+                    settings.admin_token, oauth_provider, github, component_stats
+                ),
+            )
+        )
+    # Discovery documents are prepared once and served ahead of the auth
+    # middleware and routing; the SDK's metadata route still answers CORS
+    # preflights. A resource server points clients at the auth server.
+    documents = {METADATA_PATH: create_metadata_document(settings)}
+    if settings.role != "auth":
+        documents["/"] = create_root_document(settings)
+    starlette_app.add_middleware(StaticDocumentMiddleware, documents=documents)
+    if settings.role != "resource" and settings.client_registration_rate > 0:
+        starlette_app.add_middleware(
+            RegistrationThrottle,
+            rate=settings.client_registration_rate,
+            burst=settings.client_registration_burst,
+            ip_header=settings.client_registration_ip_header,
+        )
+    if settings.metrics:
+        starlette_app.add_middleware(MetricsMiddleware)
+    if settings.access_log:
+        starlette_app.add_middleware(
+            AccessLogMiddleware, sample_rate=settings.access_log_sample_rate
         )
-        logger.error("  MCP_GITHUB_GITHUB_CLIENT_ID=<your-client-id>")
-        logger.error("  MCP_GITHUB_GITHUB_CLIENT_SECRET=<your-client-secret>")
-        logger.error(f"Error: {e}")
-        return 1
+    return starlette_app
+
+
+def start_logging(settings: ServerSettings) -> LogWriter:
+    return configure_logging(
+        settings.log_format,
+        settings.log_file or None,
+        settings.log_max_bytes,
+        settings.log_backup_count,
+        settings.log_queue_size,
+        settings.log_level.upper(),
+    )
 
-    mcp_server = create_simple_mcp_server(settings)
-    logger.info(f"Starting server with {transport} transport")
-    mcp_server.run(transport=transport)
-    return 0
 
+def create_app_from_env() -> Starlette:
+    """Create the ASGI app in a worker process, configured from the environment."""
+    settings = ServerSettings()
+    start_logging(settings)
+    return create_app(settings, settings.transport)
@@ -0,0 +1,264 @@
+"""Self-contained signed MCP access tokens.
+
+A signed access token is a compact JWS (header.payload.signature, base64url)
+carrying the client ID, scopes, expiry and the GitHub token encrypted with
+AES-GCM, so any process holding the keys can verify it and call GitHub on
+its behalf without a storage lookup.
+
+Keys are configured as "kid:secret" pairs; the first signs new tokens and
+all of them verify, so a key is rotated by prepending its successor and
+dropping the old one once the tokens it signed have expired.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Literal
+
+Algorithm = Literal["HS256", "EdDSA"]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _derive(secret: bytes, purpose: str) -> bytes:
+    return hmac.new(secret, f"mcp-simple-auth {purpose}".encode(), "sha256").digest()
+
+
+def parse_keys(spec: str) -> list[tuple[str, bytes]]:
+    """Parse "kid:secret,kid:secret" into (kid, secret) pairs, signing key first."""
+    keys = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        kid, sep, secret = item.strip().partition(":")
+        if not sep or not kid or not secret:
+            raise ValueError(f"Invalid token key {kid!r}: expected kid:secret")
+        keys.append((kid, secret.encode()))
+    return keys
+
+
+def token_id(refresh_token: str) -> str:
+    """ID of the access token issued together with a refresh token.
+
+    Deriving it lets revoking the refresh token deny its access token
+    without storing the pair.
+    """
+    return hashlib.sha256(refresh_token.encode()).hexdigest()[:32]
+
+
+@dataclass(frozen=True, slots=True)
+class SignedClaims:
+    jti: str
+    client_id: str
+    scopes: list[str]
+    expires_at: int
+    kid: str
+    github_ref: str | None
+
+
+class _Key:
+    """One configured key, with the signing and encryption keys derived from it."""
+
+    def __init__(self, kid: str, secret: bytes, algorithm: Algorithm):
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        self.kid = kid
+        self.algorithm = algorithm
+        header = {"alg": algorithm, "kid": kid, "typ": "at+jwt"}
+        self.header = _b64encode(json.dumps(header, separators=(",", ":")).encode())
+        self.cipher = AESGCM(_derive(secret, "encrypt"))
+        if algorithm == "HS256":
+            self.mac_key = _derive(secret, "sign")
+        else:
+            from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+                Ed25519PrivateKey,
+            )
+
+            self.private_key = Ed25519PrivateKey.from_private_bytes(
+                _derive(secret, "ed25519")
+            )
+            self.public_key = self.private_key.public_key()
+
+    def sign(self, signing_input: bytes) -> str:
+        if self.algorithm == "HS256":
+            return _b64encode(hmac.digest(self.mac_key, signing_input, "sha256"))
+        return _b64encode(self.private_key.sign(signing_input))
+
+    def verify(self, signing_input: bytes, signature: str) -> bool:
+        if self.algorithm == "HS256":
+            expected = hmac.digest(self.mac_key, signing_input, "sha256")
+            # As bytes: compare_digest() refuses str with non-ASCII characters,
+            # which a bearer token may carry
+            return hmac.compare_digest(
+                _b64encode(expected).encode(),
+                signature.encode("utf-8", "surrogateescape"),
+            )
+        from cryptography.exceptions import InvalidSignature
+
+        try:
+            self.public_key.verify(_b64decode(signature), signing_input)
+        except (InvalidSignature, ValueError):
+            return False
+        return True
+
+
+class TokenSigner:
+    """Issues and verifies signed access tokens with a set of rotating keys."""
+
+    def __init__(self, keys: list[tuple[str, bytes]], algorithm: Algorithm = "HS256"):
+        if not keys:
+            raise ValueError("Signed tokens need at least one key")
+        try:
+            self._keys = [_Key(kid, secret, algorithm) for kid, secret in keys]
+        except ImportError as e:
+            raise RuntimeError(
+                "Signed tokens need the cryptography package "
+                "(install the signed-tokens extra)"
+            ) from e
+        self.signing_key = self._keys[0]
+        # Tokens are matched to their key by the encoded header, which is
+        # fixed per key, so verifying never parses the header
+        self._keys_by_header = {key.header: key for key in self._keys}
+
+    def issue(
+        self,
+        jti: str,
+        client_id: str,
+        scopes: list[str],
+        expires_at: int,
+        github_token: str | None,
+    ) -> str:
+        key = self.signing_key
+        claims: dict[str, Any] = {
+            "jti": jti,
+            "client_id": client_id,
+            "scope": " ".join(scopes),
+            "iat": int(time.time()),
+            "exp": expires_at,
+        }
+        if github_token is not None:
+            nonce = os.urandom(12)
+            encrypted = key.cipher.encrypt(nonce, github_token.encode(), jti.encode())
+            claims["ghr"] = _b64encode(nonce + encrypted)
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = f"{key.header}.{payload}"
+        return f"{signing_input}.{key.sign(signing_input.encode())}"
+
+    def verify(self, token: str, now: float | None = None) -> SignedClaims | None:
+        """Return the claims of a validly signed, unexpired token, else None."""
+        header, _, rest = token.partition(".")
+        payload, _, signature = rest.partition(".")
+        key = self._keys_by_header.get(header)
+        if key is None or not signature:
+            return None
+        if not key.verify(f"{header}.{payload}".encode(), signature):
+            return None
+        claims = json.loads(_b64decode(payload))
+        if claims["exp"] < (time.time() if now is None else now):
+            return None
+        return SignedClaims(
+            jti=claims["jti"],
+            client_id=claims["client_id"],
+            scopes=claims["scope"].split(),
+            expires_at=claims["exp"],
+            kid=key.kid,
+            github_ref=claims.get("ghr"),
+        )
+
+    def github_token(self, claims: SignedClaims) -> str | None:
+        """Decrypt the GitHub token carried by verified claims."""
+        if claims.github_ref is None:
+            return None
+        key = next(key for key in self._keys if key.kid == claims.kid)
+        data = _b64decode(claims.github_ref)
+        return key.cipher.decrypt(data[:12], data[12:], claims.jti.encode()).decode()
+
+
+class Denylist:
+    """IDs of revoked tokens: a bloom filter in front of an exact set.
+
+    Nearly every verified token is not revoked, and the filter answers that
+    with a few bit probes; a filter hit is confirmed against the exact set.
+    Token IDs are random hex, so their own bits serve as the filter hashes.
+    Entries are pruned once the token they deny has expired.
+    """
+
+    def __init__(self, capacity: int = 1024, error_rate: float = 0.001):
+        self.error_rate = error_rate
+        self._entries: dict[str, float] = {}
+        self._build(capacity)
+
+    def _build(self, capacity: int) -> None:
+        self.capacity = capacity
+        bits = -capacity * math.log(self.error_rate) / math.log(2) ** 2
+        self._bits = math.ceil(bits)
+        self._hashes = max(1, round(self._bits / capacity * math.log(2)))
+        self._filter = bytearray((self._bits + 7) // 8)
+        for jti in self._entries:
+            self._set(jti)
+
+    def _positions(self, jti: str) -> list[int]:
+        try:
+            value = int(jti[:32], 16)
+        except ValueError:
+            value = int.from_bytes(
+                hashlib.blake2b(jti.encode(), digest_size=16).digest(), "big"
+            )
+        h1, h2 = value >> 64, value & (2**64 - 1) | 1
+        return [(h1 + i * h2) % self._bits for i in range(self._hashes)]
+
+    def _set(self, jti: str) -> None:
+        for position in self._positions(jti):
+            self._filter[position >> 3] |= 1 << (position & 7)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        """Deny jti until expires_at."""
+        self._entries[jti] = expires_at
+        if len(self._entries) > self.capacity:
+            self.prune()
+            if len(self._entries) > self.capacity // 2:
+                self._build(self.capacity * 2)
+                return
+        self._set(jti)
+
+    def __contains__(self, jti: str) -> bool:
+        if not self._entries:
+            return False
+        filter_ = self._filter
+        for position in self._positions(jti):
+            if not filter_[position >> 3] & (1 << (position & 7)):
+                return False
+        return jti in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entries(self) -> dict[str, float]:
+        """A copy of the denied IDs and their deadlines."""
+        return dict(self._entries)
+
+    def update(self, entries: dict[str, float]) -> None:
+        """Deny each ID in entries until its deadline."""
+        for jti, expires_at in entries.items():
+            self.add(jti, expires_at)
+
+    def prune(self, now: float | None = None) -> int:
+        """Drop entries whose tokens have expired, returning how many."""
+        now = time.time() if now is None else now
+        expired = [jti for jti, deadline in self._entries.items() if deadline < now]
+        for jti in expired:
+            del self._entries[jti]
+        if expired:
+            self._build(self.capacity)
+        return len(expired)
@@ -0,0 +1,270 @@
+"""SSE transport with session lifecycle management.
+
+Replaces the SDK's SseServerTransport behind the same /sse and /messages/
+routes and wire format. The SDK transport keeps a stream open for as long
+as the TCP connection lasts and never forgets a session, so streams that
+open and then go quiet hold a task and buffers indefinitely. Here each
+session is written by a single task, which:
+
+- sends a heartbeat comment when nothing else was sent for an interval,
+  so proxies keep the stream open and dead connections surface
+- reaps the session if the client posts nothing within the handshake
+  timeout of opening it, or nothing for the idle timeout after that
+- queues at most a bounded number of outbound messages: a full queue makes
+  the MCP server wait (backpressure), and a client that does not take a
+  write within the send timeout is disconnected
+
+Expiry is checked as the writer wakes, so a session is reaped up to one
+heartbeat interval after its deadline. A message is only accepted (202) once
+the session's server has taken it; one for a session that has ended or been
+reaped gets a 404, so the client knows to reconnect.
+"""
+
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from urllib.parse import quote
+from uuid import UUID, uuid4
+
+import anyio
+import mcp.types as types
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from mcp.shared.message import ServerMessageMetadata, SessionMessage
+from pydantic import ValidationError
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from mcp_simple_auth.metrics import SSE_SESSIONS_REAPED, Sample
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = b": ping\r\n\r\n"
+HEADERS = [
+    (b"content-type", b"text/event-stream"),
+    (b"cache-control", b"no-store"),
+    (b"connection", b"keep-alive"),
+    (b"x-accel-buffering", b"no"),
+]
+# A session counts as idle once its client has been quiet this long
+IDLE_AFTER = 60.0
+
+RunServer = Callable[
+    [
+        MemoryObjectReceiveStream[SessionMessage | Exception],
+        MemoryObjectSendStream[SessionMessage],
+    ],
+    Awaitable[None],
+]
+
+
+def event(name: str, data: str) -> bytes:
+    return f"event: {name}\r\ndata: {data}\r\n\r\n".encode()
+
+
+class SseSession:
+    """An open SSE stream and when its client last posted to it."""
+
+    __slots__ = ("closed", "inbound", "last_post", "opened")
+
+    def __init__(self, inbound: MemoryObjectSendStream[SessionMessage | Exception]):
+        self.inbound = inbound
+        self.opened = time.monotonic()
+        self.last_post: float | None = None
+        # Set once the session ends, before any await: no message is taken after
+        self.closed = False
+
+
+class SseSessionManager:
+    """Open SSE sessions, and the ASGI apps of the transport's two routes.
+
+    handle_sse streams a new session to the client and runs an MCP server
+    for it with run_server; handle_post_message passes a client's message
+    to the session it names.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        run_server: RunServer,
+        heartbeat_interval: float = 15.0,
+        handshake_timeout: float = 30.0,
+        idle_timeout: float = 3600.0,
+        send_timeout: float = 30.0,
+        max_queued_messages: int = 64,
+    ):
+        self.endpoint = endpoint
+        self.run_server = run_server
+        self.heartbeat_interval = heartbeat_interval
+        self.handshake_timeout = handshake_timeout
+        self.idle_timeout = idle_timeout
+        self.send_timeout = send_timeout
+        self.max_queued_messages = max_queued_messages
+        self.sessions: dict[UUID, SseSession] = {}
+
+    def expired(self, session: SseSession, now: float) -> str | None:
+        """Why a session should be reaped at now, if it should."""
+        if session.last_post is None:
+            if now - session.opened > self.handshake_timeout:
+                return "handshake"
+        elif now - session.last_post > self.idle_timeout:
+            return "idle"
+        return None
+
+    def stats(self) -> dict[str, int]:
+        now = time.monotonic()
+        idle = sum(
+            1
+            for session in self.sessions.values()
+            if now - (session.last_post or session.opened) > IDLE_AFTER
+        )
+        return {"active": len(self.sessions) - idle, "idle": idle}
+
+    async def collect_metrics(self) -> list[tuple[str, str, list[Sample]]]:
+        stats = self.stats()
+        return [
+            (
+                "mcp_sse_sessions",
+                f"SSE sessions by state (idle: no client message for {IDLE_AFTER:g}s)",
+                [({"state": state}, count) for state, count in stats.items()],
+            )
+        ]
+
+    async def handle_sse(self, scope: Scope, receive: Receive, send: Send) -> None:
+        session_id = uuid4()
+        inbound_writer, inbound = anyio.create_memory_object_stream[
+            SessionMessage | Exception
+        ](0)
+        outbound, outbound_reader = anyio.create_memory_object_stream[SessionMessage](
+            self.max_queued_messages
+        )
+        session = SseSession(inbound_writer)
+        self.sessions[session_id] = session
+        endpoint = scope.get("root_path", "").rstrip("/") + self.endpoint
+        reason = None
+        try:
+            await send(
+                {"type": "http.response.start", "status": 200, "headers": HEADERS}
+            )
+            uri = f"{quote(endpoint)}?session_id={session_id.hex}"
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": event("endpoint", uri),
+                    "more_body": True,
+                }
+            )
+            async with anyio.create_task_group() as tg:
+
+                async def run_server() -> None:
+                    async with outbound:
+                        await self.run_server(inbound, outbound)
+
+                async def watch_disconnect() -> None:
+                    while (await receive())["type"] != "http.disconnect":
+                        pass
+                    tg.cancel_scope.cancel()
+
+                tg.start_soon(run_server)
+                tg.start_soon(watch_disconnect)
+                reason = await self._write(session, outbound_reader, send)
+                session.closed = True
+                tg.cancel_scope.cancel()
+        finally:
+            session.closed = True
+            del self.sessions[session_id]
+            inbound_writer.close()
+            # Fails a post still waiting for the server to take its message
+            inbound.close()
+            outbound_reader.close()
+        if reason is not None:
+            SSE_SESSIONS_REAPED.inc(reason)
+            logger.info(f"Reaped SSE session {session_id.hex}: {reason}")
+        if reason != "slow_consumer":
+            # A slow consumer is left unfinished, so the server closes it
+            await send({"type": "http.response.body", "body": b""})
+
+    async def _write(
+        self,
+        session: SseSession,
+        messages: MemoryObjectReceiveStream[SessionMessage],
+        send: Send,
+    ) -> str | None:
+        """Send messages, and heartbeats between them, until the server is done.
+
+        Returns why the session was reaped, or None if it ended normally.
+        """
+        while True:
+            chunk = HEARTBEAT
+            with anyio.move_on_after(self.heartbeat_interval):
+                try:
+                    message = await messages.receive()
+                except anyio.EndOfStream:
+                    return None
+                chunk = event(
+                    "message",
+                    message.message.model_dump_json(by_alias=True, exclude_none=True),
+                )
+            reason = self.expired(session, time.monotonic())
+            if reason is not None:
+                return reason
+            with anyio.move_on_after(self.send_timeout) as timeout:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            if timeout.cancelled_caught:
+                return "slow_consumer"
+
+    async def handle_post_message(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        request = Request(scope, receive)
+        session_id_param = request.query_params.get("session_id")
+        if session_id_param is None:
+            response = Response("session_id is required", status_code=400)
+            return await response(scope, receive, send)
+        try:
+            session_id = UUID(hex=session_id_param)
+        except ValueError:
+            response = Response("Invalid session ID", status_code=400)
+            return await response(scope, receive, send)
+
+        session = self.sessions.get(session_id)
+        if session is None or session.closed:
+            response = Response("Could not find session", status_code=404)
+            return await response(scope, receive, send)
+        session.last_post = time.monotonic()
+
+        body = await request.body()
+        try:
+            message = types.JSONRPCMessage.model_validate_json(body)
+        except ValidationError as err:
+            logger.error(f"Failed to parse message: {err}")
+            response = Response("Could not parse message", status_code=400)
+            await response(scope, receive, send)
+            await self._deliver(session, err)
+            return
+
+        metadata = ServerMessageMetadata(request_context=request)
+        if await self._deliver(session, SessionMessage(message, metadata=metadata)):
+            response = Response("Accepted", status_code=202)
+        else:
+            response = Response("Could not find session", status_code=404)
+        await response(scope, receive, send)
+
+    async def _deliver(
+        self, session: SseSession, message: SessionMessage | Exception
+    ) -> bool:
+        """Pass a message to the session's server; False if the session ended.
+
+        The state is checked with no await before the send, and the send only
+        returns once the server has taken the message (the stream has no
+        buffer), so a session reaped meanwhile fails it rather than drop it.
+        """
+        if session.closed:
+            return False
+        try:
+            await session.inbound.send(message)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            return False
+        return True
@@ -0,0 +1,32 @@
+"""Pluggable storage for the provider's OAuth state."""
+
+from typing import TYPE_CHECKING
+
+from mcp_simple_auth.storage.base import OAuthStorage
+from mcp_simple_auth.storage.memory import MemoryStorage
+
+if TYPE_CHECKING:
+    from mcp_simple_auth.server import ServerSettings
+
+__all__ = ["MemoryStorage", "OAuthStorage", "create_storage"]
+
+
+def create_storage(settings: "ServerSettings") -> OAuthStorage:
+    """Create the storage backend selected in the settings."""
+    if settings.storage == "sqlite":
+        from mcp_simple_auth.storage.sqlite import SQLiteStorage
+
+        return SQLiteStorage(
+            settings.sqlite_path,
+            read_connections=settings.sqlite_read_connections,
+            sweep_interval=settings.expiry_sweep_interval,
+        )
+    if settings.storage == "redis":
+        from mcp_simple_auth.storage.redis import RedisStorage
+
+        return RedisStorage(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            key_prefix=settings.redis_key_prefix,
+        )
+    return MemoryStorage(settings.expiry_sweep_interval, settings.max_clients)
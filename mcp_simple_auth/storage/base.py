@@ -0,0 +1,130 @@
+"""Storage interface for the provider's OAuth state."""
+
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Collection
+from contextlib import asynccontextmanager
+from typing import Any
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from mcp.shared.auth import OAuthClientInformationFull
+
+
+class OAuthStorage(ABC):
+    """Async storage for clients, authorize state, codes and tokens.
+
+    Every entry that has a deadline (authorize state, authorization codes and
+    MCP access and refresh tokens) is expired by the backend itself. GitHub
+    tokens are stored with the codes and MCP tokens that refer to them and go
+    away with the last of those.
+    """
+
+    async def open(self) -> None:  # noqa: B027 - optional, unlike the rest
+        """Acquire connections and start background work."""
+
+    async def close(self) -> None:  # noqa: B027
+        """Stop background work and release connections."""
+
+    @asynccontextmanager
+    async def running(self) -> AsyncIterator["OAuthStorage"]:
+        """Keep the storage open for the duration of the block."""
+        await self.open()
+        try:
+            yield self
+        finally:
+            await self.close()
+
+    # Clients
+
+    @abstractmethod
+    async def get_client(self, client_id: str) -> OAuthClientInformationFull | None: ...
+
+    @abstractmethod
+    async def add_client(self, client_info: OAuthClientInformationFull) -> None: ...
+
+    # Authorization state
+
+    @abstractmethod
+    async def add_state(
+        self, state: str, data: dict[str, str], expires_at: float
+    ) -> None: ...
+
+    @abstractmethod
+    async def get_state(self, state: str) -> dict[str, str] | None: ...
+
+    @abstractmethod
+    async def remove_state(self, state: str) -> None: ...
+
+    # Authorization codes
+
+    @abstractmethod
+    async def add_pending_authorization(
+        self, auth_code: AuthorizationCode, github_token: AccessToken
+    ) -> None:
+        """Store an authorization code together with its GitHub token."""
+
+    @abstractmethod
+    async def get_auth_code(self, code: str) -> AuthorizationCode | None: ...
+
+    @abstractmethod
+    async def redeem_auth_code(
+        self,
+        code: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken | None = None,
+    ) -> str | None:
+        """Exchange an authorization code for MCP tokens.
+
+        Removes the code, stores the tokens mapped to the code's GitHub token
+        and returns that GitHub token, if there was one. Self-contained
+        (signed) access tokens are not stored and passed as None. Raises
+        LookupError if the code is gone, e.g. because a concurrent request
+        already redeemed it; nothing is stored then.
+        """
+
+    # Access tokens
+
+    @abstractmethod
+    async def get_access_token(self, token: str) -> AccessToken | None: ...
+
+    @abstractmethod
+    async def get_github_token(self, mcp_token: str) -> str | None:
+        """Return the GitHub token backing an MCP access token."""
+
+    @abstractmethod
+    async def remove_access_token(self, token: str) -> bool: ...
+
+    # Refresh tokens
+
+    @abstractmethod
+    async def get_refresh_token(self, token: str) -> RefreshToken | None: ...
+
+    @abstractmethod
+    async def rotate_refresh_token(
+        self,
+        old_token: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken,
+    ) -> str | None:
+        """Replace a refresh token with a new access and refresh token pair.
+
+        The new tokens are mapped to the old refresh token's GitHub token,
+        which is returned. Raises LookupError if the old token is gone, e.g.
+        because a concurrent request already rotated it.
+        """
+
+    @abstractmethod
+    async def revoke(self, token: str) -> bool:
+        """Revoke an MCP token, or a GitHub token and every MCP token it backs.
+
+        Access and refresh tokens issued together are revoked together.
+        """
+
+    # Introspection
+
+    @abstractmethod
+    async def stats(self) -> dict[str, int]:
+        """Return entry counts per kind."""
+
+    def in_process_collections(self) -> dict[str, Collection[Any]]:
+        """The collections this backend holds in process memory, by name."""
+        return {}
@@ -0,0 +1,102 @@
+"""In-process storage backend."""
+
+import logging
+from collections.abc import Collection
+from typing import Any
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from mcp.shared.auth import OAuthClientInformationFull
+
+from mcp_simple_auth.expiry import ExpirySweeper
+from mcp_simple_auth.storage.base import OAuthStorage
+from mcp_simple_auth.token_store import TokenStore
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStorage(OAuthStorage):
+    """Storage in process-local dicts, expired by a background sweeper.
+
+    Nothing survives a restart, and state isn't shared between processes.
+    """
+
+    def __init__(self, sweep_interval: float, max_clients: int = 10000):
+        self.store = TokenStore(max_clients)
+        self.expiry_sweeper = ExpirySweeper(self.store.evict_expired, sweep_interval)
+
+    async def open(self) -> None:
+        self.expiry_sweeper.start()
+
+    async def close(self) -> None:
+        await self.expiry_sweeper.stop()
+        logger.info(f"Expiry sweeper stats: {self.expiry_sweeper.stats()}")
+
+    async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        return self.store.get_client(client_id)
+
+    async def add_client(self, client_info: OAuthClientInformationFull) -> None:
+        self.store.add_client(client_info)
+
+    async def add_state(
+        self, state: str, data: dict[str, str], expires_at: float
+    ) -> None:
+        self.store.add_state(state, data, expires_at)
+
+    async def get_state(self, state: str) -> dict[str, str] | None:
+        return self.store.get_state(state)
+
+    async def remove_state(self, state: str) -> None:
+        self.store.remove_state(state)
+
+    async def add_pending_authorization(
+        self, auth_code: AuthorizationCode, github_token: AccessToken
+    ) -> None:
+        self.store.add_pending_authorization(auth_code, github_token)
+
+    async def get_auth_code(self, code: str) -> AuthorizationCode | None:
+        return self.store.get_auth_code(code)
+
+    async def redeem_auth_code(
+        self,
+        code: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken | None = None,
+    ) -> str | None:
+        return self.store.redeem_auth_code(code, access_token, refresh_token)
+
+    async def get_access_token(self, token: str) -> AccessToken | None:
+        return self.store.get_access_token(token)
+
+    async def get_github_token(self, mcp_token: str) -> str | None:
+        return self.store.get_github_token(mcp_token)
+
+    async def remove_access_token(self, token: str) -> bool:
+        return self.store.remove_access_token(token)
+
+    async def get_refresh_token(self, token: str) -> RefreshToken | None:
+        return self.store.get_refresh_token(token)
+
+    async def rotate_refresh_token(
+        self,
+        old_token: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken,
+    ) -> str | None:
+        return self.store.rotate_refresh_token(old_token, access_token, refresh_token)
+
+    async def revoke(self, token: str) -> bool:
+        return self.store.revoke(token)
+
+    async def stats(self) -> dict[str, int]:
+        store = self.store
+        return {
+            "clients": len(store.clients),
+            "states": len(store.state_mapping),
+            "auth_codes": len(store.auth_codes),
+            "access_tokens": len(store.tokens),
+            "refresh_tokens": len(store.refresh_tokens),
+            "github_tokens": len(store.github_tokens),
+        }
+
+    def in_process_collections(self) -> dict[str, Collection[Any]]:
+        return self.store.collections()
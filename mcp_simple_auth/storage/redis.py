@@ -0,0 +1,307 @@
+"""Redis storage backend."""
+
+import json
+import time
+from typing import TYPE_CHECKING, Any
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from mcp.shared.auth import OAuthClientInformationFull
+
+from mcp_simple_auth.storage.base import OAuthStorage
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+
+class RedisStorage(OAuthStorage):
+    """Storage in Redis, expired with native key TTLs.
+
+    Each entry is one key: "client:<id>", "state:<state>", "code:<code>",
+    "token:<token>" and "refresh:<token>", the latter three carrying their
+    GitHub token; access and refresh tokens also name their partner. A set
+    "github:<github_token>" lists the code and token keys a GitHub token backs
+    so it can be revoked as a whole; it lives as long as its longest-lived
+    member, and members whose keys are gone are pruned as new ones are added.
+
+    A client can be passed in (e.g. fakeredis.aioredis.FakeRedis in tests);
+    it must be created with decode_responses=True. Otherwise one is created
+    on open over a blocking connection pool of max_connections.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        max_connections: int = 50,
+        key_prefix: str = "mcp_simple_auth:",
+        client: "Redis | None" = None,
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.key_prefix = key_prefix
+        self._client = client
+        self._owns_client = client is None
+
+    @property
+    def redis(self) -> "Redis":
+        if self._client is None:
+            raise RuntimeError("Redis storage is not open")
+        return self._client
+
+    async def open(self) -> None:
+        if self._client is None:
+            try:
+                from redis.asyncio import BlockingConnectionPool, Redis
+            except ImportError as e:
+                raise RuntimeError(
+                    "Redis storage needs the redis package (install the redis extra)"
+                ) from e
+            pool = BlockingConnectionPool.from_url(
+                self.url, max_connections=self.max_connections, decode_responses=True
+            )
+            self._client = Redis(connection_pool=pool)
+        await self.redis.ping()
+
+    async def close(self) -> None:
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+            self._client = None
+
+    def _key(self, kind: str, name: str) -> str:
+        return f"{self.key_prefix}{kind}:{name}"
+
+    @staticmethod
+    def _ms(expires_at: float) -> int:
+        return int(expires_at * 1000)
+
+    async def _add_github_ref(
+        self, github_token: str, member: str, expires_at: float | None
+    ) -> None:
+        """Add a key to a GitHub token's set, extending the set's lifetime.
+
+        Members whose keys expired, were rotated away or revoked are dropped,
+        so the set of an active session stays as small as its live tokens.
+        """
+        refs_key = self._key("github", github_token)
+
+        async def update(pipe: Any) -> None:
+            ttl = await pipe.pttl(refs_key)
+            members = list(await pipe.smembers(refs_key))
+            dead = []
+            if members:
+                async with self.redis.pipeline(transaction=False) as check:
+                    for key in members:
+                        check.exists(key)
+                    exists = await check.execute()
+                dead = [
+                    key for key, found in zip(members, exists, strict=True) if not found
+                ]
+            pipe.multi()
+            if dead:
+                pipe.srem(refs_key, *dead)
+            pipe.sadd(refs_key, member)
+            if expires_at is None:
+                pipe.persist(refs_key)
+            elif ttl == -2 or (
+                ttl >= 0 and self._ms(expires_at) > self._ms(time.time()) + ttl
+            ):
+                # -2: new set, -1: no expiry (kept), else extend if later
+                pipe.pexpireat(refs_key, self._ms(expires_at))
+
+        await self.redis.transaction(update, refs_key)
+
+    # Clients
+
+    async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        data = await self.redis.get(self._key("client", client_id))
+        return OAuthClientInformationFull.model_validate_json(data) if data else None
+
+    async def add_client(self, client_info: OAuthClientInformationFull) -> None:
+        await self.redis.set(
+            self._key("client", client_info.client_id), client_info.model_dump_json()
+        )
+
+    # Authorization state
+
+    async def add_state(
+        self, state: str, data: dict[str, str], expires_at: float
+    ) -> None:
+        await self.redis.set(
+            self._key("state", state), json.dumps(data), pxat=self._ms(expires_at)
+        )
+
+    async def get_state(self, state: str) -> dict[str, str] | None:
+        data = await self.redis.get(self._key("state", state))
+        return json.loads(data) if data else None
+
+    async def remove_state(self, state: str) -> None:
+        await self.redis.delete(self._key("state", state))
+
+    # Authorization codes
+
+    async def add_pending_authorization(
+        self, auth_code: AuthorizationCode, github_token: AccessToken
+    ) -> None:
+        code_key = self._key("code", auth_code.code)
+        record = {
+            "code": auth_code.model_dump(mode="json"),
+            "github_token": github_token.token,
+        }
+        await self.redis.set(
+            code_key, json.dumps(record), pxat=self._ms(auth_code.expires_at)
+        )
+        await self._add_github_ref(github_token.token, code_key, auth_code.expires_at)
+
+    async def get_auth_code(self, code: str) -> AuthorizationCode | None:
+        data = await self.redis.get(self._key("code", code))
+        if not data:
+            return None
+        return AuthorizationCode.model_validate(json.loads(data)["code"])
+
+    async def redeem_auth_code(
+        self,
+        code: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken | None = None,
+    ) -> str | None:
+        # GETDEL makes the code single-use even across processes
+        data = await self.redis.getdel(self._key("code", code))
+        if not data:
+            raise LookupError("Authorization code does not exist")
+        github_token = json.loads(data)["github_token"]
+        await self._store_tokens(access_token, refresh_token, github_token)
+        return github_token
+
+    async def _store_tokens(
+        self,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken | None,
+        github_token: str | None,
+    ) -> None:
+        """Store a newly issued token pair backed by github_token."""
+        entries: list[tuple[str, AccessToken | RefreshToken, dict[str, Any]]] = []
+        if access_token is not None:
+            entries.append(
+                (
+                    self._key("token", access_token.token),
+                    access_token,
+                    {"refresh_token": refresh_token.token if refresh_token else None},
+                )
+            )
+        if refresh_token is not None:
+            entries.append(
+                (
+                    self._key("refresh", refresh_token.token),
+                    refresh_token,
+                    {"access_token": access_token.token if access_token else None},
+                )
+            )
+
+        for key, token, partner in entries:
+            record = {
+                "token": token.model_dump(mode="json"),
+                "github_token": github_token,
+                **partner,
+            }
+            if token.expires_at is not None:
+                await self.redis.set(
+                    key, json.dumps(record), pxat=self._ms(token.expires_at)
+                )
+            else:
+                await self.redis.set(key, json.dumps(record))
+            if github_token is not None:
+                await self._add_github_ref(github_token, key, token.expires_at)
+
+    # Access tokens
+
+    async def _get_token_record(self, token: str) -> dict[str, Any] | None:
+        data = await self.redis.get(self._key("token", token))
+        return json.loads(data) if data else None
+
+    async def get_access_token(self, token: str) -> AccessToken | None:
+        record = await self._get_token_record(token)
+        return AccessToken.model_validate(record["token"]) if record else None
+
+    async def get_github_token(self, mcp_token: str) -> str | None:
+        record = await self._get_token_record(mcp_token)
+        return record["github_token"] if record else None
+
+    async def remove_access_token(self, token: str) -> bool:
+        return await self.redis.delete(self._key("token", token)) > 0
+
+    # Refresh tokens
+
+    async def get_refresh_token(self, token: str) -> RefreshToken | None:
+        data = await self.redis.get(self._key("refresh", token))
+        return RefreshToken.model_validate(json.loads(data)["token"]) if data else None
+
+    async def rotate_refresh_token(
+        self,
+        old_token: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken,
+    ) -> str | None:
+        # GETDEL lets only one of several concurrent rotations win
+        data = await self.redis.getdel(self._key("refresh", old_token))
+        if not data:
+            raise LookupError("Refresh token does not exist")
+        github_token = json.loads(data)["github_token"]
+        await self._store_tokens(access_token, refresh_token, github_token)
+        return github_token
+
+    async def _remove_github_refs(
+        self, github_token: str | None, *members: str
+    ) -> None:
+        if github_token is not None:
+            await self.redis.srem(self._key("github", github_token), *members)
+
+    async def revoke(self, token: str) -> bool:
+        # An access or refresh token, revoked along with its partner
+        key = self._key("token", token)
+        data = await self.redis.getdel(key)
+        if data:
+            record = json.loads(data)
+            removed = [key]
+            partner = record.get("refresh_token")
+            if partner:
+                removed.append(self._key("refresh", partner))
+                await self.redis.delete(removed[-1])
+            await self._remove_github_refs(record["github_token"], *removed)
+            return True
+        key = self._key("refresh", token)
+        data = await self.redis.getdel(key)
+        if data:
+            record = json.loads(data)
+            removed = [key]
+            partner = record["access_token"]
+            if partner:
+                removed.append(self._key("token", partner))
+                await self.redis.delete(removed[-1])
+            await self._remove_github_refs(record["github_token"], *removed)
+            return True
+
+        # Not an MCP token - revoke it as a GitHub token
+        refs_key = self._key("github", token)
+        members = await self.redis.smembers(refs_key)
+        if not members:
+            return False
+        await self.redis.delete(refs_key, *members)
+        return True
+
+    # Introspection
+
+    async def stats(self) -> dict[str, int]:
+        """Count keys per kind; this scans the key space."""
+        counts = {}
+        for kind, name in (
+            ("client", "clients"),
+            ("state", "states"),
+            ("code", "auth_codes"),
+            ("token", "access_tokens"),
+            ("refresh", "refresh_tokens"),
+            ("github", "github_tokens"),
+        ):
+            count = 0
+            async for _ in self.redis.scan_iter(match=self._key(kind, "*")):
+                count += 1
+            counts[name] = count
+        return counts
@@ -0,0 +1,462 @@
+"""SQLite storage backend."""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections.abc import Callable
+from typing import Any
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from mcp.shared.auth import OAuthClientInformationFull
+
+from mcp_simple_auth.storage.base import OAuthStorage
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    client_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS states (
+    state TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS states_expires_at ON states (expires_at);
+CREATE TABLE IF NOT EXISTS auth_codes (
+    code TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    github_token TEXT,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS auth_codes_expires_at ON auth_codes (expires_at);
+CREATE INDEX IF NOT EXISTS auth_codes_github_token ON auth_codes (github_token);
+CREATE TABLE IF NOT EXISTS access_tokens (
+    token TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    github_token TEXT,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS access_tokens_expires_at ON access_tokens (expires_at);
+CREATE INDEX IF NOT EXISTS access_tokens_github_token ON access_tokens (github_token);
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    token TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    github_token TEXT,
+    access_token TEXT,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS refresh_tokens_expires_at ON refresh_tokens (expires_at);
+CREATE INDEX IF NOT EXISTS refresh_tokens_github_token
+    ON refresh_tokens (github_token);
+CREATE INDEX IF NOT EXISTS refresh_tokens_access_token
+    ON refresh_tokens (access_token);
+"""
+
+WriteOp = Callable[[sqlite3.Connection], Any]
+
+
+class SQLiteStorage(OAuthStorage):
+    """Storage in a SQLite database in WAL mode.
+
+    Reads run on a small pool of connections in worker threads; with WAL
+    they never wait for the writer. Writes go through a single writer task
+    that commits everything queued while the previous commit was running in
+    one transaction (group commit), each op isolated in its own savepoint.
+    A write returns once it is committed, so any process sharing the
+    database file sees it on its next read.
+
+    Expired rows are purged every sweep_interval through the expires_at
+    indexes, so a purge costs O(expired).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        read_connections: int = 4,
+        sweep_interval: float = 30.0,
+        batch_size: int = 256,
+    ):
+        self.path = path
+        self.read_connections = read_connections
+        self.sweep_interval = sweep_interval
+        self.batch_size = batch_size
+        self.reclaimed: dict[str, int] = {}
+        self._writer_conn: sqlite3.Connection | None = None
+        self._readers: asyncio.Queue[sqlite3.Connection] = asyncio.Queue()
+        self._reader_conns: list[sqlite3.Connection] = []
+        self._writes: asyncio.Queue[tuple[WriteOp, asyncio.Future[Any]] | None] = (
+            asyncio.Queue()
+        )
+        self._tasks: list[asyncio.Task[None]] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; transactions are managed explicitly by the writer
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    async def open(self) -> None:
+        def setup() -> sqlite3.Connection:
+            conn = self._connect()
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.executescript(SCHEMA)
+            return conn
+
+        self._writer_conn = await asyncio.to_thread(setup)
+        for _ in range(self.read_connections):
+            conn = await asyncio.to_thread(self._connect)
+            self._reader_conns.append(conn)
+            self._readers.put_nowait(conn)
+        self._tasks = [
+            asyncio.create_task(self._run_writer()),
+            asyncio.create_task(self._run_purge()),
+        ]
+
+    async def close(self) -> None:
+        # Let the writer commit what is queued, then stop
+        self._writes.put_nowait(None)
+        writer, purge = self._tasks
+        purge.cancel()
+        await asyncio.gather(writer, purge, return_exceptions=True)
+        self._tasks = []
+        for conn in self._reader_conns:
+            conn.close()
+        self._reader_conns = []
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+            self._writer_conn = None
+        logger.info(f"SQLite purge stats: {self.reclaimed}")
+
+    # Connection handling
+
+    async def _read(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = await self._readers.get()
+        try:
+            return await asyncio.to_thread(fn, conn)
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def _write(self, op: WriteOp) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        self._writes.put_nowait((op, future))
+        return await future
+
+    async def _run_writer(self) -> None:
+        while True:
+            item = await self._writes.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size and not self._writes.empty():
+                item = self._writes.get_nowait()
+                if item is None:
+                    # Commit this batch first, then stop
+                    self._writes.put_nowait(None)
+                    break
+                batch.append(item)
+
+            try:
+                ops = [op for op, _ in batch]
+                results = await asyncio.to_thread(self._commit, ops)
+            except Exception as e:
+                logger.error("SQLite batch commit failed", exc_info=e)
+                results = [e] * len(batch)
+
+            for (_, future), result in zip(batch, results, strict=True):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _commit(self, ops: list[WriteOp]) -> list[Any]:
+        """Run ops in one transaction, each in a savepoint of its own."""
+        assert self._writer_conn is not None
+        conn = self._writer_conn
+        results: list[Any] = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for op in ops:
+                conn.execute("SAVEPOINT op")
+                try:
+                    results.append(op(conn))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    results.append(e)
+                conn.execute("RELEASE op")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return results
+
+    async def _run_purge(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                purged = await self._write(self._purge_expired)
+            except Exception as e:
+                logger.error("SQLite purge failed", exc_info=e)
+                continue
+            for kind, count in purged.items():
+                self.reclaimed[kind] = self.reclaimed.get(kind, 0) + count
+
+    @staticmethod
+    def _purge_expired(conn: sqlite3.Connection) -> dict[str, int]:
+        now = time.time()
+        purged = {}
+        for kind, table in (
+            ("state", "states"),
+            ("auth_code", "auth_codes"),
+            ("access_token", "access_tokens"),
+            ("refresh_token", "refresh_tokens"),
+        ):
+            count = conn.execute(
+                f"DELETE FROM {table} WHERE expires_at <= ?", (now,)
+            ).rowcount
+            if count:
+                purged[kind] = count
+        return purged
+
+    # Clients
+
+    async def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        row = await self._read(
+            lambda conn: conn.execute(
+                "SELECT data FROM clients WHERE client_id = ?", (client_id,)
+            ).fetchone()
+        )
+        return OAuthClientInformationFull.model_validate_json(row[0]) if row else None
+
+    async def add_client(self, client_info: OAuthClientInformationFull) -> None:
+        data = client_info.model_dump_json()
+        await self._write(
+            lambda conn: conn.execute(
+                "INSERT OR REPLACE INTO clients (client_id, data) VALUES (?, ?)",
+                (client_info.client_id, data),
+            )
+        )
+
+    # Authorization state
+
+    async def add_state(
+        self, state: str, data: dict[str, str], expires_at: float
+    ) -> None:
+        encoded = json.dumps(data)
+        await self._write(
+            lambda conn: conn.execute(
+                "INSERT OR REPLACE INTO states (state, data, expires_at) "
+                "VALUES (?, ?, ?)",
+                (state, encoded, expires_at),
+            )
+        )
+
+    async def get_state(self, state: str) -> dict[str, str] | None:
+        row = await self._read(
+            lambda conn: conn.execute(
+                "SELECT data FROM states WHERE state = ?", (state,)
+            ).fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    async def remove_state(self, state: str) -> None:
+        await self._write(
+            lambda conn: conn.execute("DELETE FROM states WHERE state = ?", (state,))
+        )
+
+    # Authorization codes
+
+    async def add_pending_authorization(
+        self, auth_code: AuthorizationCode, github_token: AccessToken
+    ) -> None:
+        data = auth_code.model_dump_json()
+        await self._write(
+            lambda conn: conn.execute(
+                "INSERT OR REPLACE INTO auth_codes "
+                "(code, data, github_token, expires_at) VALUES (?, ?, ?, ?)",
+                (auth_code.code, data, github_token.token, auth_code.expires_at),
+            )
+        )
+
+    async def get_auth_code(self, code: str) -> AuthorizationCode | None:
+        row = await self._read(
+            lambda conn: conn.execute(
+                "SELECT data FROM auth_codes WHERE code = ?", (code,)
+            ).fetchone()
+        )
+        return AuthorizationCode.model_validate_json(row[0]) if row else None
+
+    async def redeem_auth_code(
+        self,
+        code: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken | None = None,
+    ) -> str | None:
+        insert_tokens = self._insert_tokens(access_token, refresh_token)
+
+        def redeem(conn: sqlite3.Connection) -> str | None:
+            row = conn.execute(
+                "SELECT github_token FROM auth_codes WHERE code = ?", (code,)
+            ).fetchone()
+            if row is None:
+                raise LookupError("Authorization code does not exist")
+            github_token = row[0]
+            conn.execute("DELETE FROM auth_codes WHERE code = ?", (code,))
+            insert_tokens(conn, github_token)
+            return github_token
+
+        return await self._write(redeem)
+
+    @staticmethod
+    def _insert_tokens(
+        access_token: AccessToken | None, refresh_token: RefreshToken | None
+    ) -> Callable[[sqlite3.Connection, str | None], None]:
+        """Return an op body storing a newly issued token pair."""
+        access_data = access_token.model_dump_json() if access_token else None
+        refresh_data = refresh_token.model_dump_json() if refresh_token else None
+        partner = access_token.token if access_token else None
+
+        def insert(conn: sqlite3.Connection, github_token: str | None) -> None:
+            if access_token is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO access_tokens "
+                    "(token, data, github_token, expires_at) VALUES (?, ?, ?, ?)",
+                    (
+                        access_token.token,
+                        access_data,
+                        github_token,
+                        access_token.expires_at,
+                    ),
+                )
+            if refresh_token is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO refresh_tokens "
+                    "(token, data, github_token, access_token, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        refresh_token.token,
+                        refresh_data,
+                        github_token,
+                        partner,
+                        refresh_token.expires_at,
+                    ),
+                )
+
+        return insert
+
+    # Access tokens
+
+    async def get_access_token(self, token: str) -> AccessToken | None:
+        row = await self._read(
+            lambda conn: conn.execute(
+                "SELECT data FROM access_tokens WHERE token = ?", (token,)
+            ).fetchone()
+        )
+        return AccessToken.model_validate_json(row[0]) if row else None
+
+    async def get_github_token(self, mcp_token: str) -> str | None:
+        row = await self._read(
+            lambda conn: conn.execute(
+                "SELECT github_token FROM access_tokens WHERE token = ?",
+                (mcp_token,),
+            ).fetchone()
+        )
+        return row[0] if row else None
+
+    async def remove_access_token(self, token: str) -> bool:
+        removed = await self._write(
+            lambda conn: (
+                conn.execute(
+                    "DELETE FROM access_tokens WHERE token = ?", (token,)
+                ).rowcount
+            )
+        )
+        return removed > 0
+
+    # Refresh tokens
+
+    async def get_refresh_token(self, token: str) -> RefreshToken | None:
+        row = await self._read(
+            lambda conn: conn.execute(
+                "SELECT data FROM refresh_tokens WHERE token = ?", (token,)
+            ).fetchone()
+        )
+        return RefreshToken.model_validate_json(row[0]) if row else None
+
+    async def rotate_refresh_token(
+        self,
+        old_token: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken,
+    ) -> str | None:
+        insert_tokens = self._insert_tokens(access_token, refresh_token)
+
+        def rotate(conn: sqlite3.Connection) -> str | None:
+            row = conn.execute(
+                "SELECT github_token FROM refresh_tokens WHERE token = ?",
+                (old_token,),
+            ).fetchone()
+            if row is None:
+                raise LookupError("Refresh token does not exist")
+            conn.execute("DELETE FROM refresh_tokens WHERE token = ?", (old_token,))
+            insert_tokens(conn, row[0])
+            return row[0]
+
+        return await self._write(rotate)
+
+    async def revoke(self, token: str) -> bool:
+        def revoke(conn: sqlite3.Connection) -> bool:
+            if conn.execute(
+                "DELETE FROM access_tokens WHERE token = ?", (token,)
+            ).rowcount:
+                # Along with the refresh token issued with it
+                conn.execute(
+                    "DELETE FROM refresh_tokens WHERE access_token = ?", (token,)
+                )
+                return True
+            row = conn.execute(
+                "SELECT access_token FROM refresh_tokens WHERE token = ?", (token,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM refresh_tokens WHERE token = ?", (token,))
+                conn.execute("DELETE FROM access_tokens WHERE token = ?", (row[0],))
+                return True
+            # Not an MCP token - revoke it as a GitHub token
+            removed = 0
+            for table in ("access_tokens", "refresh_tokens", "auth_codes"):
+                removed += conn.execute(
+                    f"DELETE FROM {table} WHERE github_token = ?", (token,)
+                ).rowcount
+            return removed > 0
+
+        return await self._write(revoke)
+
+    # Introspection
+
+    async def stats(self) -> dict[str, int]:
+        def count(conn: sqlite3.Connection) -> dict[str, int]:
+            def scalar(sql: str) -> int:
+                return conn.execute(sql).fetchone()[0]
+
+            return {
+                "clients": scalar("SELECT COUNT(*) FROM clients"),
+                "states": scalar("SELECT COUNT(*) FROM states"),
+                "auth_codes": scalar("SELECT COUNT(*) FROM auth_codes"),
+                "access_tokens": scalar("SELECT COUNT(*) FROM access_tokens"),
+                "refresh_tokens": scalar("SELECT COUNT(*) FROM refresh_tokens"),
+                "github_tokens": scalar(
+                    "SELECT COUNT(*) FROM ("
+                    "SELECT github_token FROM auth_codes "
+                    "UNION SELECT github_token FROM access_tokens "
+                    "UNION SELECT github_token FROM refresh_tokens"
+                    ") WHERE github_token IS NOT NULL"
+                ),
+            }
+
+        return await self._read(count)
@@ -0,0 +1,612 @@
+"""In-memory OAuth state store with compact records and secondary indexes."""
+
+import sys
+from collections.abc import Collection, Iterator
+from typing import Any
+
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from mcp.shared.auth import OAuthClientInformationFull
+from pydantic import AnyHttpUrl
+
+from mcp_simple_auth.expiry import ExpiryQueue
+from mcp_simple_auth.registration import ClientRegistry
+
+# Entry kinds tracked by the expiry queue
+STATE = "state"
+AUTH_CODE = "auth_code"
+ACCESS_TOKEN = "access_token"
+REFRESH_TOKEN = "refresh_token"
+GITHUB_TOKEN = "github_token"
+
+# Prefixes packed into a tag byte when lowercase hex follows them; the
+# first that matches is used, so longer ones come first
+_HEX_PREFIXES = ("mcp_rt_", "mcp_", "")
+_HEX_TAGS = [(bytes((tag,)), prefix) for tag, prefix in enumerate(_HEX_PREFIXES)]
+# Tag of tokens kept as their UTF-8 text
+_TEXT = 0x0F
+
+# Distinct scope lists interned; past this, new ones are kept as they are
+_MAX_INTERNED_SCOPES = 1024
+
+
+def pack_token(token: str) -> bytes:
+    """A token as a key: a tag byte, then its hex digits as bytes or its text.
+
+    Our tokens and codes are a prefix and random hex, and pack into half
+    their length; any other string packs into its text, under a tag of its
+    own, so two strings never pack alike.
+    """
+    for tag, prefix in _HEX_TAGS:
+        if token.startswith(prefix):
+            digits = token[len(prefix) :]
+            try:
+                packed = bytes.fromhex(digits)
+            except ValueError:
+                continue
+            # fromhex also takes uppercase and spaces, which would not unpack
+            if packed.hex() == digits:
+                return tag + packed
+    return bytes((_TEXT,)) + token.encode()
+
+
+def unpack_token(key: bytes) -> str:
+    if key[0] == _TEXT:
+        return key[1:].decode()
+    return _HEX_PREFIXES[key[0]] + key[1:].hex()
+
+
+class Session:
+    """A GitHub token, and the keys of the codes and MCP tokens it backs."""
+
+    __slots__ = ("client_id", "expires_at", "refs", "scopes")
+
+    def __init__(
+        self, client_id: str, scopes: tuple[str, ...], expires_at: float | None
+    ):
+        self.client_id = client_id
+        self.scopes = scopes
+        self.expires_at = expires_at
+        self.refs: list[bytes] = []
+
+
+class StateRecord:
+    """What the callback needs of an authorize request."""
+
+    __slots__ = (
+        "client_id",
+        "code_challenge",
+        "expires_at",
+        "explicit",
+        "redirect_uri",
+    )
+
+    def __init__(
+        self,
+        client_id: str,
+        redirect_uri: str,
+        code_challenge: str,
+        explicit: bool,
+        expires_at: float,
+    ):
+        self.client_id = client_id
+        self.redirect_uri = redirect_uri
+        self.code_challenge = code_challenge
+        self.explicit = explicit  # Whether the redirect URI was given
+        self.expires_at = expires_at
+
+
+class CodeRecord:
+    """An authorization code, and the session of its GitHub token."""
+
+    __slots__ = (
+        "client_id",
+        "code_challenge",
+        "expires_at",
+        "explicit",
+        "redirect_uri",
+        "scopes",
+        "session",
+    )
+
+    def __init__(
+        self,
+        client_id: str,
+        scopes: tuple[str, ...],
+        expires_at: float,
+        redirect_uri: str,
+        explicit: bool,
+        code_challenge: str,
+        session: bytes | None,
+    ):
+        self.client_id = client_id
+        self.scopes = scopes
+        self.expires_at = expires_at
+        self.redirect_uri = redirect_uri
+        self.explicit = explicit
+        self.code_challenge = code_challenge
+        self.session = session  # Key of the GitHub token, until redeemed
+
+
+class TokenRecord:
+    """An MCP access or refresh token."""
+
+    __slots__ = ("client_id", "expires_at", "partner", "scopes", "session")
+
+    def __init__(
+        self,
+        client_id: str,
+        scopes: tuple[str, ...],
+        expires_at: int | None,
+        session: bytes | None,
+    ):
+        self.client_id = client_id
+        self.scopes = scopes
+        self.expires_at = expires_at
+        self.session = session  # Key of the GitHub token backing it
+        self.partner: bytes | None = None  # Token issued together with it
+
+
+class TokenStore:
+    """OAuth state for the GitHub provider, indexed for O(1) access.
+
+    Entries are slotted records keyed by packed tokens (see pack_token),
+    with client IDs, scopes and redirect URIs interned, since many entries
+    share them. Pydantic models are built from the records only when a
+    method returns one; validating them is faster than model_construct.
+
+    MCP access tokens and upstream GitHub tokens live in separate maps, so a
+    token's kind never has to be guessed from its prefix. A GitHub token's
+    Session links the codes and MCP tokens it backs, and each of those links
+    back to it, so the token exchange finds it directly instead of searching
+    for it.
+
+    Entries with a deadline are tracked in an expiry queue and removed by
+    evict_expired. GitHub tokens without one live as long as a code or MCP
+    token (access or refresh) refers to them.
+    """
+
+    def __init__(self, max_clients: int = 10000) -> None:
+        self.clients = ClientRegistry(max_clients)
+        self.auth_codes: dict[bytes, CodeRecord] = {}
+        self.state_mapping: dict[bytes, StateRecord] = {}
+        # MCP access tokens issued by this server
+        self.tokens: dict[bytes, TokenRecord] = {}
+        # MCP refresh tokens issued by this server
+        self.refresh_tokens: dict[bytes, TokenRecord] = {}
+        # Upstream GitHub tokens obtained in the callback
+        self.github_tokens: dict[bytes, Session] = {}
+
+        # Secondary indexes
+        # {"client_id": {access token key, ...}}
+        self._tokens_by_client: dict[str, set[bytes]] = {}
+
+        self._scopes: dict[tuple[str, ...], tuple[str, ...]] = {}
+        self._by_kind: dict[str, dict[bytes, Any]] = {
+            STATE: self.state_mapping,
+            AUTH_CODE: self.auth_codes,
+            ACCESS_TOKEN: self.tokens,
+            REFRESH_TOKEN: self.refresh_tokens,
+            GITHUB_TOKEN: self.github_tokens,
+        }
+        self.expiry = ExpiryQueue(self._deadline)
+
+    def _intern_scopes(self, scopes: list[str]) -> tuple[str, ...]:
+        key = tuple(sys.intern(scope) for scope in scopes)
+        if len(self._scopes) >= _MAX_INTERNED_SCOPES:
+            return self._scopes.get(key, key)
+        return self._scopes.setdefault(key, key)
+
+    # Clients
+
+    def get_client(self, client_id: str) -> OAuthClientInformationFull | None:
+        return self.clients.use(client_id)
+
+    def add_client(self, client_info: OAuthClientInformationFull) -> None:
+        self.clients.add(client_info)
+
+    # Authorization state
+
+    def add_state(self, state: str, data: dict[str, str], expires_at: float) -> None:
+        key = pack_token(state)
+        self.state_mapping[key] = StateRecord(
+            sys.intern(data["client_id"]),
+            sys.intern(data["redirect_uri"]),
+            data["code_challenge"],
+            data["redirect_uri_provided_explicitly"] == "True",
+            expires_at,
+        )
+        self.expiry.schedule(STATE, key, expires_at)
+
+    def get_state(self, state: str) -> dict[str, str] | None:
+        record = self.state_mapping.get(pack_token(state))
+        if record is None:
+            return None
+        return {
+            "redirect_uri": record.redirect_uri,
+            "code_challenge": record.code_challenge,
+            "redirect_uri_provided_explicitly": str(record.explicit),
+            "client_id": record.client_id,
+        }
+
+    def remove_state(self, state: str) -> None:
+        self.state_mapping.pop(pack_token(state), None)
+
+    # Authorization codes
+
+    def add_pending_authorization(
+        self, auth_code: AuthorizationCode, github_token: AccessToken
+    ) -> None:
+        """Store an authorization code together with its GitHub token."""
+        code = pack_token(auth_code.code)
+        session_key = pack_token(github_token.token)
+        session = self.github_tokens.get(session_key)
+        if session is None:
+            session = self.github_tokens[session_key] = Session(
+                sys.intern(github_token.client_id),
+                self._intern_scopes(github_token.scopes),
+                github_token.expires_at,
+            )
+            if github_token.expires_at is not None:
+                self.expiry.schedule(GITHUB_TOKEN, session_key, github_token.expires_at)
+        session.refs.append(code)
+        self.auth_codes[code] = CodeRecord(
+            sys.intern(auth_code.client_id),
+            self._intern_scopes(auth_code.scopes),
+            auth_code.expires_at,
+            sys.intern(str(auth_code.redirect_uri)),
+            auth_code.redirect_uri_provided_explicitly,
+            auth_code.code_challenge,
+            session_key,
+        )
+        self.expiry.schedule(AUTH_CODE, code, auth_code.expires_at)
+
+    def get_auth_code(self, code: str) -> AuthorizationCode | None:
+        record = self.auth_codes.get(pack_token(code))
+        if record is None:
+            return None
+        return AuthorizationCode(
+            code=code,
+            scopes=list(record.scopes),
+            expires_at=record.expires_at,
+            client_id=record.client_id,
+            code_challenge=record.code_challenge,
+            redirect_uri=AnyHttpUrl(record.redirect_uri),
+            redirect_uri_provided_explicitly=record.explicit,
+        )
+
+    def remove_auth_code(self, code: str) -> bool:
+        """Discard an authorization code without exchanging it.
+
+        The linked GitHub token is dropped once nothing refers to it anymore.
+        """
+        return self._remove_auth_code(pack_token(code))
+
+    def _remove_auth_code(self, code: bytes) -> bool:
+        record = self.auth_codes.pop(code, None)
+        if record is None:
+            return False
+        if record.session is not None:
+            self._release_session(record.session, code)
+        return True
+
+    def redeem_auth_code(
+        self,
+        code: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken | None = None,
+    ) -> str | None:
+        """Exchange an authorization code for MCP tokens.
+
+        The code is removed, the tokens are stored, and the GitHub token
+        linked to the code now backs them. Returns that GitHub token, if there
+        was one. A self-contained access token is passed as None. Raises
+        LookupError if the code is gone, e.g. because it was already redeemed.
+        """
+        key = pack_token(code)
+        record = self.auth_codes.pop(key, None)
+        if record is None:
+            raise LookupError("Authorization code does not exist")
+        session_key = record.session
+        self._add_tokens(access_token, refresh_token, session_key)
+        if session_key is None:
+            return None
+        self._release_session(session_key, key)
+        return unpack_token(session_key)
+
+    def _add_tokens(
+        self,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken | None,
+        session_key: bytes | None,
+    ) -> None:
+        access_key = None
+        if access_token is not None:
+            access_key = self._add_access_token(access_token, session_key)
+        if refresh_token is not None:
+            self._add_refresh_token(refresh_token, session_key, access_key)
+
+    def _link(self, token: bytes, session_key: bytes | None) -> bytes | None:
+        """Add token to the refs of a session; the session's key, if it exists."""
+        session = self.github_tokens.get(session_key) if session_key else None
+        if session is None:
+            return None
+        session.refs.append(token)
+        return session_key
+
+    # Access tokens
+
+    def add_access_token(
+        self, access_token: AccessToken, github_token: str | None = None
+    ) -> None:
+        """Store an MCP access token, optionally linked to a GitHub token."""
+        session_key = pack_token(github_token) if github_token is not None else None
+        self._add_access_token(access_token, session_key)
+
+    def _add_access_token(
+        self, access_token: AccessToken, session_key: bytes | None
+    ) -> bytes:
+        key = pack_token(access_token.token)
+        client_id = sys.intern(access_token.client_id)
+        self.tokens[key] = TokenRecord(
+            client_id,
+            self._intern_scopes(access_token.scopes),
+            access_token.expires_at,
+            self._link(key, session_key),
+        )
+        self._tokens_by_client.setdefault(client_id, set()).add(key)
+        if access_token.expires_at is not None:
+            self.expiry.schedule(ACCESS_TOKEN, key, access_token.expires_at)
+        return key
+
+    def get_access_token(self, token: str) -> AccessToken | None:
+        record = self.tokens.get(pack_token(token))
+        if record is None:
+            return None
+        return AccessToken(
+            token=token,
+            client_id=record.client_id,
+            scopes=list(record.scopes),
+            expires_at=record.expires_at,
+        )
+
+    def get_github_token(self, mcp_token: str) -> str | None:
+        """Return the GitHub token backing an MCP access token."""
+        key = pack_token(mcp_token)
+        record = self.tokens.get(key) or self.refresh_tokens.get(key)
+        if record is None or record.session is None:
+            return None
+        return unpack_token(record.session)
+
+    def remove_access_token(self, token: str) -> bool:
+        """Remove an MCP access token and its link to its GitHub token.
+
+        The linked GitHub token is dropped once nothing refers to it anymore.
+        """
+        return self._remove_access_token(pack_token(token))
+
+    def _remove_access_token(self, key: bytes) -> bool:
+        record = self.tokens.pop(key, None)
+        if record is None:
+            return False
+        self._unpair(record)
+
+        client_tokens = self._tokens_by_client.get(record.client_id)
+        if client_tokens is not None:
+            client_tokens.discard(key)
+            if not client_tokens:
+                del self._tokens_by_client[record.client_id]
+
+        if record.session is not None:
+            self._release_session(record.session, key)
+        return True
+
+    def remove_github_token(self, github_token: str) -> bool:
+        """Remove a GitHub token and every code and MCP token linked to it."""
+        return self._remove_session(pack_token(github_token))
+
+    def _remove_session(self, session_key: bytes) -> bool:
+        session = self.github_tokens.get(session_key)
+        if session is None:
+            return False
+        for ref in list(session.refs):
+            if ref in self.tokens:
+                self._remove_access_token(ref)
+            elif ref in self.refresh_tokens:
+                self._remove_refresh_token(ref)
+            else:
+                self._remove_auth_code(ref)
+        # The last reference normally drops the token already
+        self.github_tokens.pop(session_key, None)
+        return True
+
+    # Refresh tokens
+
+    def add_refresh_token(
+        self,
+        refresh_token: RefreshToken,
+        github_token: str | None = None,
+        access_token: str | None = None,
+    ) -> None:
+        """Store an MCP refresh token, optionally linked to a GitHub token.
+
+        access_token is the access token issued together with it; revoking
+        either of the two revokes both.
+        """
+        self._add_refresh_token(
+            refresh_token,
+            pack_token(github_token) if github_token is not None else None,
+            pack_token(access_token) if access_token is not None else None,
+        )
+
+    def _add_refresh_token(
+        self,
+        refresh_token: RefreshToken,
+        session_key: bytes | None,
+        access_key: bytes | None,
+    ) -> None:
+        key = pack_token(refresh_token.token)
+        record = self.refresh_tokens[key] = TokenRecord(
+            sys.intern(refresh_token.client_id),
+            self._intern_scopes(refresh_token.scopes),
+            refresh_token.expires_at,
+            self._link(key, session_key),
+        )
+        if refresh_token.expires_at is not None:
+            self.expiry.schedule(REFRESH_TOKEN, key, refresh_token.expires_at)
+        access = self.tokens.get(access_key) if access_key is not None else None
+        if access is not None:
+            record.partner = access_key
+            access.partner = key
+
+    def get_refresh_token(self, token: str) -> RefreshToken | None:
+        record = self.refresh_tokens.get(pack_token(token))
+        if record is None:
+            return None
+        return RefreshToken(
+            token=token,
+            client_id=record.client_id,
+            scopes=list(record.scopes),
+            expires_at=record.expires_at,
+        )
+
+    def remove_refresh_token(self, token: str) -> bool:
+        """Remove an MCP refresh token and its link to its GitHub token."""
+        return self._remove_refresh_token(pack_token(token))
+
+    def _remove_refresh_token(self, key: bytes) -> bool:
+        record = self.refresh_tokens.pop(key, None)
+        if record is None:
+            return False
+        self._unpair(record)
+        if record.session is not None:
+            self._release_session(record.session, key)
+        return True
+
+    def rotate_refresh_token(
+        self,
+        old_token: str,
+        access_token: AccessToken | None,
+        refresh_token: RefreshToken,
+    ) -> str | None:
+        """Replace a refresh token with a new access and refresh token pair.
+
+        The new tokens are backed by the old refresh token's GitHub token,
+        which is returned. Raises LookupError if the old token is gone.
+        """
+        old_key = pack_token(old_token)
+        old = self.refresh_tokens.get(old_key)
+        if old is None:
+            raise LookupError("Refresh token does not exist")
+        # Add the new tokens first so the GitHub token stays referenced
+        self._add_tokens(access_token, refresh_token, old.session)
+        self._remove_refresh_token(old_key)
+        return unpack_token(old.session) if old.session is not None else None
+
+    def revoke(self, token: str) -> bool:
+        """Revoke an MCP or GitHub token, whichever kind it is.
+
+        Revoking an access or refresh token also revokes the token it was
+        issued together with.
+        """
+        key = pack_token(token)
+        record = self.tokens.get(key) or self.refresh_tokens.get(key)
+        if record is None:
+            return self._remove_session(key)
+        partner = record.partner
+        if key in self.tokens:
+            self._remove_access_token(key)
+        else:
+            self._remove_refresh_token(key)
+        if partner is not None and not self._remove_access_token(partner):
+            self._remove_refresh_token(partner)
+        return True
+
+    def revoke_client(self, client_id: str) -> int:
+        """Revoke every MCP access token issued to a client."""
+        keys = list(self._tokens_by_client.get(client_id, ()))
+        for key in keys:
+            self._remove_access_token(key)
+        return len(keys)
+
+    def _unpair(self, record: TokenRecord) -> None:
+        if record.partner is None:
+            return
+        partner = self.tokens.get(record.partner) or self.refresh_tokens.get(
+            record.partner
+        )
+        if partner is not None:
+            partner.partner = None
+        record.partner = None
+
+    def _release_session(self, session_key: bytes, ref: bytes) -> None:
+        session = self.github_tokens.get(session_key)
+        if session is None:
+            return
+        try:
+            session.refs.remove(ref)
+        except ValueError:
+            return
+        if not session.refs:
+            del self.github_tokens[session_key]
+
+    # Introspection
+
+    def collections(self) -> dict[str, Collection[Any]]:
+        """Every map, index and queue of the store, by attribute name."""
+        return {
+            "clients": self.clients,
+            "auth_codes": self.auth_codes,
+            "state_mapping": self.state_mapping,
+            "tokens": self.tokens,
+            "refresh_tokens": self.refresh_tokens,
+            "github_tokens": self.github_tokens,
+            "_tokens_by_client": self._tokens_by_client,
+            "expiry._heap": self.expiry._heap,
+        }
+
+    # Expiry
+
+    def _deadline(self, kind: str, key: bytes) -> float | None:
+        record = self._by_kind[kind].get(key)
+        return record.expires_at if record is not None else None
+
+    def _live_deadlines(self) -> Iterator[tuple[float, str, bytes]]:
+        for kind, entries in self._by_kind.items():
+            for key, record in entries.items():
+                if record.expires_at is not None:
+                    yield record.expires_at, kind, key
+
+    def evict_expired(self, now: float) -> dict[str, int]:
+        """Remove every entry whose deadline has passed.
+
+        Returns the number of entries removed per kind; GitHub tokens dropped
+        because their last code or MCP token expired are counted too.
+        """
+        github_before = len(self.github_tokens)
+        evicted: dict[str, int] = {}
+        for kind, key in self.expiry.pop_expired(now):
+            if kind == STATE:
+                removed = self.state_mapping.pop(key, None) is not None
+            elif kind == AUTH_CODE:
+                removed = self._remove_auth_code(key)
+            elif kind == ACCESS_TOKEN:
+                removed = self._remove_access_token(key)
+            elif kind == REFRESH_TOKEN:
+                removed = self._remove_refresh_token(key)
+            else:
+                # Counted below, together with the cascaded ones
+                self._remove_session(key)
+                removed = False
+            if removed:
+                evicted[kind] = evicted.get(kind, 0) + 1
+
+        github_dropped = github_before - len(self.github_tokens)
+        if github_dropped:
+            evicted[GITHUB_TOKEN] = github_dropped
+
+        # Items of entries removed before they expired pile up; rebuild once
+        # they outnumber the entries
+        entries = sum(len(entries) for entries in self._by_kind.values())
+        if len(self.expiry) > 2 * entries + 1024:
+            self.expiry.rebuild(self._live_deadlines())
+        return evicted
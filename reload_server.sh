@@ -0,0 +1,30 @@
+#!/bin/bash
+
+# MCP Server Reload Script
+#
+# Replaces a server started with --pid-file by a fresh process without
+# dropping connections (see "Reloading without downtime" in README.md).
+
+PID_FILE="${1:-mcp_server.pid}"
+
+if [ ! -f "$PID_FILE" ]; then
+    echo "No PID file at $PID_FILE; start the server with --pid-file $PID_FILE"
+    exit 1
+fi
+
+OLD_PID=$(cat "$PID_FILE")
+echo "Reloading MCP server process $OLD_PID..."
+kill -HUP "$OLD_PID" || exit 1
+
+# The new process writes its PID once it is serving
+for _ in $(seq 1 60); do
+    sleep 1
+    NEW_PID=$(cat "$PID_FILE" 2>/dev/null)
+    if [ -n "$NEW_PID" ] && [ "$NEW_PID" != "$OLD_PID" ]; then
+        echo "✅ MCP server reloaded: process $NEW_PID is serving, $OLD_PID is draining."
+        exit 0
+    fi
+done
+
+echo "❌ No new server process after 60s; check the server log. $OLD_PID is still serving."
+exit 1
@@ -0,0 +1,26 @@
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+from mcp_simple_auth.server import ServerSettings
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def make_settings() -> Callable[..., ServerSettings]:
+    """Build settings from keyword arguments, ignoring any .env file."""
+
+    def make(**overrides: Any) -> ServerSettings:
+        return ServerSettings(
+            _env_file=None,
+            github_client_id="client-id",
+            github_client_secret="client-secret",
+            **overrides,
+        )
+
+    return make
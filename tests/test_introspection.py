@@ -0,0 +1,88 @@
+"""IntrospectionVerifier's cache of the authorization server's answers."""
+
+import time
+
+import httpx
+import pytest
+
+from mcp_simple_auth.introspection import IntrospectionVerifier
+
+pytestmark = pytest.mark.anyio
+
+URL = "http://auth/introspect"
+
+
+class AuthServer:
+    """Answers /introspect with body, counting the requests."""
+
+    def __init__(self, body: dict | None = None, fail: bool = False):
+        self.body = body or {"active": False}
+        self.fail = fail
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.fail:
+            raise httpx.ConnectError("unreachable", request=request)
+        return httpx.Response(200, json=self.body)
+
+
+def verifier_for(server: AuthServer, **options: float) -> IntrospectionVerifier:
+    verifier = IntrospectionVerifier(URL, "secret", **options)
+    verifier._client = httpx.AsyncClient(transport=httpx.MockTransport(server))
+    return verifier
+
+
+def active(expires_in: int = 3600) -> dict:
+    return {
+        "active": True,
+        "client_id": "client",
+        "scope": "user",
+        "exp": int(time.time()) + expires_in,
+        "github_token": "gho_1",
+    }
+
+
+async def test_active_answers_are_cached():
+    server = AuthServer(active())
+    verifier = verifier_for(server, cache_ttl=30)
+    token = await verifier.load_access_token("mcp_1")
+    assert token is not None and token.scopes == ["user"]
+    assert await verifier.get_github_token("mcp_1") == "gho_1"
+    assert server.requests == 1
+
+
+async def test_active_answers_are_cached_until_the_token_expires():
+    body = active(expires_in=5)
+    verifier = verifier_for(AuthServer(body), cache_ttl=30)
+    introspection = await verifier.introspect("mcp_1")
+    assert introspection.cached_until == body["exp"]
+
+
+async def test_inactive_answers_are_cached_for_the_negative_ttl():
+    server = AuthServer({"active": False})
+    verifier = verifier_for(server, cache_ttl=30, negative_cache_ttl=0.05)
+    assert await verifier.load_access_token("mcp_1") is None
+    assert await verifier.load_access_token("mcp_1") is None
+    assert server.requests == 1
+    time.sleep(0.1)
+    assert await verifier.load_access_token("mcp_1") is None
+    assert server.requests == 2
+
+
+async def test_a_ttl_of_zero_turns_the_cache_off():
+    server = AuthServer(active())
+    verifier = verifier_for(server, cache_ttl=0)
+    await verifier.load_access_token("mcp_1")
+    await verifier.load_access_token("mcp_1")
+    assert server.requests == 2
+
+
+async def test_unreachable_auth_server_refuses_without_caching():
+    server = AuthServer(active(), fail=True)
+    verifier = verifier_for(server, cache_ttl=30, negative_cache_ttl=30)
+    assert await verifier.load_access_token("mcp_1") is None
+    assert await verifier.get_github_token("mcp_1") is None
+    assert server.requests == 2
+    server.fail = False
+    assert await verifier.load_access_token("mcp_1") is not None
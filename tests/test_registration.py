@@ -0,0 +1,49 @@
+"""RegistrationThrottle: which address a registration is counted against."""
+
+import httpx
+import pytest
+from starlette.types import Receive, Scope, Send
+
+from mcp_simple_auth.registration import RegistrationThrottle
+
+pytestmark = pytest.mark.anyio
+
+
+async def registered(scope: Scope, receive: Receive, send: Send) -> None:
+    await send({"type": "http.response.start", "status": 201})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def client_for(ip_header: str = "") -> httpx.AsyncClient:
+    throttle = RegistrationThrottle(
+        registered, rate=0.001, burst=1, ip_header=ip_header
+    )
+    return httpx.AsyncClient(
+        base_url="http://test", transport=httpx.ASGITransport(throttle)
+    )
+
+
+async def register(client: httpx.AsyncClient, real_ip: str | None = None) -> int:
+    headers = {"X-Real-IP": real_ip} if real_ip else {}
+    return (await client.post("/register", headers=headers)).status_code
+
+
+async def test_peer_address_ignores_forwarded_headers():
+    async with client_for() as client:
+        assert await register(client, "10.0.0.1") == 201
+        assert await register(client, "10.0.0.2") == 429
+
+
+async def test_ip_header_keys_on_its_last_address():
+    async with client_for("X-Real-IP") as client:
+        assert await register(client, "10.0.0.1") == 201
+        assert await register(client, "10.0.0.2") == 201
+        # A client can only add addresses before the one the proxy appends
+        assert await register(client, "10.0.0.3, 10.0.0.1") == 429
+
+
+async def test_ip_header_missing_falls_back_to_the_peer():
+    async with client_for("X-Real-IP") as client:
+        assert await register(client) == 201
+        assert await register(client) == 429
+        assert await register(client, "10.0.0.1") == 201
@@ -0,0 +1,113 @@
+"""ReloadMiddleware forwarding session requests between reload processes."""
+
+import httpx
+import pytest
+from starlette.types import Receive, Scope, Send
+
+from mcp_simple_auth.reload import FORWARDED_HEADER, ReloadMiddleware
+
+pytestmark = pytest.mark.anyio
+
+SESSION_HEADERS = {"Mcp-Session-Id": "session"}
+
+
+class LocalApp:
+    """Answers every request with status, recording the bodies it read."""
+
+    def __init__(self, status: int):
+        self.status = status
+        self.bodies: list[bytes] = []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.bodies.append((await receive())["body"])
+        await send({"type": "http.response.start", "status": self.status})
+        await send({"type": "http.response.body", "body": b"local"})
+
+
+class Peer:
+    """The other process, recording what is forwarded to it."""
+
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return httpx.Response(200, stream=httpx.ByteStream(b"peer"))
+
+
+def client_for(
+    status: int, peer: Peer | None = None
+) -> tuple[httpx.AsyncClient, ReloadMiddleware, LocalApp]:
+    app = LocalApp(status)
+    middleware = ReloadMiddleware(app)
+    if peer is not None:
+        middleware._peer = httpx.AsyncClient(
+            base_url="http://peer", transport=httpx.MockTransport(peer)
+        )
+    client = httpx.AsyncClient(
+        base_url="http://test", transport=httpx.ASGITransport(middleware)
+    )
+    return client, middleware, app
+
+
+@pytest.mark.parametrize("status", [400, 404])
+async def test_unknown_session_is_forwarded(status):
+    peer = Peer()
+    client, _, app = client_for(status, peer)
+    response = await client.post(
+        "/messages/?session_id=abc", content=b"message", headers=SESSION_HEADERS
+    )
+    assert (response.status_code, response.content) == (200, b"peer")
+    assert app.bodies == [b"message"]
+    (forwarded,) = peer.requests
+    assert forwarded.url.path == "/messages/"
+    assert forwarded.url.query == b"session_id=abc"
+    assert forwarded.content == b"message"
+    assert forwarded.headers[FORWARDED_HEADER.decode()] == "1"
+
+
+async def test_known_session_is_served_here():
+    peer = Peer()
+    client, _, _ = client_for(202, peer)
+    response = await client.post("/mcp/", content=b"{}", headers=SESSION_HEADERS)
+    assert (response.status_code, response.content) == (202, b"local")
+    assert peer.requests == []
+
+
+async def test_requests_outside_sessions_are_not_forwarded():
+    peer = Peer()
+    client, _, _ = client_for(404, peer)
+    response = await client.get("/unknown")
+    assert response.status_code == 404
+    assert peer.requests == []
+
+
+async def test_forwarded_requests_are_not_forwarded_again():
+    peer = Peer()
+    client, _, _ = client_for(404, peer)
+    headers = {**SESSION_HEADERS, FORWARDED_HEADER.decode(): "1"}
+    response = await client.post("/mcp/", content=b"{}", headers=headers)
+    assert (response.status_code, response.content) == (404, b"local")
+    assert peer.requests == []
+
+
+async def test_refusal_stands_once_the_peer_is_gone():
+    def gone(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("gone", request=request)
+
+    client, middleware, _ = client_for(404)
+    middleware._peer = httpx.AsyncClient(
+        base_url="http://peer", transport=httpx.MockTransport(gone)
+    )
+    response = await client.post("/mcp/", content=b"{}", headers=SESSION_HEADERS)
+    assert (response.status_code, response.content) == (404, b"local")
+    assert middleware._peer is None
+
+
+async def test_draining_closes_connections_outside_sessions():
+    client, middleware, _ = client_for(200)
+    await middleware.start_draining("http://successor")
+    response = await client.get("/")
+    assert response.headers["connection"] == "close"
+    response = await client.post("/mcp/", content=b"{}", headers=SESSION_HEADERS)
+    assert "connection" not in response.headers
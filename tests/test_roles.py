@@ -0,0 +1,62 @@
+"""Which endpoints each deployment role serves."""
+
+import pytest
+from starlette.applications import Starlette
+
+from mcp_simple_auth.cli import role_problem
+from mcp_simple_auth.server import create_app
+
+OAUTH_PATHS = {
+    "/.well-known/oauth-authorization-server",
+    "/authorize",
+    "/github/callback",
+    "/register",
+    "/revoke",
+    "/token",
+}
+MCP_PATHS = {"sse": {"/sse", "/messages"}, "streamable-http": {"/mcp"}}
+RESOURCE_SETTINGS = {
+    "role": "resource",
+    "auth_server_url": "http://localhost:9000",
+    "introspection_secret": "secret",
+}
+
+
+def paths(app: Starlette) -> set[str]:
+    return {getattr(route, "path", "") for route in app.routes}
+
+
+@pytest.mark.parametrize("transport", ["sse", "streamable-http"])
+def test_all_serves_oauth_and_mcp(make_settings, transport):
+    served = paths(create_app(make_settings(), transport))
+    assert OAUTH_PATHS | MCP_PATHS[transport] <= served
+    assert "/introspect" not in served
+
+
+@pytest.mark.parametrize("transport", ["sse", "streamable-http"])
+def test_auth_serves_oauth_only(make_settings, transport):
+    settings = make_settings(role="auth", introspection_secret="secret")
+    served = paths(create_app(settings, transport))
+    assert OAUTH_PATHS | {"/introspect"} <= served
+    assert not served & (MCP_PATHS["sse"] | MCP_PATHS["streamable-http"])
+
+
+@pytest.mark.parametrize("transport", ["sse", "streamable-http"])
+def test_resource_serves_mcp_only(make_settings, transport):
+    app = create_app(make_settings(**RESOURCE_SETTINGS), transport)
+    served = paths(app)
+    assert MCP_PATHS[transport] <= served
+    assert not served & (OAUTH_PATHS | {"/introspect"})
+    assert app.state.oauth_provider is None
+
+
+def test_resource_with_an_auth_server_is_accepted(make_settings):
+    assert role_problem(make_settings(**RESOURCE_SETTINGS)) is None
+    assert role_problem(make_settings(role="auth")) is None
+
+
+@pytest.mark.parametrize(
+    "missing", [{"auth_server_url": None}, {"introspection_secret": ""}]
+)
+def test_resource_without_an_auth_server_is_refused(make_settings, missing):
+    assert role_problem(make_settings(**{**RESOURCE_SETTINGS, **missing})) is not None
@@ -0,0 +1,17 @@
+import time
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from mcp_simple_auth.signed_tokens import TokenSigner
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "EdDSA"])
+def test_non_ascii_signature_is_refused(algorithm):
+    signer = TokenSigner([("k1", b"secret")], algorithm)
+    token = signer.issue("jti", "client", ["claudeai"], int(time.time()) + 60, None)
+    header, payload, _ = token.split(".")
+    assert signer.verify(f"{header}.{payload}.\xe9") is None
+    assert signer.verify(f"{header}.e30.\xe9") is None
+    assert signer.verify(token) is not None
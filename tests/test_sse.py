@@ -0,0 +1,87 @@
+"""SseSessionManager: posts to sessions that end while they are delivered."""
+
+import anyio
+import pytest
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from mcp.shared.message import SessionMessage
+from starlette.types import Message
+
+from mcp_simple_auth.sse import SseSessionManager
+
+pytestmark = pytest.mark.anyio
+
+PING = b'{"jsonrpc": "2.0", "id": 1, "method": "ping"}'
+
+
+async def busy_server(
+    inbound: MemoryObjectReceiveStream[SessionMessage | Exception],
+    outbound: MemoryObjectSendStream[SessionMessage],
+) -> None:
+    """A server that never takes a client message."""
+    await anyio.sleep_forever()
+
+
+async def open_session(manager: SseSessionManager, tg: anyio.abc.TaskGroup) -> str:
+    """Open an SSE stream in tg; its session ID once the endpoint is sent."""
+    opened = anyio.Event()
+    endpoint = ""
+
+    async def receive() -> Message:
+        await anyio.sleep_forever()
+        raise AssertionError
+
+    async def send(message: Message) -> None:
+        nonlocal endpoint
+        if b"event: endpoint" in message.get("body", b""):
+            endpoint = message["body"].decode()
+            opened.set()
+
+    tg.start_soon(manager.handle_sse, {"type": "http"}, receive, send)
+    await opened.wait()
+    return endpoint.split("session_id=")[1].split()[0]
+
+
+async def post(manager: SseSessionManager, session_id: str) -> int:
+    """Post a ping to a session; the response status."""
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/messages/",
+        "query_string": f"session_id={session_id}".encode(),
+        "headers": [],
+    }
+    statuses = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": PING, "more_body": False}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await manager.handle_post_message(scope, receive, send)
+    return statuses[0]
+
+
+async def test_post_during_reap_is_not_accepted():
+    manager = SseSessionManager(
+        "/messages/", busy_server, heartbeat_interval=0.05, idle_timeout=0.1
+    )
+    async with anyio.create_task_group() as tg:
+        session_id = await open_session(manager, tg)
+        # Waits for the server to take the message until the session is reaped
+        with anyio.fail_after(5):
+            assert await post(manager, session_id) == 404
+        assert not manager.sessions
+
+
+async def test_post_after_reap_is_not_found():
+    manager = SseSessionManager(
+        "/messages/", busy_server, heartbeat_interval=0.05, handshake_timeout=0.05
+    )
+    async with anyio.create_task_group() as tg:
+        session_id = await open_session(manager, tg)
+        with anyio.fail_after(5):
+            while manager.sessions:
+                await anyio.sleep(0.01)
+    assert await post(manager, session_id) == 404
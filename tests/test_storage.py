@@ -0,0 +1,179 @@
+"""Every storage backend, run through the same cases."""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
+import pytest
+from mcp.server.auth.provider import AccessToken, AuthorizationCode, RefreshToken
+from pydantic import AnyHttpUrl
+
+from mcp_simple_auth.storage import MemoryStorage
+from mcp_simple_auth.storage.base import OAuthStorage
+from mcp_simple_auth.storage.redis import RedisStorage
+from mcp_simple_auth.storage.sqlite import SQLiteStorage
+
+pytestmark = pytest.mark.anyio
+
+CLIENT_ID = "client"
+STATE = {
+    "redirect_uri": "http://localhost/callback",
+    "code_challenge": "challenge",
+    "redirect_uri_provided_explicitly": "True",
+    "client_id": CLIENT_ID,
+}
+SWEEP_INTERVAL = 0.05
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+async def storage(request, tmp_path) -> AsyncIterator[OAuthStorage]:
+    if request.param == "memory":
+        backend: OAuthStorage = MemoryStorage(SWEEP_INTERVAL)
+    elif request.param == "sqlite":
+        backend = SQLiteStorage(
+            str(tmp_path / "oauth.db"), sweep_interval=SWEEP_INTERVAL
+        )
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        backend = RedisStorage(client=fakeredis.FakeAsyncRedis(decode_responses=True))
+    async with backend.running():
+        yield backend
+
+
+def auth_code(code: str) -> AuthorizationCode:
+    return AuthorizationCode(
+        code=code,
+        scopes=["user"],
+        expires_at=time.time() + 300,
+        client_id=CLIENT_ID,
+        code_challenge="challenge",
+        redirect_uri=AnyHttpUrl("http://localhost/callback"),
+        redirect_uri_provided_explicitly=True,
+    )
+
+
+def access_token(token: str, expires_in: int = 3600) -> AccessToken:
+    return AccessToken(
+        token=token,
+        client_id=CLIENT_ID,
+        scopes=["user"],
+        expires_at=int(time.time()) + expires_in,
+    )
+
+
+def refresh_token(token: str) -> RefreshToken:
+    return RefreshToken(
+        token=token,
+        client_id=CLIENT_ID,
+        scopes=["user"],
+        expires_at=int(time.time()) + 86400,
+    )
+
+
+async def authorize(
+    storage: OAuthStorage, code: str, github_token: str = "gho_1"
+) -> None:
+    await storage.add_pending_authorization(
+        auth_code(code),
+        AccessToken(token=github_token, client_id=CLIENT_ID, scopes=[]),
+    )
+
+
+async def exchange(
+    storage: OAuthStorage, name: str, github_token: str = "gho_1"
+) -> None:
+    """Authorize and redeem a code for mcp_<name> and mcp_rt_<name>."""
+    await authorize(storage, f"code_{name}", github_token)
+    await storage.redeem_auth_code(
+        f"code_{name}", access_token(f"mcp_{name}"), refresh_token(f"mcp_rt_{name}")
+    )
+
+
+async def test_redeemed_code_cannot_be_redeemed_again(storage):
+    await authorize(storage, "code")
+    assert await storage.redeem_auth_code("code", access_token("mcp_1")) == "gho_1"
+    with pytest.raises(LookupError):
+        await storage.redeem_auth_code("code", access_token("mcp_2"))
+    assert await storage.get_auth_code("code") is None
+    assert await storage.get_access_token("mcp_2") is None
+    assert await storage.get_github_token("mcp_1") == "gho_1"
+
+
+async def test_concurrent_redemptions_have_one_winner(storage):
+    await authorize(storage, "code")
+    results = await asyncio.gather(
+        *(storage.redeem_auth_code("code", access_token(f"mcp_{i}")) for i in range(5)),
+        return_exceptions=True,
+    )
+    assert results.count("gho_1") == 1
+    assert all(isinstance(r, LookupError) for r in results if r != "gho_1")
+    stored = [await storage.get_access_token(f"mcp_{i}") for i in range(5)]
+    assert sum(token is not None for token in stored) == 1
+
+
+async def test_concurrent_rotations_have_one_winner(storage):
+    await exchange(storage, "1")
+    results = await asyncio.gather(
+        *(
+            storage.rotate_refresh_token(
+                "mcp_rt_1", access_token(f"mcp_{i}"), refresh_token(f"mcp_rt_{i}")
+            )
+            for i in range(2, 7)
+        ),
+        return_exceptions=True,
+    )
+    assert results.count("gho_1") == 1
+    assert all(isinstance(r, LookupError) for r in results if r != "gho_1")
+    assert await storage.get_refresh_token("mcp_rt_1") is None
+    winner = results.index("gho_1") + 2
+    for i in range(2, 7):
+        stored = await storage.get_refresh_token(f"mcp_rt_{i}")
+        assert (stored is not None) == (i == winner)
+    assert await storage.get_github_token(f"mcp_{winner}") == "gho_1"
+
+
+@pytest.mark.parametrize("revoked", ["mcp_1", "mcp_rt_1"])
+async def test_revoking_a_token_revokes_its_partner(storage, revoked):
+    await exchange(storage, "1")
+    await exchange(storage, "2")
+    assert await storage.revoke(revoked)
+    assert await storage.get_access_token("mcp_1") is None
+    assert await storage.get_refresh_token("mcp_rt_1") is None
+    assert await storage.get_access_token("mcp_2") is not None
+    assert await storage.get_refresh_token("mcp_rt_2") is not None
+    assert not await storage.revoke(revoked)
+
+
+async def test_revoking_a_github_token_cascades(storage):
+    await exchange(storage, "1")
+    await exchange(storage, "2")
+    await authorize(storage, "pending")
+    await exchange(storage, "other", github_token="gho_2")
+    assert await storage.revoke("gho_1")
+    for name in ("1", "2"):
+        assert await storage.get_access_token(f"mcp_{name}") is None
+        assert await storage.get_github_token(f"mcp_{name}") is None
+        assert await storage.get_refresh_token(f"mcp_rt_{name}") is None
+    assert await storage.get_auth_code("pending") is None
+    assert await storage.get_github_token("mcp_other") == "gho_2"
+    assert await storage.get_refresh_token("mcp_rt_other") is not None
+
+
+async def test_expired_entries_go_away(storage):
+    await storage.add_state("state", STATE, time.time() + 0.1)
+    await authorize(storage, "code")
+    await storage.redeem_auth_code(
+        "code", access_token("mcp_1", expires_in=1), refresh_token("mcp_rt_1")
+    )
+    assert await storage.get_state("state") == STATE
+    assert await storage.get_access_token("mcp_1") is not None
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and (
+        await storage.get_state("state") is not None
+        or await storage.get_access_token("mcp_1") is not None
+    ):
+        await asyncio.sleep(SWEEP_INTERVAL)
+    assert await storage.get_state("state") is None
+    assert await storage.get_access_token("mcp_1") is None
+    assert await storage.get_refresh_token("mcp_rt_1") is not None
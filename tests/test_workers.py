@@ -0,0 +1,49 @@
+"""Refusing configurations that can't be served from several processes."""
+
+import logging
+
+import pytest
+
+from mcp_simple_auth.cli import run_workers, shared_state_problem
+
+
+def test_memory_storage_is_not_shared(make_settings):
+    problem = shared_state_problem(make_settings(), "--workers")
+    assert problem is not None and "MCP_GITHUB_STORAGE" in problem
+
+
+@pytest.mark.parametrize("storage", ["sqlite", "redis"])
+def test_shared_storage_is_accepted(make_settings, storage):
+    assert shared_state_problem(make_settings(storage=storage), "--workers") is None
+
+
+def test_signed_tokens_need_shared_keys(make_settings):
+    settings = make_settings(storage="sqlite", access_token_format="signed")
+    problem = shared_state_problem(settings, "--workers")
+    assert problem is not None and "MCP_GITHUB_TOKEN_SIGNING_KEYS" in problem
+    settings = make_settings(
+        storage="sqlite", access_token_format="signed", token_signing_keys="k1:s"
+    )
+    assert shared_state_problem(settings, "--workers") is None
+
+
+def test_resource_servers_hold_no_state(make_settings):
+    assert shared_state_problem(make_settings(role="resource"), "--workers") is None
+
+
+@pytest.mark.parametrize(
+    "settings, transport, message",
+    [
+        ({}, "streamable-http", "MCP_GITHUB_STORAGE"),
+        ({"storage": "sqlite"}, "sse", "--transport streamable-http"),
+        (
+            {"storage": "sqlite", "log_file": "server.log"},
+            "streamable-http",
+            "MCP_GITHUB_LOG_FILE",
+        ),
+    ],
+)
+def test_run_workers_refuses(make_settings, caplog, settings, transport, message):
+    with caplog.at_level(logging.ERROR, logger="mcp_simple_auth.cli"):
+        assert run_workers(make_settings(**settings), transport, 2) == 1
+    assert message in caplog.text